@@ -0,0 +1,243 @@
+"""
+HTTP caching helpers - ETag validation, cached document responses and byte ranges
+"""
+
+import os
+import uuid
+from pathlib import Path
+from typing import Any, AsyncIterator, BinaryIO, Callable, List, Optional, Tuple, Union
+from urllib.parse import quote
+
+import aiofiles
+from aiofiles.threadpool import wrap
+from fastapi import Request, status
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from app.services.render_cache import render_cache
+from app.services.single_flight import single_flight
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match covers the given (unquoted) ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate.strip('"') == etag:
+            return True
+    return False
+
+
+def not_modified(etag: str, weak: bool = False) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": _etag_header(etag, weak), "Cache-Control": "private, no-cache"}
+    )
+
+
+def _etag_header(etag: str, weak: bool = False) -> str:
+    return f'W/"{etag}"' if weak else f'"{etag}"'
+
+
+def cached_document_response(
+    request: Request,
+    kind: str,
+    template_version: str,
+    payload: Any,
+    render: Callable[[], bytes],
+    filename: str,
+    media_type: str = "application/pdf"
+) -> Response:
+    """
+    Serve a rendered document from the render cache. A matching If-None-Match
+    gets 304 without reading the file; a miss renders once (shared by concurrent
+    identical requests) and stores the result.
+    """
+    key = render_cache.key_for(kind, template_version, payload)
+    etag = render_cache.lookup(key)
+    if etag is not None and etag_matches(request, etag):
+        return not_modified(etag)
+
+    data = render_cache.read(key, etag) if etag is not None else None
+    if data is None:
+        # Concurrent misses for the same document share one render
+        def render_and_store():
+            rendered = render()
+            return rendered, render_cache.store(key, rendered)
+
+        (data, etag), _ = single_flight.do(("render", key), render_and_store)
+
+    return Response(
+        content=data,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "ETag": f'"{etag}"',
+            "Cache-Control": "private, no-cache"
+        }
+    )
+
+
+MAX_RANGES = 16
+RANGE_READ_SIZE = 256 * 1024
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Inclusive (start, end) byte ranges from a Range header. None means serve
+    the whole file (no header, a malformed one, or too many ranges); an empty
+    list means no range is satisfiable.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec.strip():
+        return None
+    parts = [part.strip() for part in spec.split(",") if part.strip()]
+    if len(parts) > MAX_RANGES:
+        return None
+
+    ranges = []
+    for part in parts:
+        first, dash, last = part.partition("-")
+        if not dash:
+            return None
+        try:
+            if first == "":
+                # Suffix range: the last N bytes
+                length = int(last)
+                if length <= 0:
+                    continue
+                start, end = max(size - length, 0), size - 1
+            else:
+                start = int(first)
+                if last:
+                    end = int(last)
+                    if start > end:
+                        return None
+                    end = min(end, size - 1)
+                else:
+                    end = size - 1
+        except ValueError:
+            return None
+        if start < size:
+            ranges.append((start, end))
+    return ranges
+
+
+def _content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+async def _read_ranges(
+    source: Union[Path, BinaryIO], ranges: List[Tuple[int, int]], separators=None
+) -> AsyncIterator[bytes]:
+    # An open file is owned by the response and closed once it is sent
+    f = await aiofiles.open(source, "rb") if isinstance(source, (str, os.PathLike)) else wrap(source)
+    try:
+        for i, (start, end) in enumerate(ranges):
+            if separators:
+                yield separators[i]
+            await f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = await f.read(min(RANGE_READ_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        if separators:
+            yield separators[-1]
+    finally:
+        await f.close()
+
+
+def file_response(
+    request: Request,
+    source: Union[Path, BinaryIO],
+    size: int,
+    etag: str,
+    media_type: str,
+    filename: str,
+    weak: bool = False
+) -> Response:
+    """
+    Serve a stored file with ETag validation, If-Range and single or multiple
+    byte ranges (multipart/byteranges). Weak ETags never satisfy If-Range.
+    source is a path or a file open for reading; an open file is read from
+    that handle and closed by the response.
+    """
+    opened = not isinstance(source, (str, os.PathLike))
+    headers = {
+        "ETag": _etag_header(etag, weak),
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": _content_disposition(filename)
+    }
+    if etag_matches(request, etag):
+        if opened:
+            source.close()
+        return not_modified(etag, weak)
+
+    ranges = parse_range(request.headers.get("range"), size)
+    if_range = request.headers.get("if-range")
+    if ranges is not None and if_range is not None and (weak or if_range.strip().strip('"') != etag):
+        # The client's partial copy is stale; send everything
+        ranges = None
+
+    if ranges is None:
+        if not opened:
+            return FileResponse(source, media_type=media_type, headers=headers, stat_result=os.stat(source))
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(
+            _read_ranges(source, [(0, size - 1)] if size else []),
+            media_type=media_type,
+            headers=headers
+        )
+
+    if not ranges:
+        if opened:
+            source.close()
+        return Response(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={"Content-Range": f"bytes */{size}", **headers}
+        )
+
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            _read_ranges(source, ranges),
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            media_type=media_type,
+            headers=headers
+        )
+
+    boundary = uuid.uuid4().hex
+    separators = []
+    for i, (start, end) in enumerate(ranges):
+        lead = "" if i == 0 else "\r\n"
+        separators.append((
+            f"{lead}--{boundary}\r\n"
+            f"Content-Type: {media_type}\r\n"
+            f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+        ).encode())
+    separators.append(f"\r\n--{boundary}--\r\n".encode())
+    headers["Content-Length"] = str(
+        sum(len(sep) for sep in separators) + sum(end - start + 1 for start, end in ranges)
+    )
+    return StreamingResponse(
+        _read_ranges(source, ranges, separators),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=f"multipart/byteranges; boundary={boundary}",
+        headers=headers
+    )
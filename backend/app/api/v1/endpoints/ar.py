@@ -2,15 +2,19 @@
 AR Visualization Endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from pydantic import BaseModel, Field
 from app.core.database import get_db
 from app.api.dependencies import get_current_user
+from app.api.http_cache import cached_document_response
 from app.models.user import User
 from app.models.project import Project
 from app.models.calculation import Calculation
 from app.services.ar_visualization import ARVisualizationService
+from app.services.ar_scene_format import FORMAT_VERSION, MEDIA_TYPE, encode_scene
+from app.services.ar_tiles import ar_tiles
 from app.schemas.project import Project as ProjectSchema
 
 router = APIRouter()
@@ -54,7 +58,8 @@ def generate_ar_data(
     calc_data = [
         {
             "calculation_type": calc.calculation_type.value,
-            "design_outputs": calc.design_outputs or {}
+            "design_outputs": calc.design_outputs or {},
+            "input_parameters": calc.input_parameters or {}
         }
         for calc in calculations
     ]
@@ -69,6 +74,58 @@ def generate_ar_data(
     
     return ar_data
 
+@router.get("/scene/{project_id}")
+def get_ar_scene(
+    request: Request,
+    project_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Binary AR scene (instanced boxes, quantized geometry, material palette).
+    Served with a content-hash ETag so unchanged scenes revalidate with 304.
+    """
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    calculations = db.query(Calculation).filter(
+        Calculation.project_id == project_id,
+        Calculation.status == "completed"
+    ).all()
+    
+    if not calculations:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No completed calculations found"
+        )
+    
+    calc_data = [
+        {
+            "calculation_type": calc.calculation_type.value,
+            "design_outputs": calc.design_outputs or {},
+            "input_parameters": calc.input_parameters or {}
+        }
+        for calc in calculations
+    ]
+    
+    def render():
+        ar_data = ARVisualizationService().generate_ar_data({"id": project.id}, calc_data, {})
+        return encode_scene(ar_data["elements"])
+    
+    return cached_document_response(
+        request,
+        "ar_scene",
+        f"{FORMAT_VERSION}.{ARVisualizationService.SCENE_VERSION}",
+        calc_data,
+        render,
+        f"scene_{project.project_code}.cear",
+        media_type=MEDIA_TYPE
+    )
+
 @router.post("/markers/{project_id}")
 def generate_ar_markers(
     project_id: int,
@@ -120,3 +177,96 @@ def get_ar_instructions(
     instructions = ar_service.generate_ar_instructions(project_data)
     
     return instructions
+
+
+class CameraQuery(BaseModel):
+    position: List[float] = Field(..., min_length=3, max_length=3)
+    direction: List[float] = Field(..., min_length=3, max_length=3)
+    fov: float = Field(60.0, gt=0, lt=180)
+    aspect: float = Field(1.0, gt=0)
+    far: float = Field(500.0, gt=0)
+
+
+def _tile_calculations(db: Session, project_id: int):
+    """Project and the calculation data its AR tiles are built from"""
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    calculations = db.query(Calculation).filter(
+        Calculation.project_id == project_id,
+        Calculation.status == "completed"
+    ).order_by(Calculation.id).all()
+    
+    calc_data = [
+        {
+            "calculation_type": calc.calculation_type.value,
+            "calculation_code": calc.calculation_code,
+            "design_outputs": calc.design_outputs or {},
+            "input_parameters": calc.input_parameters or {}
+        }
+        for calc in calculations
+    ]
+    return project, calc_data
+
+@router.get("/tiles/{project_id}")
+def get_ar_tileset(
+    project_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Octree chunk metadata for a project's AR scene"""
+    _, calc_data = _tile_calculations(db, project_id)
+    return ar_tiles.index_for(calc_data).tileset()
+
+@router.post("/tiles/{project_id}/query")
+def query_ar_tiles(
+    project_id: int,
+    camera: CameraQuery,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Chunk ids intersecting the camera frustum, refined by distance"""
+    _, calc_data = _tile_calculations(db, project_id)
+    index = ar_tiles.index_for(calc_data)
+    
+    try:
+        chunks = index.query(camera.position, camera.direction, camera.fov, camera.aspect, camera.far)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return {"fingerprint": index.fingerprint, "chunks": chunks}
+
+@router.get("/tiles/{project_id}/{chunk_id}")
+def get_ar_tile(
+    request: Request,
+    project_id: int,
+    chunk_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """One octree chunk in the binary AR scene format, cacheable by ETag"""
+    project, calc_data = _tile_calculations(db, project_id)
+    index = ar_tiles.index_for(calc_data)
+    
+    if chunk_id not in index.nodes:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="AR tile not found"
+        )
+    
+    return cached_document_response(
+        request,
+        "ar_tile",
+        f"{FORMAT_VERSION}.{ARVisualizationService.SCENE_VERSION}",
+        [index.fingerprint, chunk_id],
+        lambda: index.encode_chunk(chunk_id),
+        f"tile_{project.project_code}_{chunk_id}.cear",
+        media_type=MEDIA_TYPE
+    )
@@ -2,27 +2,37 @@
 Blueprint Generation Endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional
 from app.core.database import get_db
+from app.api.http_cache import cached_document_response
 from app.api.dependencies import get_current_user
 from app.models.user import User
 from app.models.project import Project
 from app.models.calculation import Calculation
 from app.services.blueprint_generator import BlueprintGenerator
+from app.services.blueprint_geometry import VIEWS, WRITERS, export_drawings
 
 router = APIRouter()
 
 @router.get("/plan/{project_id}")
 def generate_plan_view(
+    request: Request,
     project_id: int,
     page_size: str = "A2",
+    scale: int = 100,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Generate structural plan view blueprint"""
+    if scale <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Scale must be a positive ratio denominator (e.g. 100 for 1:100)"
+        )
+    
     project = db.query(Project).filter(Project.id == project_id).first()
     if not project:
         raise HTTPException(
@@ -52,29 +62,37 @@ def generate_plan_view(
     calc_data = [
         {
             "calculation_type": calc.calculation_type.value,
-            "design_outputs": calc.design_outputs or {}
+            "design_outputs": calc.design_outputs or {},
+            "input_parameters": calc.input_parameters or {}
         }
         for calc in calculations
     ]
     
-    pdf_bytes = blueprint_gen.generate_structural_plan(project_data, calc_data, page_size)
-    
-    return Response(
-        content=pdf_bytes,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": f"attachment; filename=plan_{project.project_code}.pdf"
-        }
+    return cached_document_response(
+        request,
+        "blueprint_plan",
+        BlueprintGenerator.TEMPLATE_VERSION,
+        [project_data, calc_data, page_size, scale],
+        lambda: blueprint_gen.generate_structural_plan(project_data, calc_data, page_size, scale),
+        f"plan_{project.project_code}.pdf"
     )
 
 @router.get("/elevation/{project_id}")
 def generate_elevation_view(
+    request: Request,
     project_id: int,
     page_size: str = "A2",
+    scale: int = 100,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Generate elevation view blueprint"""
+    if scale <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Scale must be a positive ratio denominator (e.g. 100 for 1:100)"
+        )
+    
     project = db.query(Project).filter(Project.id == project_id).first()
     if not project:
         raise HTTPException(
@@ -98,23 +116,24 @@ def generate_elevation_view(
     calc_data = [
         {
             "calculation_type": calc.calculation_type.value,
-            "design_outputs": calc.design_outputs or {}
+            "design_outputs": calc.design_outputs or {},
+            "input_parameters": calc.input_parameters or {}
         }
         for calc in calculations
     ]
     
-    pdf_bytes = blueprint_gen.generate_elevation_view(project_data, calc_data, page_size)
-    
-    return Response(
-        content=pdf_bytes,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": f"attachment; filename=elevation_{project.project_code}.pdf"
-        }
+    return cached_document_response(
+        request,
+        "blueprint_elevation",
+        BlueprintGenerator.TEMPLATE_VERSION,
+        [project_data, calc_data, page_size, scale],
+        lambda: blueprint_gen.generate_elevation_view(project_data, calc_data, page_size, scale),
+        f"elevation_{project.project_code}.pdf"
     )
 
 @router.get("/section/{calculation_id}")
 def generate_section_view(
+    request: Request,
     calculation_id: int,
     page_size: str = "A3",
     db: Session = Depends(get_db),
@@ -143,18 +162,18 @@ def generate_section_view(
         "design_outputs": calculation.design_outputs or {}
     }
     
-    pdf_bytes = blueprint_gen.generate_section_view(project_data, calc_data, page_size)
-    
-    return Response(
-        content=pdf_bytes,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": f"attachment; filename=section_{calculation.calculation_code}.pdf"
-        }
+    return cached_document_response(
+        request,
+        "blueprint_section",
+        BlueprintGenerator.TEMPLATE_VERSION,
+        [project_data, calc_data, page_size],
+        lambda: blueprint_gen.generate_section_view(project_data, calc_data, page_size),
+        f"section_{calculation.calculation_code}.pdf"
     )
 
 @router.get("/road/{project_id}")
 def generate_road_plan(
+    request: Request,
     project_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -189,12 +208,77 @@ def generate_road_plan(
     
     road_design = road_calc.design_outputs or {}
     
-    pdf_bytes = blueprint_gen.generate_road_plan(project_data, road_design)
+    return cached_document_response(
+        request,
+        "blueprint_road_plan",
+        BlueprintGenerator.TEMPLATE_VERSION,
+        [project_data, road_design],
+        lambda: blueprint_gen.generate_road_plan(project_data, road_design),
+        f"road_plan_{project.project_code}.pdf"
+    )
+
+@router.get("/export/{project_id}")
+def export_drawings_file(
+    project_id: int,
+    format: str = "dxf",
+    views: str = ",".join(VIEWS),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Export plan, elevation and section views as DXF, SVG or PDF.
+    All views come from one geometry scene built in a single pass; DXF and SVG
+    are streamed, PDF is sent as one chunk once ReportLab has saved it.
+    """
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    calculations = db.query(Calculation).filter(
+        Calculation.project_id == project_id,
+        Calculation.status == "completed"
+    ).all()
+    
+    if not calculations:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No completed calculations found"
+        )
+    
+    project_data = {
+        "project_name": project.project_name,
+        "project_code": project.project_code
+    }
+    
+    calc_data = [
+        {
+            "calculation_type": calc.calculation_type.value,
+            "calculation_code": calc.calculation_code,
+            "design_outputs": calc.design_outputs or {},
+            "input_parameters": calc.input_parameters or {}
+        }
+        for calc in calculations
+    ]
+    
+    try:
+        chunks = export_drawings(
+            calc_data, project_data, format,
+            tuple(view.strip() for view in views.split(",") if view.strip())
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     
-    return Response(
-        content=pdf_bytes,
-        media_type="application/pdf",
+    writer = WRITERS[format]
+    return StreamingResponse(
+        chunks,
+        media_type=writer.media_type,
         headers={
-            "Content-Disposition": f"attachment; filename=road_plan_{project.project_code}.pdf"
+            "Content-Disposition": f"attachment; filename=drawings_{project.project_code}.{writer.extension}"
         }
     )
@@ -3,15 +3,18 @@ BOQ Endpoints
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import exists
 from sqlalchemy.orm import Session
 from typing import List
 from app.core.database import get_db
 from app.api.dependencies import get_current_user
 from app.models.user import User
 from app.models.project import Project
-from app.models.calculation import Calculation
-from app.models.material import BOQ, BOQItem
+from app.models.calculation import Calculation, CalculationStatus
+from app.models.material import BOQ
 from app.services.boq_calculator import BOQCalculator
+from app.services.bulk_persistence import persist_boq
+from app.services.single_flight import single_flight
 import uuid
 
 router = APIRouter()
@@ -31,57 +34,56 @@ def generate_boq(
             detail="Project not found"
         )
     
-    # Get all calculations for the project
-    calculations = db.query(Calculation).filter(
-        Calculation.project_id == project_id,
-        Calculation.status == "completed"
-    ).all()
+    # Bring per-calculation contributions up to date (only new/changed
+    # calculations are re-derived), then total them in one aggregate query.
+    # Concurrent requests for the same project share one computation.
+    def compute_quantities():
+        has_calculations = db.query(
+            exists().where(
+                Calculation.project_id == project_id,
+                Calculation.status == CalculationStatus.COMPLETED
+            )
+        ).scalar()
+        if not has_calculations:
+            return None
+        boq_calculator = BOQCalculator(db)
+        boq_calculator.refresh_project_contributions(project_id)
+        quantities = boq_calculator.aggregate_project_quantities(project_id)
+        return quantities, boq_calculator.generate_boq_items(quantities, project_id)
     
-    if not calculations:
+    computed, _ = single_flight.do(("boq", project_id), compute_quantities)
+    if computed is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="No completed calculations found for this project"
         )
+    quantities, boq_items_data = computed
     
-    # Generate BOQ
-    boq_calculator = BOQCalculator(db)
-    quantities = boq_calculator.calculate_material_quantities(calculations)
-    boq_items_data = boq_calculator.generate_boq_items(quantities, project_id)
-    
-    # Create BOQ
+    # Create BOQ header and items in one transaction
     boq_code = f"BOQ-{uuid.uuid4().hex[:8].upper()}"
-    db_boq = BOQ(
-        project_id=project_id,
-        boq_code=boq_code,
-        boq_name=f"BOQ for {project.project_name}",
-        total_cement_quantity=quantities["cement"],
-        total_steel_quantity=quantities["steel"],
-        total_concrete_quantity=quantities["concrete"],
-        total_sand_quantity=quantities["sand"],
-        total_aggregate_quantity=quantities["aggregate"],
-        total_excavation_volume=quantities["excavation"]
-    )
-    
-    db.add(db_boq)
-    db.commit()
-    db.refresh(db_boq)
-    
-    # Create BOQ items
-    for item_data in boq_items_data:
-        db_item = BOQItem(
-            boq_id=db_boq.id,
-            item_code=item_data["item_code"],
-            item_description=item_data["item_description"],
-            item_category=item_data["category"],
-            quantity=item_data["quantity"],
-            unit=item_data["unit"]
-        )
-        db.add(db_item)
-    
-    db.commit()
-    db.refresh(db_boq)
+    header = {
+        "project_id": project_id,
+        "boq_code": boq_code,
+        "boq_name": f"BOQ for {project.project_name}",
+        "total_cement_quantity": quantities["cement"],
+        "total_steel_quantity": quantities["steel"],
+        "total_concrete_quantity": quantities["concrete"],
+        "total_sand_quantity": quantities["sand"],
+        "total_aggregate_quantity": quantities["aggregate"],
+        "total_excavation_volume": quantities["excavation"]
+    }
+    items = [
+        {
+            "item_code": item_data["item_code"],
+            "item_description": item_data["item_description"],
+            "item_category": item_data["category"],
+            "quantity": item_data["quantity"],
+            "unit": item_data["unit"]
+        }
+        for item_data in boq_items_data
+    ]
     
-    return db_boq
+    return persist_boq(db, header, items)
 
 @router.get("/project/{project_id}")
 def get_project_boq(
@@ -3,29 +3,53 @@ Cost Estimation Endpoints
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from pydantic import BaseModel
+from typing import Dict, List, Optional
 from app.core.database import get_db
 from app.api.dependencies import get_current_user
 from app.models.user import User
 from app.models.project import Project
 from app.models.material import BOQ, BOQItem
-from app.models.cost import CostEstimate, CostItem, EstimateType
+from app.models.cost import CostEstimate, EstimateType
+from app.services.bulk_persistence import persist_cost_estimate
+from app.services.cash_flow import CashFlowEngine
+from app.services.cost_estimator import CostEstimator
 import uuid
 
 router = APIRouter()
 
-@router.post("/estimate/{project_id}", status_code=status.HTTP_201_CREATED)
-def create_cost_estimate(
-    project_id: int,
-    estimate_type: EstimateType = EstimateType.DETAILED,
-    contingency_percentage: float = 0.10,
-    escalation_percentage: float = 0.05,
-    gst_percentage: float = 0.18,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """Create cost estimate from BOQ"""
+class RateBookChoice(BaseModel):
+    sor_authority: Optional[str] = None
+    sor_version: Optional[str] = None
+
+class CostScenarioRequest(BaseModel):
+    contingency_percentages: List[float] = [0.10]
+    escalation_percentages: List[float] = [0.05]
+    gst_percentages: List[float] = [0.18]
+    rate_books: List[RateBookChoice] = []
+
+class ScenarioPromotionRequest(BaseModel):
+    estimate_type: EstimateType = EstimateType.DETAILED
+    contingency_percentage: float
+    escalation_percentage: float
+    gst_percentage: float
+    sor_authority: Optional[str] = None
+    sor_version: Optional[str] = None
+
+class CashFlowLink(BaseModel):
+    item_code: str
+    activity_code: str
+    share: float = 1.0
+
+class CashFlowRequest(BaseModel):
+    escalation_indices: Dict[str, float] = {}
+    annual_escalation_rate: Optional[float] = None
+    base_month: Optional[str] = None
+
+def _load_project_boq_items(db: Session, project_id: int):
+    """Project and its BOQ line items as plain rows"""
     # Verify project exists
     project = db.query(Project).filter(Project.id == project_id).first()
     if not project:
@@ -42,38 +66,36 @@ def create_cost_estimate(
             detail="BOQ not found. Please generate BOQ first."
         )
     
-    # Get BOQ items
-    boq_items = db.query(BOQItem).filter(BOQItem.boq_id == boq.id).all()
+    # Plain rows - no ORM identity map for large BOQs
+    boq_items = db.execute(
+        select(
+            BOQItem.item_code, BOQItem.item_description,
+            BOQItem.item_category.label("category"),
+            BOQItem.quantity, BOQItem.unit
+        ).where(BOQItem.boq_id == boq.id)
+    ).mappings().all()
     
-    # Calculate base cost (simplified - using default rates)
-    # In production, these would come from SOR or market rates
-    default_rates = {
-        "concrete": 5000,  # per m³
-        "steel": 60,  # per kg
-        "cement": 8,  # per kg
-        "sand": 800,  # per m³
-        "aggregate": 1000,  # per m³
-        "excavation": 200  # per m³
-    }
-    
-    base_cost = 0.0
-    cost_items = []
+    return project, boq_items
+
+@router.post("/estimate/{project_id}", status_code=status.HTTP_201_CREATED)
+def create_cost_estimate(
+    project_id: int,
+    estimate_type: EstimateType = EstimateType.DETAILED,
+    contingency_percentage: float = 0.10,
+    escalation_percentage: float = 0.05,
+    gst_percentage: float = 0.18,
+    sor_authority: Optional[str] = None,
+    sor_version: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Create cost estimate from BOQ"""
+    project, boq_items = _load_project_boq_items(db, project_id)
     
-    for item in boq_items:
-        # Determine rate based on material type
-        unit_rate = default_rates.get(item.item_category.lower(), 100)
-        total_amount = item.quantity * unit_rate
-        base_cost += total_amount
-        
-        cost_items.append({
-            "item_code": item.item_code,
-            "item_description": item.item_description,
-            "category": item.item_category,
-            "quantity": item.quantity,
-            "unit": item.unit,
-            "unit_rate": unit_rate,
-            "total_amount": total_amount
-        })
+    # Price from the cached SOR rate book (default rates where the SOR has no entry)
+    estimator = CostEstimator(db, sor_authority=sor_authority, sor_version=sor_version)
+    cost_items = estimator.price_items(boq_items)
+    base_cost = sum(item["total_amount"] for item in cost_items)
     
     # Calculate additional costs
     contingency_amount = base_cost * contingency_percentage
@@ -82,45 +104,109 @@ def create_cost_estimate(
     
     total_cost = base_cost + contingency_amount + escalation_amount + gst_amount
     
-    # Create cost estimate
+    # Create cost estimate header and items in one transaction
     estimate_code = f"EST-{uuid.uuid4().hex[:8].upper()}"
-    db_estimate = CostEstimate(
-        project_id=project_id,
-        estimate_code=estimate_code,
-        estimate_name=f"Cost Estimate for {project.project_name}",
-        estimate_type=estimate_type,
-        base_cost=base_cost,
-        contingency_percentage=contingency_percentage,
-        contingency_amount=contingency_amount,
-        escalation_percentage=escalation_percentage,
-        escalation_amount=escalation_amount,
-        gst_percentage=gst_percentage,
-        gst_amount=gst_amount,
-        total_cost=total_cost
-    )
-    
-    db.add(db_estimate)
-    db.commit()
-    db.refresh(db_estimate)
+    header = {
+        "project_id": project_id,
+        "estimate_code": estimate_code,
+        "estimate_name": f"Cost Estimate for {project.project_name}",
+        "estimate_type": estimate_type,
+        "base_cost": base_cost,
+        "contingency_percentage": contingency_percentage,
+        "contingency_amount": contingency_amount,
+        "escalation_percentage": escalation_percentage,
+        "escalation_amount": escalation_amount,
+        "gst_percentage": gst_percentage,
+        "gst_amount": gst_amount,
+        "total_cost": total_cost,
+        "rate_source": "SOR" if len(estimator.rate_book) else "Default",
+        "sor_version": estimator.rate_book.version
+    }
     
-    # Create cost items
-    for item_data in cost_items:
-        db_cost_item = CostItem(
-            cost_estimate_id=db_estimate.id,
-            item_code=item_data["item_code"],
-            item_description=item_data["item_description"],
-            category=item_data["category"],
-            quantity=item_data["quantity"],
-            unit=item_data["unit"],
-            unit_rate=item_data["unit_rate"],
-            total_amount=item_data["total_amount"]
+    return persist_cost_estimate(db, header, cost_items)
+
+@router.post("/scenarios/{project_id}")
+def evaluate_cost_scenarios(
+    project_id: int,
+    request: CostScenarioRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    What-if matrix over contingency × escalation × GST × rate book.
+    Nothing is saved; promote a scenario to store it as an estimate.
+    """
+    if len(request.contingency_percentages) * len(request.escalation_percentages) * \
+            len(request.gst_percentages) * max(len(request.rate_books), 1) > 100000:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Scenario grid too large (maximum 100000 combinations)"
         )
-        db.add(db_cost_item)
     
-    db.commit()
-    db.refresh(db_estimate)
+    project, boq_items = _load_project_boq_items(db, project_id)
+    try:
+        matrix = CostEstimator(db).scenario_matrix(
+            boq_items,
+            request.contingency_percentages,
+            request.escalation_percentages,
+            request.gst_percentages,
+            [choice.dict() for choice in request.rate_books]
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
-    return db_estimate
+    return {"project_id": project_id, **matrix}
+
+@router.post("/scenarios/{project_id}/promote", status_code=status.HTTP_201_CREATED)
+def promote_cost_scenario(
+    project_id: int,
+    request: ScenarioPromotionRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Persist one scenario from the matrix as a cost estimate"""
+    return create_cost_estimate(
+        project_id=project_id,
+        estimate_type=request.estimate_type,
+        contingency_percentage=request.contingency_percentage,
+        escalation_percentage=request.escalation_percentage,
+        gst_percentage=request.gst_percentage,
+        sor_authority=request.sor_authority,
+        sor_version=request.sor_version,
+        db=db,
+        current_user=current_user
+    )
+
+@router.post("/cash-flow/{estimate_id}/links")
+def link_cost_items_to_schedule(
+    estimate_id: int,
+    links: List[CashFlowLink],
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Assign cost items (or shares of them) to schedule activities"""
+    try:
+        return CashFlowEngine(db).link_items(estimate_id, [link.dict() for link in links])
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@router.post("/cash-flow/{estimate_id}")
+def phase_cost_estimate(
+    estimate_id: int,
+    request: CashFlowRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Monthly draws, escalation and S-curve phased over the project schedule"""
+    try:
+        return CashFlowEngine(db).phase_estimate(
+            estimate_id,
+            escalation_indices=request.escalation_indices,
+            annual_escalation_rate=request.annual_escalation_rate,
+            base_month=request.base_month
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 @router.get("/project/{project_id}")
 def get_project_cost_estimate(
@@ -140,3 +226,20 @@ def get_project_cost_estimate(
         )
     
     return estimate
+
+@router.get("/sor/search")
+def search_schedule_of_rates(
+    pattern: str,
+    sor_authority: Optional[str] = None,
+    sor_version: Optional[str] = None,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Search SOR item codes with a wildcard pattern (e.g. CONC-M2*)"""
+    rate_book = CostEstimator(db, sor_authority=sor_authority, sor_version=sor_version).rate_book
+    return {
+        "sor_authority": rate_book.authority,
+        "sor_version": rate_book.version,
+        "items": rate_book.search(pattern, limit=limit)
+    }
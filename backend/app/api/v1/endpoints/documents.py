@@ -2,11 +2,11 @@
 Document Endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from typing import List
 from app.core.database import get_db
+from app.api.http_cache import cached_document_response
 from app.api.dependencies import get_current_user
 from app.models.user import User
 from app.models.project import Project
@@ -86,6 +86,7 @@ def get_document(
 
 @router.get("/download/calculation/{calculation_id}")
 def download_calculation_pdf(
+    request: Request,
     calculation_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -114,18 +115,18 @@ def download_calculation_pdf(
         "compliance_status": calculation.compliance_status
     }
     
-    pdf_bytes = doc_gen.generate_calculation_sheet(calc_data, project_data)
-    
-    return Response(
-        content=pdf_bytes,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": f"attachment; filename=calculation_{calculation.calculation_code}.pdf"
-        }
+    return cached_document_response(
+        request,
+        "calculation_sheet",
+        DocumentGenerator.TEMPLATE_VERSION,
+        [calc_data, project_data],
+        lambda: doc_gen.generate_calculation_sheet(calc_data, project_data),
+        f"calculation_{calculation.calculation_code}.pdf"
     )
 
 @router.get("/download/boq/{boq_id}")
 def download_boq_pdf(
+    request: Request,
     boq_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -160,18 +161,18 @@ def download_boq_pdf(
         ]
     }
     
-    pdf_bytes = doc_gen.generate_boq_pdf(boq_data, project_data)
-    
-    return Response(
-        content=pdf_bytes,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": f"attachment; filename=boq_{boq.boq_code}.pdf"
-        }
+    return cached_document_response(
+        request,
+        "boq",
+        DocumentGenerator.TEMPLATE_VERSION,
+        [boq_data, project_data],
+        lambda: doc_gen.generate_boq_pdf(boq_data, project_data),
+        f"boq_{boq.boq_code}.pdf"
     )
 
 @router.get("/download/cost-estimate/{estimate_id}")
 def download_cost_estimate_pdf(
+    request: Request,
     estimate_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -213,12 +214,11 @@ def download_cost_estimate_pdf(
         ]
     }
     
-    pdf_bytes = doc_gen.generate_cost_estimate_pdf(estimate_data, project_data)
-    
-    return Response(
-        content=pdf_bytes,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": f"attachment; filename=cost_estimate_{estimate.estimate_code}.pdf"
-        }
+    return cached_document_response(
+        request,
+        "cost_estimate",
+        DocumentGenerator.TEMPLATE_VERSION,
+        [estimate_data, project_data],
+        lambda: doc_gen.generate_cost_estimate_pdf(estimate_data, project_data),
+        f"cost_estimate_{estimate.estimate_code}.pdf"
     )
@@ -2,53 +2,43 @@
 File Management Endpoints - Organized project file storage
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, status, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import RedirectResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from pydantic import BaseModel, Field
 from pathlib import Path
 import os
-import shutil
-import uuid
 from datetime import datetime
 
 from app.core.database import get_db
 from app.core.config import settings
+from app.core.security import create_download_token, decode_download_token
 from app.api.dependencies import get_current_user
 from app.models.user import User
 from app.models.project import Project
 from app.models.file_management import ProjectFile, ProjectFolder, FileShare, FileCategory, FileType
 from app.services.audit_logger import AuditLogger
+from app.services.file_uploads import (
+    ChunkedUploadService, UploadTooLarge, get_file_type, incoming_path, iter_upload_file, stream_to_file
+)
+from app.services.blob_store import blob_store
+from app.services.bulk_ingest import ArchiveError, BulkIngestService
+from app.services.file_access import file_access
+from app.services.workspace_summary import workspace_summary
+from app.services.file_search import file_search
+from app.services.file_versions import FileVersionService, VersionConflict, remove_stored
+from app.services.object_storage import storage_for
+from app.api.http_cache import etag_matches, file_response, not_modified
 from app.models.audit import ActionType
 
 router = APIRouter()
 
-# Create uploads directory if it doesn't exist
-UPLOAD_DIR = Path("uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
-
-def get_file_type(mime_type: str, file_name: str) -> FileType:
-    """Determine file type from mime type and extension"""
-    if mime_type.startswith("image/"):
-        return FileType.IMAGE
-    elif mime_type == "application/pdf":
-        return FileType.PDF
-    elif mime_type in ["application/msword", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"]:
-        return FileType.DOCUMENT
-    elif mime_type in ["application/vnd.ms-excel", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"]:
-        return FileType.SPREADSHEET
-    elif mime_type in ["video/mp4", "video/avi"]:
-        return FileType.VIDEO
-    elif file_name.endswith((".dwg", ".dxf")):
-        return FileType.CAD
-    elif mime_type in ["application/zip", "application/x-rar-compressed"]:
-        return FileType.ARCHIVE
-    else:
-        return FileType.OTHER
-
 @router.post("/upload/{project_id}", status_code=status.HTTP_201_CREATED)
 async def upload_file(
     project_id: int,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     category: FileCategory = Form(...),
     folder_path: Optional[str] = Form(None),
@@ -59,75 +49,416 @@ async def upload_file(
 ):
     """Upload file to project workspace"""
     # Verify project exists
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await run_in_threadpool(db.get, Project, project_id)
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found"
         )
     
-    # Create project-specific directory
-    project_dir = UPLOAD_DIR / f"project_{project_id}"
-    project_dir.mkdir(exist_ok=True)
-    
-    # Create category subdirectory
-    category_dir = project_dir / category.value
-    category_dir.mkdir(exist_ok=True)
-    
-    # Generate unique filename
-    file_extension = Path(file.filename).suffix
-    unique_filename = f"{uuid.uuid4().hex}{file_extension}"
-    file_path = category_dir / unique_filename
-    
-    # Save file
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
-    file_size = file_path.stat().st_size
-    
-    # Determine file type
-    file_type = get_file_type(file.content_type or "", file.filename)
-    
-    # Create database record
-    db_file = ProjectFile(
-        project_id=project_id,
-        file_name=unique_filename,
-        original_file_name=file.filename,
-        file_path=str(file_path),
-        file_size=file_size,
-        mime_type=file.content_type or "application/octet-stream",
-        file_type=file_type,
-        file_category=category,
-        folder_path=folder_path or f"{category.value}/",
-        description=description,
-        tags=tags,
-        uploaded_by=current_user.id
-    )
+    # Stream to disk without blocking the event loop, hashing as we go
+    temp_path = incoming_path()
+    try:
+        file_size, hasher = await stream_to_file(
+            iter_upload_file(file), temp_path, max_size=settings.MAX_UPLOAD_SIZE
+        )
+    except UploadTooLarge:
+        temp_path.unlink(missing_ok=True)
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="File too large; use a chunked upload"
+        )
     
-    db.add(db_file)
-    db.commit()
-    db.refresh(db_file)
+    def create_record():
+        # Identical content is stored once and shared
+        content_hash = hasher.hexdigest()
+        blob = blob_store.adopt(db, temp_path, content_hash, file_size)
+        
+        # Determine file type
+        file_type = get_file_type(file.content_type or "", file.filename)
+        
+        # Create database record
+        db_file = ProjectFile(
+            project_id=project_id,
+            file_name=f"{content_hash}{Path(file.filename).suffix}",
+            original_file_name=file.filename,
+            file_path=blob.storage_path,
+            file_size=file_size,
+            content_hash=content_hash,
+            mime_type=file.content_type or "application/octet-stream",
+            file_type=file_type,
+            file_category=category,
+            folder_path=folder_path or f"{category.value}/",
+            description=description,
+            tags=tags,
+            uploaded_by=current_user.id
+        )
+        
+        db.add(db_file)
+        db.flush()
+        workspace_summary.file_added(db, db_file)
+        file_search.index_file(db, db_file)
+        db.commit()
+        db.refresh(db_file)
+        
+        _log_upload(db, current_user, db_file)
+        return db_file
+    
+    db_file = await run_in_threadpool(create_record)
+    _schedule_text_extraction(background_tasks, db_file)
     
-    # Log action
+    return {
+        "id": db_file.id,
+        "file_name": file.filename,
+        "file_size": file_size,
+        "category": category.value,
+        "uploaded_at": db_file.uploaded_at.isoformat()
+    }
+
+def _schedule_text_extraction(background_tasks: BackgroundTasks, db_file: ProjectFile):
+    # Document text is indexed after the response is sent
+    if db_file.file_type == FileType.PDF:
+        background_tasks.add_task(file_search.extract_pending, [db_file.id])
+
+def _log_upload(db: Session, user: User, db_file: ProjectFile):
     audit_logger = AuditLogger(db)
     audit_logger.log_action(
-        user_id=current_user.id,
+        user_id=user.id,
         action_type=ActionType.CREATE,
         entity_type="ProjectFile",
         entity_id=db_file.id,
         entity_code=db_file.file_name,
-        action_description=f"File uploaded: {file.filename}",
+        action_description=f"File uploaded: {db_file.original_file_name}",
         ip_address=None
     )
+
+@router.post("/{file_id}/versions", status_code=status.HTTP_201_CREATED)
+async def upload_file_version(
+    file_id: int,
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    description: Optional[str] = Form(None),
+    tags: Optional[str] = Form(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Upload a new version of a file; it becomes the latest version"""
+    parent = await run_in_threadpool(_get_revisable_file, db, file_id, current_user)
+    
+    temp_path = incoming_path()
+    try:
+        file_size, hasher = await stream_to_file(
+            iter_upload_file(file), temp_path, max_size=settings.MAX_UPLOAD_SIZE
+        )
+    except UploadTooLarge:
+        temp_path.unlink(missing_ok=True)
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="File too large; use a chunked upload"
+        )
+    
+    def create_version():
+        db_file = FileVersionService(db).add_version(
+            parent.id,
+            temp_path,
+            hasher.hexdigest(),
+            file_size,
+            current_user.id,
+            file_name=file.filename,
+            mime_type=file.content_type,
+            description=description,
+            tags=tags
+        )
+        _log_upload(db, current_user, db_file)
+        return db_file
+    
+    try:
+        db_file = await run_in_threadpool(create_version)
+    except LookupError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except VersionConflict as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    finally:
+        temp_path.unlink(missing_ok=True)
+    _schedule_text_extraction(background_tasks, db_file)
     
     return {
         "id": db_file.id,
-        "file_name": file.filename,
-        "file_size": file_size,
-        "category": category.value,
+        "file_name": db_file.original_file_name,
+        "file_size": db_file.file_size,
+        "version": db_file.version,
+        "parent_file_id": db_file.parent_file_id,
+        "uploaded_at": db_file.uploaded_at.isoformat()
+    }
+
+@router.get("/{file_id}/versions")
+def list_file_versions(
+    file_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """All versions of a file, newest first"""
+    file_record = db.query(ProjectFile).filter(ProjectFile.id == file_id).first()
+    if not file_record:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
+    
+    if not file_access.can_download(db, file_record, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    
+    versions = FileVersionService(db)
+    return [
+        {
+            "id": f.id,
+            "version": f.version,
+            "is_latest": f.is_latest,
+            "file_name": f.original_file_name,
+            "file_size": f.file_size,
+            "sha256": versions.content_hash(f),
+            "uploaded_by": f.uploaded_by,
+            "uploaded_at": f.uploaded_at.isoformat() if f.uploaded_at else None
+        }
+        for f in versions.history(file_record)
+    ]
+
+def _get_revisable_file(db: Session, file_id: int, user: User) -> ProjectFile:
+    file_record = db.query(ProjectFile).filter(ProjectFile.id == file_id).first()
+    if not file_record:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
+    
+    # The uploader, an admin or a user the file is shared with for editing
+    if file_record.uploaded_by != user.id and user.role.value != "admin":
+        share = db.query(FileShare).filter(
+            FileShare.file_id == file_id,
+            FileShare.shared_with_user_id == user.id,
+            FileShare.can_edit == True
+        ).first()
+        if not share:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Permission denied"
+            )
+    
+    if not file_record.is_latest:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Only the latest version of a file can be revised"
+        )
+    return file_record
+
+class UploadInitRequest(BaseModel):
+    file_name: str
+    total_size: int = Field(..., ge=0)
+    category: FileCategory
+    mime_type: Optional[str] = None
+    folder_path: Optional[str] = None
+    description: Optional[str] = None
+    tags: Optional[str] = None
+    parent_file_id: Optional[int] = None  # Upload a new version of this file
+
+class UploadCompleteRequest(BaseModel):
+    sha256: Optional[str] = None  # Verified against the streamed hash when given
+
+def _get_upload_session(service: ChunkedUploadService, upload_id: str, user: User):
+    try:
+        return service.get(upload_id, user.id)
+    except LookupError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+@router.post("/uploads/{project_id}", status_code=status.HTTP_201_CREATED)
+def init_chunked_upload(
+    project_id: int,
+    upload: UploadInitRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Start a resumable chunked upload; parts are then PUT in order"""
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    if upload.parent_file_id is not None:
+        parent = _get_revisable_file(db, upload.parent_file_id, current_user)
+        if parent.project_id != project_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="File belongs to another project"
+            )
+    
+    service = ChunkedUploadService(db)
+    try:
+        session = service.init(project_id, current_user.id, **upload.dict())
+    except UploadTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return service.describe(session)
+
+@router.get("/uploads/session/{upload_id}")
+def get_chunked_upload(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Upload progress; received_bytes is the offset to resume from"""
+    service = ChunkedUploadService(db)
+    return service.describe(_get_upload_session(service, upload_id, current_user))
+
+@router.put("/uploads/session/{upload_id}")
+async def put_upload_part(
+    upload_id: str,
+    offset: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Write the raw request body as the part starting at offset"""
+    service = ChunkedUploadService(db)
+    session = await run_in_threadpool(_get_upload_session, service, upload_id, current_user)
+    
+    try:
+        session = await service.put_part(session, offset, request.stream())
+    except UploadTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    
+    return service.describe(session)
+
+@router.post("/uploads/session/{upload_id}/complete", status_code=status.HTTP_201_CREATED)
+async def complete_chunked_upload(
+    upload_id: str,
+    completion: UploadCompleteRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Verify the uploaded bytes and add the file to the project workspace"""
+    service = ChunkedUploadService(db)
+    session = await run_in_threadpool(_get_upload_session, service, upload_id, current_user)
+    
+    try:
+        db_file = await service.complete(session, completion.sha256)
+    except LookupError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    
+    await run_in_threadpool(_log_upload, db, current_user, db_file)
+    _schedule_text_extraction(background_tasks, db_file)
+    
+    return {
+        "id": db_file.id,
+        "file_name": db_file.original_file_name,
+        "file_size": db_file.file_size,
+        "sha256": db_file.content_hash,
+        "category": db_file.file_category.value,
         "uploaded_at": db_file.uploaded_at.isoformat()
     }
 
+@router.delete("/uploads/session/{upload_id}")
+async def abort_chunked_upload(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Abandon a chunked upload and discard its stored parts"""
+    service = ChunkedUploadService(db)
+    session = await run_in_threadpool(_get_upload_session, service, upload_id, current_user)
+    
+    try:
+        await service.abort(session)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    
+    return {"message": "Upload aborted"}
+
+@router.post("/bulk/{project_id}", status_code=status.HTTP_201_CREATED)
+async def upload_archive(
+    project_id: int,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    category: FileCategory,
+    folder_path: Optional[str] = None,
+    tags: Optional[str] = None,
+    archive_name: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Add every file of a ZIP archive, sent as the raw request body, to the
+    project workspace; the archive's directories become project folders
+    """
+    project = await run_in_threadpool(db.get, Project, project_id)
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    try:
+        result = await BulkIngestService(db).ingest(
+            project_id, current_user.id, request.stream(), category,
+            folder_path=folder_path, tags=tags, archive_name=archive_name
+        )
+    except UploadTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    except ArchiveError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    # Document text is indexed after the response is sent
+    pdf_file_ids = result.pop("pdf_file_ids")
+    if pdf_file_ids:
+        background_tasks.add_task(file_search.extract_pending, pdf_file_ids, limit=None)
+    return result
+
 @router.get("/project/{project_id}")
 def list_project_files(
     project_id: int,
@@ -156,11 +487,7 @@ def list_project_files(
         query = query.filter(ProjectFile.folder_path.like(f"{folder_path}%"))
     
     if search:
-        query = query.filter(
-            (ProjectFile.original_file_name.ilike(f"%{search}%")) |
-            (ProjectFile.description.ilike(f"%{search}%")) |
-            (ProjectFile.tags.ilike(f"%{search}%"))
-        )
+        query = query.filter(file_search.match_condition(db, project_id, search))
     
     files = query.filter(ProjectFile.is_latest == True).offset(skip).limit(limit).all()
     
@@ -180,13 +507,120 @@ def list_project_files(
         for f in files
     ]
 
+@router.get("/search/{project_id}")
+def search_project_files(
+    project_id: int,
+    q: str = Query(..., min_length=1, max_length=200),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Ranked full-text search over file names, tags, descriptions and document text"""
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    # One extra hit tells whether another page exists without counting every match
+    hits = file_search.search(db, project_id, q, skip, limit + 1)
+    page = hits[:limit]
+    files = {}
+    if page:
+        files = {
+            f.id: f
+            for f in db.query(ProjectFile).filter(ProjectFile.id.in_([file_id for file_id, _ in page])).all()
+        }
+    
+    results = []
+    for file_id, score in page:
+        f = files.get(file_id)
+        if f is None:
+            continue
+        results.append({
+            "id": f.id,
+            "file_name": f.original_file_name,
+            "file_size": f.file_size,
+            "category": f.file_category.value,
+            "folder_path": f.folder_path,
+            "description": f.description,
+            "tags": f.tags,
+            "uploaded_at": f.uploaded_at.isoformat(),
+            "mime_type": f.mime_type,
+            "score": score
+        })
+    
+    return {
+        "query": q,
+        "skip": skip,
+        "limit": limit,
+        "has_more": len(hits) > limit,
+        "results": results
+    }
+
+@router.post("/search/reindex")
+def reindex_files(
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Index files stored before search existed and retry pending text extraction (admin only)"""
+    if current_user.role.value != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Permission denied"
+        )
+    
+    indexed = file_search.backfill(db)
+    background_tasks.add_task(file_search.extract_pending, limit=None)
+    return {"documents_created": indexed, "extraction": "scheduled"}
+
 @router.get("/download/{file_id}")
 def download_file(
+    request: Request,
     file_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Download file from project workspace"""
+    file_record = _get_downloadable_file(db, file_id, current_user)
+    return _serve_file(request, db, file_record)
+
+@router.get("/download/{file_id}/url")
+def get_download_url(
+    request: Request,
+    file_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Short-lived link that downloads the file without further authentication"""
+    file_record = _get_downloadable_file(db, file_id, current_user)
+    
+    url = _direct_download_url(file_record)
+    if url is None:
+        token = create_download_token(file_record.id, settings.SIGNED_URL_EXPIRE_SECONDS)
+        url = str(request.url_for("download_signed_file", token=token))
+    return {"url": url, "expires_in": settings.SIGNED_URL_EXPIRE_SECONDS}
+
+@router.get("/signed/{token}")
+def download_signed_file(
+    request: Request,
+    token: str,
+    db: Session = Depends(get_db)
+):
+    """Download through a link from get_download_url; the token is the authorization"""
+    file_id = decode_download_token(token)
+    file_record = db.get(ProjectFile, file_id) if file_id is not None else None
+    if not file_record:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Download link is invalid or has expired"
+        )
+    return _serve_file(request, db, file_record)
+
+def _get_downloadable_file(db: Session, file_id: int, user: User) -> ProjectFile:
     file_record = db.query(ProjectFile).filter(ProjectFile.id == file_id).first()
     if not file_record:
         raise HTTPException(
@@ -194,30 +628,62 @@ def download_file(
             detail="File not found"
         )
     
-    # Check access
-    if not file_record.is_public and file_record.uploaded_by != current_user.id:
-        # Check if shared
-        share = db.query(FileShare).filter(
-            FileShare.file_id == file_id,
-            FileShare.shared_with_user_id == current_user.id
-        ).first()
-        if not share or not share.can_download:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied"
-            )
-    
-    file_path = Path(file_record.file_path)
-    if not file_path.exists():
+    # Check access (cached per user and file across range requests)
+    if not file_access.can_download(db, file_record, user.id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    return file_record
+
+def _direct_download_url(file_record: ProjectFile) -> Optional[str]:
+    # Only content stored in full can be fetched from storage; deltas are rebuilt here
+    if not file_record.content_hash:
+        return None
+    return storage_for(file_record.file_path).signed_url(
+        file_record.file_path,
+        file_record.original_file_name,
+        file_record.mime_type,
+        settings.SIGNED_URL_EXPIRE_SECONDS
+    )
+
+def _serve_file(request: Request, db: Session, file_record: ProjectFile):
+    versions = FileVersionService(db)
+    content_hash = versions.content_hash(file_record)
+    if content_hash and etag_matches(request, content_hash):
+        return not_modified(content_hash)
+    
+    # Remote storage serves the bytes itself
+    url = _direct_download_url(file_record)
+    if url is not None:
+        return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+    
+    # Versions stored as deltas are rebuilt into the version cache; the
+    # response owns the open file, so a cache eviction cannot cut it short
+    try:
+        content = versions.open_content(file_record)
+    except FileNotFoundError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="File not found on server"
         )
     
-    return FileResponse(
-        path=file_path,
-        filename=file_record.original_file_name,
-        media_type=file_record.mime_type
+    stat = os.fstat(content.fileno())
+    
+    # Strong ETag from the content hash; files stored before hashing get a weak one
+    if content_hash:
+        etag, weak = content_hash, False
+    else:
+        etag, weak = f"{stat.st_size:x}-{int(stat.st_mtime):x}", True
+    
+    return file_response(
+        request,
+        content,
+        stat.st_size,
+        etag,
+        file_record.mime_type,
+        file_record.original_file_name,
+        weak=weak
     )
 
 @router.post("/folder/{project_id}", status_code=status.HTTP_201_CREATED)
@@ -299,13 +765,34 @@ def list_folders(
         for f in folders
     ]
 
+def _workspace_file(f: ProjectFile) -> dict:
+    return {
+        "id": f.id,
+        "name": f.original_file_name,
+        "size": f.file_size,
+        "uploaded_at": f.uploaded_at.isoformat(),
+        "folder": f.folder_path
+    }
+
+def _category_files(db: Session, project_id: int, category: FileCategory, skip: int, limit: int):
+    return db.query(ProjectFile).filter(
+        ProjectFile.project_id == project_id,
+        ProjectFile.file_category == category,
+        ProjectFile.is_latest == True
+    ).order_by(ProjectFile.uploaded_at.desc(), ProjectFile.id.desc()).offset(skip).limit(limit).all()
+
 @router.get("/workspace/{project_id}")
 def get_project_workspace(
     project_id: int,
+    per_category: int = Query(20, ge=0, le=200),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get complete project workspace structure"""
+    """
+    Get project workspace structure: statistics from the materialized summary
+    and the newest per_category files of each category (further pages from
+    /workspace/{project_id}/category/{category})
+    """
     project = db.query(Project).filter(Project.id == project_id).first()
     if not project:
         raise HTTPException(
@@ -316,13 +803,8 @@ def get_project_workspace(
     # Get all folders
     folders = db.query(ProjectFolder).filter(ProjectFolder.project_id == project_id).all()
     
-    # Get all files grouped by category
-    files = db.query(ProjectFile).filter(
-        ProjectFile.project_id == project_id,
-        ProjectFile.is_latest == True
-    ).all()
+    statistics = workspace_summary.summary(db, project_id)
     
-    # Organize by category
     workspace = {
         "project_id": project_id,
         "project_name": project.project_name,
@@ -335,31 +817,48 @@ def get_project_workspace(
             }
             for f in folders
         ],
-        "files_by_category": {}
+        "files_by_category": {},
+        "statistics": statistics
     }
     
+    # First page of each non-empty category, one indexed query each
     for category in FileCategory:
-        category_files = [f for f in files if f.file_category == category]
-        workspace["files_by_category"][category.value] = [
-            {
-                "id": f.id,
-                "name": f.original_file_name,
-                "size": f.file_size,
-                "uploaded_at": f.uploaded_at.isoformat(),
-                "folder": f.folder_path
-            }
-            for f in category_files
-        ]
-    
-    # Statistics
-    workspace["statistics"] = {
-        "total_files": len(files),
-        "total_size": sum(f.file_size for f in files),
-        "files_by_category": {cat.value: len([f for f in files if f.file_category == cat]) for cat in FileCategory}
-    }
+        if per_category and statistics["files_by_category"][category.value]:
+            files = _category_files(db, project_id, category, 0, per_category)
+        else:
+            files = []
+        workspace["files_by_category"][category.value] = [_workspace_file(f) for f in files]
     
     return workspace
 
+@router.get("/workspace/{project_id}/category/{category}")
+def list_workspace_category(
+    project_id: int,
+    category: FileCategory,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """One page of a workspace category, newest first"""
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    total = workspace_summary.summary(db, project_id)["files_by_category"][category.value]
+    files = _category_files(db, project_id, category, skip, limit)
+    
+    return {
+        "category": category.value,
+        "total": total,
+        "skip": skip,
+        "limit": limit,
+        "files": [_workspace_file(f) for f in files]
+    }
+
 @router.delete("/{file_id}")
 def delete_file(
     file_id: int,
@@ -381,14 +880,26 @@ def delete_file(
             detail="Permission denied"
         )
     
-    # Delete physical file
-    file_path = Path(file_record.file_path)
-    if file_path.exists():
-        file_path.unlink()
+    # Other versions stop depending on this one
+    versions = FileVersionService(db)
+    stored_as_delta = versions.delta_for(file_record) is not None
+    obsolete = versions.prepare_delete(file_record)
+    
+    # Shared content is released and removed by blob garbage collection;
+    # files stored before content addressing are deleted directly
+    if file_record.content_hash:
+        blob_store.release(db, file_record.content_hash)
+    elif not stored_as_delta:
+        obsolete.append(file_record.file_path)
     
     # Delete database record
+    file_search.remove(db, file_id)
     db.delete(file_record)
+    db.flush()
+    workspace_summary.file_removed(db, file_record)
     db.commit()
+    remove_stored(obsolete)
+    file_access.invalidate(file_id)
     
     return {"message": "File deleted successfully"}
 
@@ -437,5 +948,29 @@ def share_file(
         db.add(share)
     
     db.commit()
+    file_access.invalidate(file_id)
     
     return {"message": "File shared successfully"}
+
+@router.post("/blobs/gc")
+def collect_blob_garbage(
+    grace_seconds: Optional[int] = None,
+    recount: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Delete file content no longer referenced by any file and expire abandoned
+    chunked uploads (admin only)
+    """
+    if current_user.role.value != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Permission denied"
+        )
+    
+    recounted = blob_store.recount(db) if recount else 0
+    result = blob_store.collect_garbage(db, grace_seconds)
+    result["blobs_recounted"] = recounted
+    result.update(ChunkedUploadService(db).expire_sessions())
+    return result
@@ -8,7 +8,12 @@ from app.core.database import get_db
 from app.api.dependencies import get_current_user
 from app.models.user import User
 from app.services.geotechnical_analysis import GeotechnicalAnalysisService
-from pydantic import BaseModel
+from app.services.slope_stability import SlopeStabilityEngine
+from app.services.bearing_capacity import BearingCapacityEngine
+from app.services.pile_design import PileGroupOptimizer
+from app.services.settlement_analysis import FoundationSettlementEngine
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
 
 router = APIRouter()
 
@@ -22,13 +27,128 @@ class SoilBearingRequest(BaseModel):
     foundation_length: float = 0.0
 
 class SlopeStabilityRequest(BaseModel):
-    slope_height: float
-    slope_angle: float
+    slope_height: float = Field(..., gt=0)
+    slope_angle: float = Field(..., gt=0, lt=90)  # degrees from horizontal
     soil_cohesion: float
     angle_of_internal_friction: float
-    unit_weight: float
+    unit_weight: float = Field(..., gt=0)
     water_table_depth: float = None
 
+class ProfilePoint(BaseModel):
+    x: float
+    y: float
+
+class SoilLayer(BaseModel):
+    top_elevation: Optional[float] = None
+    cohesion: float = 0.0
+    friction_angle: float = 0.0
+    unit_weight: float
+    saturated_unit_weight: Optional[float] = None
+
+class SlipSearchGrid(BaseModel):
+    """Overrides for the default search grid; omitted fields keep their defaults"""
+    x_min: Optional[float] = None
+    x_max: Optional[float] = None
+    nx: Optional[int] = Field(None, gt=0, le=1000)
+    y_min: Optional[float] = None
+    y_max: Optional[float] = None
+    ny: Optional[int] = Field(None, gt=0, le=1000)
+    tangent_min: Optional[float] = None
+    tangent_max: Optional[float] = None
+    n_tangent: Optional[int] = Field(None, gt=0, le=1000)
+
+class SlipCircleSearchRequest(BaseModel):
+    ground_profile: List[ProfilePoint]
+    soil_layers: List[SoilLayer]
+    phreatic_surface: Optional[List[ProfilePoint]] = None
+    method: str = "bishop"  # bishop, janbu
+    search_grid: Optional[SlipSearchGrid] = None
+    n_slices: int = Field(30, gt=0, le=200)
+
+class BoreholeLayer(BaseModel):
+    thickness: Optional[float] = None  # m; omit for the last layer
+    cohesion: float = 0.0
+    friction_angle: float = 0.0
+    unit_weight: float
+
+class BoreholeLog(BaseModel):
+    borehole_id: str
+    water_table_depth: Optional[float] = None
+    layers: List[BoreholeLayer]
+
+class BatchBearingRequest(BaseModel):
+    boreholes: List[BoreholeLog]
+    footing_widths: List[float]
+    foundation_depths: List[float]
+    footing_length_ratio: float = 0.0
+    factor_of_safety: float = 3.0
+
+class FoundationZoningRequest(BatchBearingRequest):
+    column_load: float
+
+class PileCap(BaseModel):
+    cap_id: str
+    axial_load: float = Field(..., gt=0)  # kN
+    profile_id: str
+
+class PileSoilLayer(BoreholeLayer):
+    soil_type: Optional[str] = None  # clay, sand, ...
+
+class PileSoilProfile(BaseModel):
+    water_table_depth: Optional[float] = None
+    layers: List[PileSoilLayer]
+
+class PileGroupOptimizationRequest(BaseModel):
+    caps: List[PileCap]
+    soil_profiles: Dict[str, PileSoilProfile]
+    diameters: List[float] = [0.45, 0.6, 0.75, 0.9, 1.0, 1.2]
+    lengths: List[float] = [8.0, 10.0, 12.0, 15.0, 18.0, 20.0, 25.0]
+    layouts: Optional[List[List[int]]] = None  # [[rows, cols], ...]
+    pile_type: str = "bored"
+    factor_of_safety: float = Field(2.5, gt=0)
+    spacing_ratio: float = Field(3.0, gt=0)
+    allowable_settlement: float = Field(25.0, gt=0)  # mm
+
+class PlanFooting(BaseModel):
+    footing_id: str
+    x: float
+    y: float
+    width: float
+    length: Optional[float] = None
+    depth: float = 1.5
+    pressure: Optional[float] = None  # net kN/m²
+    load: Optional[float] = None  # kN, used when pressure is not given
+
+class ConsolidationLayer(BaseModel):
+    thickness: Optional[float] = None
+    unit_weight: float = 18.0
+    compression_index: Optional[float] = None
+    recompression_index: Optional[float] = None
+    void_ratio: Optional[float] = None
+    ocr: Optional[float] = None
+    preconsolidation_pressure: Optional[float] = None
+    elastic_modulus: Optional[float] = None  # kN/m², for non-consolidating layers
+
+class PlanSettlementRequest(BaseModel):
+    footings: List[PlanFooting]
+    soil_layers: List[ConsolidationLayer]
+    water_table_depth: Optional[float] = None
+    method: str = "boussinesq"  # boussinesq, westergaard
+    cutoff_radius: Optional[float] = Field(None, gt=0)
+    grid_spacing: Optional[float] = Field(None, gt=0)  # m; the grid is capped at MAX_GRID_POINTS nodes
+    allowable_settlement: float = 50.0  # mm
+    allowable_angular_distortion: float = 1 / 500
+
+def _borehole_dicts(boreholes: List[BoreholeLog]) -> List[dict]:
+    return [
+        {
+            "borehole_id": bh.borehole_id,
+            "water_table_depth": bh.water_table_depth,
+            "layers": [layer.dict(exclude_none=True) for layer in bh.layers]
+        }
+        for bh in boreholes
+    ]
+
 @router.post("/bearing-capacity")
 def calculate_bearing_capacity(
     request: SoilBearingRequest,
@@ -48,6 +168,49 @@ def calculate_bearing_capacity(
     )
     return result
 
+@router.post("/bearing-capacity/batch")
+def calculate_bearing_capacity_batch(
+    request: BatchBearingRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Safe bearing capacity matrix (depths × widths) for every borehole"""
+    engine = BearingCapacityEngine(factor_of_safety=request.factor_of_safety)
+    try:
+        return engine.evaluate_boreholes(
+            boreholes=_borehole_dicts(request.boreholes),
+            footing_widths=request.footing_widths,
+            foundation_depths=request.foundation_depths,
+            footing_length_ratio=request.footing_length_ratio
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.post("/bearing-capacity/zoning")
+def foundation_zoning(
+    request: FoundationZoningRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Group boreholes into foundation zones for a typical column load"""
+    engine = BearingCapacityEngine(factor_of_safety=request.factor_of_safety)
+    try:
+        return engine.foundation_zoning(
+            boreholes=_borehole_dicts(request.boreholes),
+            column_load=request.column_load,
+            footing_widths=request.footing_widths,
+            foundation_depths=request.foundation_depths,
+            footing_length_ratio=request.footing_length_ratio
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
 @router.post("/slope-stability")
 def analyze_slope_stability(
     request: SlopeStabilityRequest,
@@ -56,14 +219,43 @@ def analyze_slope_stability(
 ):
     """Analyze slope stability"""
     service = GeotechnicalAnalysisService()
-    result = service.analyze_slope_stability(
-        slope_height=request.slope_height,
-        slope_angle=request.slope_angle,
-        soil_cohesion=request.soil_cohesion,
-        angle_of_internal_friction=request.angle_of_internal_friction,
-        unit_weight=request.unit_weight,
-        water_table_depth=request.water_table_depth
-    )
+    try:
+        return service.analyze_slope_stability(
+            slope_height=request.slope_height,
+            slope_angle=request.slope_angle,
+            soil_cohesion=request.soil_cohesion,
+            angle_of_internal_friction=request.angle_of_internal_friction,
+            unit_weight=request.unit_weight,
+            water_table_depth=request.water_table_depth
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.post("/slope-stability/search")
+def search_critical_slip_circle(
+    request: SlipCircleSearchRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Find the critical slip circle for a layered slope (Bishop/Janbu grid search)"""
+    engine = SlopeStabilityEngine()
+    try:
+        result = engine.analyze(
+            ground_profile=[p.dict() for p in request.ground_profile],
+            soil_layers=[layer.dict(exclude_none=True) for layer in request.soil_layers],
+            phreatic_surface=[p.dict() for p in request.phreatic_surface] if request.phreatic_surface else None,
+            method=request.method,
+            search_grid=request.search_grid.dict(exclude_none=True) if request.search_grid else None,
+            n_slices=request.n_slices
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     return result
 
 @router.post("/settlement")
@@ -87,6 +279,35 @@ def calculate_settlement(
     )
     return result
 
+@router.post("/settlement/plan")
+def calculate_plan_settlement(
+    request: PlanSettlementRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Total and differential settlement of a whole foundation plan"""
+    try:
+        engine = FoundationSettlementEngine(
+            method=request.method,
+            allowable_settlement=request.allowable_settlement,
+            allowable_angular_distortion=request.allowable_angular_distortion
+        )
+        footings = [f.dict(exclude_none=True) for f in request.footings]
+        if any("pressure" not in f and "load" not in f for f in footings):
+            raise ValueError("Every footing needs a pressure or a load")
+        return engine.analyze_plan(
+            footings=footings,
+            soil_layers=[layer.dict(exclude_none=True) for layer in request.soil_layers],
+            water_table_depth=request.water_table_depth,
+            cutoff_radius=request.cutoff_radius,
+            grid_spacing=request.grid_spacing
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
 @router.post("/pile-foundation")
 def design_pile_foundation(
     axial_load: float,
@@ -94,6 +315,7 @@ def design_pile_foundation(
     pile_type: str = "bored",
     pile_diameter: float = 0.6,
     pile_length: float = 10.0,
+    undrained_cohesion: float = 50.0,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -104,6 +326,41 @@ def design_pile_foundation(
         soil_type=soil_type,
         pile_type=pile_type,
         pile_diameter=pile_diameter,
-        pile_length=pile_length
+        pile_length=pile_length,
+        undrained_cohesion=undrained_cohesion
     )
     return result
+
+@router.post("/pile-foundation/optimize")
+def optimize_pile_groups(
+    request: PileGroupOptimizationRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Cheapest feasible pile group (diameter, length, layout) for every pile cap"""
+    try:
+        optimizer = PileGroupOptimizer(
+            factor_of_safety=request.factor_of_safety,
+            spacing_ratio=request.spacing_ratio,
+            allowable_settlement=request.allowable_settlement
+        )
+        profiles = {
+            profile_id: {
+                "water_table_depth": profile.water_table_depth,
+                "layers": [layer.dict(exclude_none=True) for layer in profile.layers]
+            }
+            for profile_id, profile in request.soil_profiles.items()
+        }
+        return optimizer.optimize(
+            caps=[cap.dict() for cap in request.caps],
+            soil_profiles=profiles,
+            diameters=request.diameters,
+            lengths=request.lengths,
+            layouts=request.layouts,
+            pile_type=request.pile_type
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
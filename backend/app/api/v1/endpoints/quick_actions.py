@@ -3,7 +3,7 @@ Quick Actions Endpoints - Time-saving automated workflows
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional
 from app.core.database import get_db
@@ -63,11 +63,11 @@ def export_project_zip(
             detail="Project not found"
         )
     
+    # Documents are generated and compressed while the response streams
     service = QuickActionsService(db)
-    zip_bytes = service.bulk_export_project_documents(project_id)
     
-    return Response(
-        content=zip_bytes,
+    return StreamingResponse(
+        service.stream_project_documents_zip(project_id),
         media_type="application/zip",
         headers={
             "Content-Disposition": f"attachment; filename=project_{project.project_code}_package.zip"
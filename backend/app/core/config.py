@@ -53,7 +53,37 @@ class Settings(BaseSettings):
     SUPPORTED_CODES: List[str] = ["IS", "IRC", "NBC", "PWD"]
     
     # File Upload
-    MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
+    MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB, single-request uploads
+    UPLOAD_DIR: str = "uploads"
+    
+    # Resumable chunked uploads
+    UPLOAD_PART_SIZE: int = 8 * 1024 * 1024  # 8MB
+    MAX_CHUNKED_UPLOAD_SIZE: int = 50 * 1024 * 1024 * 1024  # 50GB
+    UPLOAD_SESSION_TTL_HOURS: int = 72
+    UPLOAD_PART_TIMEOUT_SECONDS: int = 30 * 60  # an unfinished part no longer blocks its upload after this
+    BULK_UPLOAD_MAX_FILES: int = 20000  # entries per archive upload
+    
+    # Stored file content: "filesystem" (under UPLOAD_DIR) or "s3"
+    STORAGE_BACKEND: str = "filesystem"
+    S3_ENDPOINT_URL: Optional[str] = None  # e.g. https://s3.eu-west-1.amazonaws.com or a MinIO URL
+    S3_BUCKET: Optional[str] = None
+    S3_ACCESS_KEY: Optional[str] = None
+    S3_SECRET_KEY: Optional[str] = None
+    S3_REGION: str = "us-east-1"
+    S3_MULTIPART_THRESHOLD: int = 64 * 1024 * 1024  # larger files are uploaded in parts
+    S3_PART_SIZE: int = 64 * 1024 * 1024
+    SIGNED_URL_EXPIRE_SECONDS: int = 300  # lifetime of direct download links
+    
+    # Unreferenced blobs are kept this long before garbage collection
+    BLOB_GC_GRACE_SECONDS: int = 24 * 3600
+    
+    # File versions: every Nth revision is stored in full, the rest as deltas
+    FILE_VERSION_SNAPSHOT_INTERVAL: int = 10
+    VERSION_CACHE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024  # 2GB of reconstructed versions
+    
+    # Rendered document cache
+    RENDER_CACHE_DIR: str = "render_cache"
+    RENDER_CACHE_MAX_BYTES: int = 512 * 1024 * 1024  # 512MB
     
     class Config:
         env_file = ".env"
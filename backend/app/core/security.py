@@ -37,3 +37,18 @@ def decode_access_token(token: str) -> Optional[dict]:
         return payload
     except JWTError:
         return None
+
+def create_download_token(file_id: int, expires_in: int) -> str:
+    """Signed, short-lived link token for downloading one file without logging in"""
+    expire = datetime.utcnow() + timedelta(seconds=expires_in)
+    return jwt.encode({"typ": "download", "fid": file_id, "exp": expire}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+def decode_download_token(token: str) -> Optional[int]:
+    """File id of a valid, unexpired download token"""
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    if payload.get("typ") != "download":
+        return None
+    return payload.get("fid")
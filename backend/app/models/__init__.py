@@ -5,13 +5,17 @@ Database Models
 from app.models.user import User, Role
 from app.models.project import Project, ProjectType
 from app.models.calculation import Calculation, CalculationLog
-from app.models.material import Material, MaterialGrade, BOQ, BOQItem
-from app.models.cost import CostEstimate, CostItem, ScheduleOfRates
+from app.models.material import Material, MaterialGrade, BOQ, BOQItem, BOQContribution
+from app.models.cost import CostEstimate, CostItem, CostItemActivity, ScheduleOfRates
 from app.models.compliance import CodeStandard, ComplianceCheck, ComplianceLog
 from app.models.document import Document, DocumentTemplate
 from app.models.execution import ProjectPhase, ProgressTracking, MeasurementBook
 from app.models.audit import AuditLog, ActionLog
-from app.models.file_management import ProjectFile, ProjectFolder, FileShare, FileCategory, FileType
+from app.models.file_management import (
+    ProjectFile, ProjectFolder, FileShare, FileCategory, FileType,
+    UploadSession, UploadStatus, FileBlob, WorkspaceCategoryStats,
+    FileSearchDocument, TextExtractionStatus, FileDelta
+)
 from app.models.advanced_features import (
     IoTDevice, IoTReading, StructuralHealthAlert,
     DesignOption, ProjectRisk, RiskCategory,
@@ -25,13 +29,15 @@ __all__ = [
     "User", "Role",
     "Project", "ProjectType",
     "Calculation", "CalculationLog",
-    "Material", "MaterialGrade", "BOQ", "BOQItem",
-    "CostEstimate", "CostItem", "ScheduleOfRates",
+    "Material", "MaterialGrade", "BOQ", "BOQItem", "BOQContribution",
+    "CostEstimate", "CostItem", "CostItemActivity", "ScheduleOfRates",
     "CodeStandard", "ComplianceCheck", "ComplianceLog",
     "Document", "DocumentTemplate",
     "ProjectPhase", "ProgressTracking", "MeasurementBook",
     "AuditLog", "ActionLog",
     "ProjectFile", "ProjectFolder", "FileShare", "FileCategory", "FileType",
+    "UploadSession", "UploadStatus", "FileBlob", "WorkspaceCategoryStats",
+    "FileSearchDocument", "TextExtractionStatus", "FileDelta",
     "IoTDevice", "IoTReading", "StructuralHealthAlert",
     "DesignOption", "ProjectRisk", "RiskCategory",
     "Tender", "TenderBid", "ChangeOrder", "ChangeOrderItem",
@@ -2,8 +2,8 @@
 Calculation Models - Structural Design Engine
 """
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, JSON, Text, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, JSON, Text, Boolean, event
+from sqlalchemy.orm import object_session, relationship
 from sqlalchemy.sql import func
 import enum
 from app.core.database import Base
@@ -72,12 +72,20 @@ class Calculation(Base):
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Incremented by every ORM update; derived data records the revision it was built from
+    revision = Column(Integer, nullable=False, default=1, server_default="1")
     
     # Relationships
     project = relationship("Project", back_populates="calculations")
     created_by_user = relationship("User", foreign_keys=[created_by], back_populates="calculations")
     logs = relationship("CalculationLog", back_populates="calculation")
 
+@event.listens_for(Calculation, "before_update")
+def _bump_revision(mapper, connection, target):
+    # Incremented in SQL, so concurrent edits each get their own revision
+    if object_session(target).is_modified(target, include_collections=False):
+        target.revision = Calculation.revision + 1
+
 class CalculationLog(Base):
     """Calculation log - Detailed step-by-step calculation log"""
     __tablename__ = "calculation_logs"
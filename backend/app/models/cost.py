@@ -93,6 +93,16 @@ class CostItem(Base):
     # Relationships
     cost_estimate = relationship("CostEstimate", back_populates="items")
 
+class CostItemActivity(Base):
+    """Share of a cost item spent during a schedule activity"""
+    __tablename__ = "cost_item_activities"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    cost_estimate_id = Column(Integer, ForeignKey("cost_estimates.id"), nullable=False, index=True)
+    cost_item_id = Column(Integer, ForeignKey("cost_items.id"), nullable=False, index=True)
+    activity_id = Column(Integer, ForeignKey("schedule_activities.id"), nullable=False, index=True)
+    share = Column(Float, nullable=False, default=1.0)  # Fraction of the item amount
+
 class ScheduleOfRates(Base):
     """Schedule of Rates (SOR) Master Data"""
     __tablename__ = "schedule_of_rates"
@@ -2,7 +2,10 @@
 File Management Models - Organized project file storage
 """
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, JSON, Text, Boolean
+from sqlalchemy import (
+    Column, Integer, BigInteger, String, Float, DateTime, ForeignKey, Enum, JSON, Text, Boolean, Index, UniqueConstraint,
+    DDL, event
+)
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -42,6 +45,10 @@ class FileType(str, enum.Enum):
 class ProjectFile(Base):
     """Project File - Organized file storage"""
     __tablename__ = "project_files"
+    __table_args__ = (
+        # Per-category workspace listings, newest first
+        Index("ix_project_files_workspace", "project_id", "file_category", "is_latest", "uploaded_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
@@ -49,8 +56,9 @@ class ProjectFile(Base):
     # File Information
     file_name = Column(String, nullable=False)
     original_file_name = Column(String, nullable=False)
-    file_path = Column(String, nullable=False)  # Storage path
-    file_size = Column(Integer, nullable=False)  # Bytes
+    file_path = Column(String, nullable=False)  # Storage location: a path, or s3://bucket/key
+    file_size = Column(BigInteger, nullable=False)  # Bytes
+    content_hash = Column(String(64), ForeignKey("file_blobs.content_hash"), index=True)  # SHA-256 hex of the content
     mime_type = Column(String, nullable=False)
     file_type = Column(Enum(FileType), nullable=False)
     file_category = Column(Enum(FileCategory), nullable=False)
@@ -83,8 +91,8 @@ class ProjectFile(Base):
     # Relationships
     project = relationship("Project", back_populates="files")
     uploaded_by_user = relationship("User")
-    parent_file = relationship("ProjectFile", remote_side=[id])
-    versions = relationship("ProjectFile", backref="parent")
+    parent_file = relationship("ProjectFile", remote_side=[id], back_populates="versions")
+    versions = relationship("ProjectFile", back_populates="parent_file")
 
 class ProjectFolder(Base):
     """Project Folder - Virtual folder structure"""
@@ -105,8 +113,8 @@ class ProjectFolder(Base):
     
     # Relationships
     project = relationship("Project")
-    parent_folder = relationship("ProjectFolder", remote_side=[id])
-    subfolders = relationship("ProjectFolder", backref="parent")
+    parent_folder = relationship("ProjectFolder", remote_side=[id], back_populates="subfolders")
+    subfolders = relationship("ProjectFolder", back_populates="parent_folder")
 
 class FileShare(Base):
     """File Sharing - Share files with team members"""
@@ -133,3 +141,161 @@ class FileShare(Base):
     file = relationship("ProjectFile")
     shared_with_user = relationship("User", foreign_keys=[shared_with_user_id])
     shared_by_user = relationship("User", foreign_keys=[shared_by_user_id])
+
+class UploadStatus(str, enum.Enum):
+    """Chunked upload status"""
+    UPLOADING = "uploading"
+    COMPLETED = "completed"
+    ABORTED = "aborted"
+
+class UploadSession(Base):
+    """Upload Session - Resumable chunked upload of one file"""
+    __tablename__ = "upload_sessions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    upload_id = Column(String(32), unique=True, index=True, nullable=False)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
+    
+    # Target file
+    original_file_name = Column(String, nullable=False)
+    mime_type = Column(String, nullable=False)
+    file_category = Column(Enum(FileCategory), nullable=False)
+    folder_path = Column(String)
+    tags = Column(String)
+    description = Column(Text)
+    
+    # Progress
+    total_size = Column(BigInteger, nullable=False)
+    part_size = Column(Integer, nullable=False)
+    received_bytes = Column(BigInteger, default=0, nullable=False)  # Contiguous bytes stored so far
+    temp_path = Column(String, nullable=False)
+    # Part being written at received_bytes; the claim lapses after UPLOAD_PART_TIMEOUT_SECONDS
+    part_token = Column(String(32))
+    part_started_at = Column(DateTime(timezone=True))
+    status = Column(Enum(UploadStatus), default=UploadStatus.UPLOADING, nullable=False)
+    
+    # New version of this file, when revising an existing file
+    parent_file_id = Column(Integer, ForeignKey("project_files.id"))
+    
+    # Result
+    content_hash = Column(String(64))
+    file_id = Column(Integer, ForeignKey("project_files.id"))
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    expires_at = Column(DateTime(timezone=True))
+
+class FileBlob(Base):
+    """File Blob - Content-addressed file content shared by ProjectFile rows"""
+    __tablename__ = "file_blobs"
+    
+    content_hash = Column(String(64), primary_key=True)  # SHA-256 hex
+    size = Column(BigInteger, nullable=False)
+    storage_path = Column(String, nullable=False)
+    ref_count = Column(Integer, default=0, nullable=False)  # ProjectFile rows using this content
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    orphaned_at = Column(DateTime(timezone=True))  # Set when ref_count drops to 0; cleared on reuse
+
+class FileDelta(Base):
+    """File Delta - A file version stored as a binary delta against an earlier version"""
+    __tablename__ = "file_deltas"
+    
+    file_id = Column(Integer, ForeignKey("project_files.id"), primary_key=True)
+    base_file_id = Column(Integer, ForeignKey("project_files.id"), nullable=False, index=True)
+    storage_path = Column(String, nullable=False)
+    delta_size = Column(BigInteger, nullable=False)  # Bytes stored
+    target_hash = Column(String(64), nullable=False)  # SHA-256 of the reconstructed content
+    chain_length = Column(Integer, nullable=False)  # Deltas applied on top of the nearest full snapshot
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class WorkspaceCategoryStats(Base):
+    """Materialized count and size of a project's latest files in one category"""
+    __tablename__ = "workspace_category_stats"
+    __table_args__ = (
+        UniqueConstraint("project_id", "file_category", name="uq_workspace_category_stats"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False, index=True)
+    file_category = Column(Enum(FileCategory), nullable=False)
+    file_count = Column(Integer, default=0, nullable=False)
+    total_size = Column(BigInteger, default=0, nullable=False)  # Bytes
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class TextExtractionStatus(str, enum.Enum):
+    """Document text extraction status for search indexing"""
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+    SKIPPED = "skipped"  # Not a format text is extracted from
+
+class FileSearchDocument(Base):
+    """Searchable text of one project file; indexed by the database's full-text engine"""
+    __tablename__ = "file_search_documents"
+    
+    file_id = Column(Integer, ForeignKey("project_files.id", ondelete="CASCADE"), primary_key=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False, index=True)
+    
+    title = Column(String)  # Original file name
+    tags = Column(String)
+    description = Column(Text)
+    content_text = Column(Text)  # Extracted document text
+    extraction_status = Column(
+        Enum(TextExtractionStatus), default=TextExtractionStatus.SKIPPED, nullable=False, index=True
+    )
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+# Weighted document vector; the GIN index and search queries must use this exact expression.
+# Names and tags are split on punctuation first so "A-101_plan.dwg" yields a, 101, plan, dwg.
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('simple', regexp_replace(coalesce(title, ''), '[^[:alnum:]]+', ' ', 'g')), 'A') || "
+    "setweight(to_tsvector('simple', regexp_replace(coalesce(tags, ''), '[^[:alnum:]]+', ' ', 'g')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'C') || "
+    "setweight(to_tsvector('simple', coalesce(content_text, '')), 'D')"
+)
+
+def _sqlite_has_fts5(ddl, target, bind, **kw):
+    if bind.dialect.name != "sqlite":
+        return False
+    options = bind.exec_driver_sql("PRAGMA compile_options").scalars().all()
+    return "ENABLE_FTS5" in options
+
+# PostgreSQL: inverted index over the weighted vector
+event.listen(
+    FileSearchDocument.__table__,
+    "after_create",
+    DDL(
+        "CREATE INDEX ix_file_search_documents_fts ON file_search_documents "
+        f"USING gin (({SEARCH_VECTOR_SQL}))"
+    ).execute_if(dialect="postgresql")
+)
+
+# SQLite: FTS5 index over the same columns, kept in sync by triggers
+for _statement in (
+    "CREATE VIRTUAL TABLE file_search_fts USING fts5("
+    "title, tags, description, content_text, "
+    "content='file_search_documents', content_rowid='file_id')",
+    "CREATE TRIGGER file_search_fts_ai AFTER INSERT ON file_search_documents BEGIN "
+    "INSERT INTO file_search_fts(rowid, title, tags, description, content_text) "
+    "VALUES (new.file_id, new.title, new.tags, new.description, new.content_text); END",
+    "CREATE TRIGGER file_search_fts_ad AFTER DELETE ON file_search_documents BEGIN "
+    "INSERT INTO file_search_fts(file_search_fts, rowid, title, tags, description, content_text) "
+    "VALUES ('delete', old.file_id, old.title, old.tags, old.description, old.content_text); END",
+    "CREATE TRIGGER file_search_fts_au AFTER UPDATE ON file_search_documents BEGIN "
+    "INSERT INTO file_search_fts(file_search_fts, rowid, title, tags, description, content_text) "
+    "VALUES ('delete', old.file_id, old.title, old.tags, old.description, old.content_text); "
+    "INSERT INTO file_search_fts(rowid, title, tags, description, content_text) "
+    "VALUES (new.file_id, new.title, new.tags, new.description, new.content_text); END",
+):
+    event.listen(FileSearchDocument.__table__, "after_create", DDL(_statement).execute_if(callable_=_sqlite_has_fts5))
+
+event.listen(
+    FileSearchDocument.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS file_search_fts").execute_if(dialect="sqlite")
+)
@@ -2,7 +2,7 @@
 Material and BOQ Models
 """
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, JSON, Text, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, JSON, Text, Boolean, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -117,3 +117,21 @@ class BOQItem(Base):
     boq = relationship("BOQ", back_populates="items")
     material = relationship("Material")
     material_grade = relationship("MaterialGrade")
+
+class BOQContribution(Base):
+    """Material quantity contributed to a project's BOQ by one calculation"""
+    __tablename__ = "boq_contributions"
+    __table_args__ = (
+        UniqueConstraint("calculation_id", "material", name="uq_boq_contribution_material"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False, index=True)
+    calculation_id = Column(Integer, ForeignKey("calculations.id"), nullable=False, index=True)
+    # concrete, steel, excavation; NULL marks a calculation that contributes nothing
+    material = Column(String)
+    quantity = Column(Float, nullable=False)  # Raw quantity before wastage
+    
+    # Calculation.revision this row was derived from; stale if they differ
+    calculation_revision = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
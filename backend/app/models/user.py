@@ -34,8 +34,8 @@ class User(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
-    projects = relationship("Project", back_populates="created_by_user")
-    calculations = relationship("Calculation", back_populates="created_by_user")
+    projects = relationship("Project", back_populates="created_by_user", foreign_keys="Project.created_by")
+    calculations = relationship("Calculation", back_populates="created_by_user", foreign_keys="Calculation.created_by")
     audit_logs = relationship("AuditLog", back_populates="user")
     action_logs = relationship("ActionLog", back_populates="user")
 
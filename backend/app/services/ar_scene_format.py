@@ -0,0 +1,154 @@
+"""
+AR Scene Format - Compact binary encoding of AR scenes for mobile clients
+
+Every element is an instance of one unit box, so a scene is a header followed
+by typed arrays (glTF-style buffer views), all little-endian and 4-byte aligned:
+
+    header     magic "CEAR", version, instance/palette counts, tile origin
+               and quantization steps, then (offset, length) per buffer view
+    palette    RGBA uint8 x 4 + material id uint8 + flags uint8, 6 bytes each
+    positions  uint16 x 3 per instance, (position - origin) / position_step
+    dimensions uint16 x 3 per instance, dimension / dimension_step
+    types      uint8 per instance (ELEMENT_TYPES index)
+    materials  uint8 per instance (palette index)
+
+Every xyz triple uses the same axes: a position is the box's minimum corner
+and its dimensions are the extents along x, y and z, i.e. (length, width,
+height) of the element.
+
+Positions are quantized relative to the tile origin, which keeps 16 bits
+sub-millimetre on building-sized tiles.
+"""
+
+import struct
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+MAGIC = b"CEAR"
+FORMAT_VERSION = 2  # 2: dimensions ordered x, y, z (length, width, height)
+MEDIA_TYPE = "application/vnd.cedos.ar-scene"
+
+ELEMENT_TYPES = ("footing", "column", "beam", "slab", "proxy")
+MATERIALS = ("concrete", "steel", "masonry", "other")
+FLAG_WIREFRAME = 1
+
+QUANT_MAX = 65535
+MIN_STEP = 1e-4  # m, finest quantization step used
+
+BUFFER_VIEWS = ("palette", "positions", "dimensions", "types", "materials")
+
+# magic, version, instance count, palette count, origin xyz, position step xyz, dimension step
+_HEADER = struct.Struct("<4sHIH3f3ff")
+_VIEW = struct.Struct("<II")
+HEADER_SIZE = _HEADER.size + _VIEW.size * len(BUFFER_VIEWS)
+
+
+def _align(buffer: bytearray):
+    buffer.extend(b"\0" * (-len(buffer) % 4))
+
+
+def _step(extent: float) -> float:
+    return max(extent / QUANT_MAX, MIN_STEP)
+
+
+def _quantize(values: np.ndarray, step) -> bytes:
+    return np.clip(np.rint(values / step), 0, QUANT_MAX).astype("<u2").tobytes()
+
+
+def encode_scene(elements: List[Dict], origin: Optional[Tuple[float, float, float]] = None) -> bytes:
+    """
+    Binary scene for AR elements as produced by ARVisualizationService
+    (position/dimensions/material/color/wireframe dicts). origin defaults to
+    the minimum corner of the elements.
+    """
+    count = len(elements)
+    positions = np.array(
+        [[e["position"]["x"], e["position"]["y"], e["position"]["z"]] for e in elements],
+        dtype=np.float64
+    ).reshape(count, 3)
+    # Length along x, width along y, height along z, matching the positions
+    dimensions = np.array(
+        [[e["dimensions"]["length"], e["dimensions"]["width"], e["dimensions"]["height"]] for e in elements],
+        dtype=np.float64
+    ).reshape(count, 3)
+
+    if origin is None:
+        origin = tuple(positions.min(axis=0)) if count else (0.0, 0.0, 0.0)
+    # Quantize against the float32 values the client will read back
+    requested = np.asarray(origin, dtype=np.float64)
+    origin = requested.astype(np.float32)
+    origin = np.where(origin > requested, np.nextafter(origin, np.float32(-np.inf)), origin).astype(np.float64)
+    relative = positions - origin
+    if count and relative.min() < -MIN_STEP:
+        raise ValueError("Elements lie outside the tile origin")
+
+    extent = relative.max(axis=0) if count else np.zeros(3)
+    position_step = np.array([_step(v) for v in extent], dtype=np.float32).astype(np.float64)
+    dimension_step = float(np.float32(_step(float(dimensions.max()) if count else 0.0)))
+
+    palette: Dict[Tuple, int] = {}
+    material_index = np.empty(count, dtype=np.uint8)
+    type_codes = np.empty(count, dtype=np.uint8)
+    for i, e in enumerate(elements):
+        rgba = tuple(int(round(min(max(c, 0.0), 1.0) * 255)) for c in e.get("color", (0.5, 0.5, 0.5, 1.0)))
+        material = e.get("material", "other")
+        entry = rgba + (
+            MATERIALS.index(material) if material in MATERIALS else MATERIALS.index("other"),
+            FLAG_WIREFRAME if e.get("wireframe") else 0
+        )
+        if entry not in palette:
+            if len(palette) == 256:
+                raise ValueError("Scene has more than 256 distinct materials")
+            palette[entry] = len(palette)
+        material_index[i] = palette[entry]
+        type_codes[i] = ELEMENT_TYPES.index(e["type"])
+
+    views = {
+        "palette": np.array(list(palette), dtype=np.uint8).tobytes(),
+        "positions": _quantize(relative, position_step),
+        "dimensions": _quantize(dimensions, dimension_step),
+        "types": type_codes.tobytes(),
+        "materials": material_index.tobytes()
+    }
+
+    body = bytearray()
+    table = []
+    for name in BUFFER_VIEWS:
+        _align(body)
+        table.append((HEADER_SIZE + len(body), len(views[name])))
+        body.extend(views[name])
+    _align(body)
+
+    header = _HEADER.pack(
+        MAGIC, FORMAT_VERSION, count, len(palette),
+        *origin, *position_step, dimension_step
+    )
+    return header + b"".join(_VIEW.pack(*view) for view in table) + bytes(body)
+
+
+def decode_scene(data: bytes) -> Dict:
+    """Numpy arrays of a binary scene (positions and dimensions dequantized, in m)"""
+    magic, version, count, palette_count, *rest = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not an AR scene")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported AR scene version {version}")
+    origin = np.array(rest[0:3], dtype=np.float64)
+    position_step = np.array(rest[3:6], dtype=np.float64)
+    dimension_step = rest[6]
+
+    views = {}
+    for i, name in enumerate(BUFFER_VIEWS):
+        offset, length = _VIEW.unpack_from(data, _HEADER.size + i * _VIEW.size)
+        views[name] = data[offset:offset + length]
+
+    return {
+        "version": version,
+        "origin": origin,
+        "palette": np.frombuffer(views["palette"], dtype=np.uint8).reshape(palette_count, 6),
+        "positions": origin + np.frombuffer(views["positions"], dtype="<u2").reshape(count, 3) * position_step,
+        "dimensions": np.frombuffer(views["dimensions"], dtype="<u2").reshape(count, 3) * dimension_step,
+        "types": np.frombuffer(views["types"], dtype=np.uint8),
+        "materials": np.frombuffer(views["materials"], dtype=np.uint8)
+    }
@@ -0,0 +1,219 @@
+"""
+AR Tiles - Octree partitioning of project geometry for incremental AR streaming
+
+The scene is split into a loose octree: a node holding more than
+MAX_CHUNK_ELEMENTS elements is subdivided, elements larger than half a child
+cell stay in the node and the rest move to the child containing their centre.
+Large elements therefore live near the root and small ones deep down, so each
+level adds detail. Interior chunks also carry one proxy box per child (the
+child's bounding box) to show while the child is not loaded.
+
+Chunk ids are octree paths: "r" for the root, "r5" for its sixth child, "r53"...
+Every chunk is encoded with the binary AR scene format relative to its own
+loose bounds.
+"""
+
+import hashlib
+import json
+import math
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+
+import numpy as np
+
+from app.services.ar_scene_format import encode_scene
+from app.services.ar_visualization import ARVisualizationService
+
+MAX_CHUNK_ELEMENTS = 512
+MAX_DEPTH = 8
+REFINE_DISTANCE_FACTOR = 4.0  # descend into a node when the camera is within this many node sizes
+INDEX_CACHE_SIZE = 16
+PROXY_COLOR = [0.6, 0.6, 0.6, 0.3]
+
+
+class TileIndex:
+    """Octree over one project's AR elements"""
+
+    def __init__(self, elements: List[Dict], fingerprint: str):
+        self.elements = elements
+        self.fingerprint = fingerprint
+        self.nodes: Dict[str, Dict] = {}
+
+        count = len(elements)
+        self._mins = np.array(
+            [[e["position"]["x"], e["position"]["y"], e["position"]["z"]] for e in elements], dtype=np.float64
+        ).reshape(count, 3)
+        # Length along x, width along y, height along z
+        self._maxs = self._mins + np.array(
+            [[e["dimensions"]["length"], e["dimensions"]["width"], e["dimensions"]["height"]] for e in elements],
+            dtype=np.float64
+        ).reshape(count, 3)
+
+        if count:
+            low = self._mins.min(axis=0)
+            size = float((self._maxs.max(axis=0) - low).max()) or 1.0
+        else:
+            low, size = np.zeros(3), 1.0
+        self._build("r", 0, low, size, np.arange(count), root=True)
+
+    def _build(self, node_id: str, level: int, origin: np.ndarray, size: float, idx: np.ndarray, root=False):
+        # Root bounds hold every element exactly; below, elements may overhang a cell by a quarter of its size
+        pad = 0.0 if root else size / 4
+        node = {
+            "id": node_id,
+            "level": level,
+            "min": (origin - pad).tolist(),
+            "size": size + 2 * pad,
+            "elements": idx,
+            "children": []
+        }
+        self.nodes[node_id] = node
+        if len(idx) <= MAX_CHUNK_ELEMENTS or level == MAX_DEPTH:
+            return
+
+        child_size = size / 2
+        extent = (self._maxs[idx] - self._mins[idx]).max(axis=1)
+        small = idx[extent <= child_size / 2]
+        if len(small) == 0:
+            return
+        node["elements"] = idx[extent > child_size / 2]
+
+        centres = (self._mins[small] + self._maxs[small]) / 2
+        bits = np.clip(((centres - origin) // child_size).astype(int), 0, 1)
+        octants = bits[:, 0] + 2 * bits[:, 1] + 4 * bits[:, 2]
+        for octant in range(8):
+            members = small[octants == octant]
+            if len(members) == 0:
+                continue
+            offset = np.array([octant & 1, (octant >> 1) & 1, (octant >> 2) & 1]) * child_size
+            child_id = f"{node_id}{octant}"
+            node["children"].append(child_id)
+            self._build(child_id, level + 1, origin + offset, child_size, members)
+
+    def _bounds(self, idx: np.ndarray):
+        return self._mins[idx].min(axis=0), self._maxs[idx].max(axis=0)
+
+    def _subtree(self, node_id: str) -> np.ndarray:
+        node = self.nodes[node_id]
+        parts = [node["elements"]] + [self._subtree(child) for child in node["children"]]
+        return np.concatenate(parts)
+
+    def chunk_elements(self, node_id: str) -> List[Dict]:
+        """Elements stored in a chunk plus proxy boxes for its children"""
+        node = self.nodes.get(node_id)
+        if node is None:
+            raise ValueError(f"Unknown AR tile {node_id}")
+        chunk = [self.elements[i] for i in node["elements"]]
+        for child_id in node["children"]:
+            low, high = self._bounds(self._subtree(child_id))
+            size = high - low
+            chunk.append({
+                "type": "proxy",
+                "position": {"x": low[0], "y": low[1], "z": low[2]},
+                "dimensions": {"length": size[0], "width": size[1], "height": size[2]},
+                "material": "other",
+                "color": PROXY_COLOR,
+                "wireframe": True
+            })
+        return chunk
+
+    def encode_chunk(self, node_id: str) -> bytes:
+        chunk = self.chunk_elements(node_id)
+        return encode_scene(chunk, origin=tuple(self.nodes[node_id]["min"]))
+
+    def tileset(self) -> Dict:
+        """Chunk metadata for clients that traverse the octree themselves"""
+        return {
+            "fingerprint": self.fingerprint,
+            "element_count": len(self.elements),
+            "max_depth": max(node["level"] for node in self.nodes.values()),
+            "chunks": [
+                {
+                    "id": node["id"],
+                    "level": node["level"],
+                    "min": node["min"],
+                    "size": node["size"],
+                    "element_count": int(len(node["elements"])),
+                    "children": node["children"]
+                }
+                for node in self.nodes.values()
+            ]
+        }
+
+    def query(
+        self,
+        position: List[float],
+        direction: List[float],
+        fov: float = 60.0,
+        aspect: float = 1.0,
+        far: float = 500.0
+    ) -> List[Dict]:
+        """
+        Chunks intersecting the camera frustum (approximated by its bounding
+        cone), refined near the camera. Parents are listed before children;
+        a loaded child replaces its proxy box in the parent.
+        """
+        apex = np.asarray(position, dtype=np.float64)
+        axis = np.asarray(direction, dtype=np.float64)
+        norm = np.linalg.norm(axis)
+        if norm == 0:
+            raise ValueError("Camera direction must be non-zero")
+        axis /= norm
+        half_angle = math.atan(math.tan(math.radians(fov) / 2) * math.sqrt(1 + aspect ** 2))
+        sin_a, cos_a = math.sin(half_angle), math.cos(half_angle)
+
+        selected = []
+        stack = ["r"]
+        while stack:
+            node = self.nodes[stack.pop()]
+            half = node["size"] / 2
+            centre = np.asarray(node["min"]) + half
+            radius = half * math.sqrt(3)
+
+            v = centre - apex
+            along = float(v @ axis)
+            if along < -radius or along - radius > far:
+                continue
+            lateral = math.sqrt(max(float(v @ v) - along ** 2, 0.0))
+            if lateral * cos_a - along * sin_a > radius:
+                continue
+
+            selected.append({"id": node["id"], "level": node["level"]})
+            distance = max(float(np.linalg.norm(v)) - radius, 0.0)
+            if distance < node["size"] * REFINE_DISTANCE_FACTOR:
+                stack.extend(reversed(node["children"]))
+        return selected
+
+
+class ARTileService:
+    """Builds tile indexes on demand and keeps the most recent in memory"""
+
+    def __init__(self, cache_size: int = INDEX_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._indexes: "OrderedDict[str, TileIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(calculations: List[Dict]) -> str:
+        blob = json.dumps(calculations, sort_keys=True, default=str, separators=(",", ":"))
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def index_for(self, calculations: List[Dict]) -> TileIndex:
+        key = self.fingerprint(calculations)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+                return index
+
+        elements = ARVisualizationService().generate_ar_data({}, calculations, {})["elements"]
+        index = TileIndex(elements, key)
+        with self._lock:
+            self._indexes[key] = index
+            while len(self._indexes) > self.cache_size:
+                self._indexes.popitem(last=False)
+        return index
+
+
+ar_tiles = ARTileService()
@@ -6,12 +6,17 @@ from typing import Dict, List, Optional, Tuple
 import json
 import math
 
+from app.services.blueprint_geometry import DEFAULT_STOREY, build_scene
+
 class ARVisualizationService:
     """
     AR Visualization Service
     Generates data for Augmented Reality blueprint overlay using device camera
     """
     
+    # Bump whenever element geometry or tiling changes; invalidates cached scenes
+    SCENE_VERSION = "2"
+    
     def __init__(self):
         self.marker_size = 0.2  # 20cm marker size
         self.scale_factor = 1.0
@@ -46,18 +51,11 @@ class ARVisualizationService:
             "ar_mode": "marker_based" if marker_positions else "markerless"
         }
         
-        # Generate structural elements for AR
-        x_offset = 0
-        y_offset = 0
-        
-        for calc in calculations:
-            calc_type = calc.get("calculation_type", "")
-            design_outputs = calc.get("design_outputs", {})
-            
-            element = self._create_ar_element(calc_type, design_outputs, x_offset, y_offset)
+        # Generate structural elements for AR at their scene positions
+        for geometry in build_scene(calculations)["elements"]:
+            element = self._create_ar_element(geometry)
             if element:
                 ar_data["elements"].append(element)
-                x_offset += element.get("width", 0) + 1.0  # 1m spacing
         
         # Generate AR markers if provided
         if marker_positions:
@@ -71,66 +69,60 @@ class ARVisualizationService:
         
         return ar_data
     
-    def _create_ar_element(
-        self,
-        calc_type: str,
-        design_outputs: Dict,
-        x_offset: float,
-        y_offset: float
-    ) -> Optional[Dict]:
-        """Create AR element from calculation"""
+    def _create_ar_element(self, geometry: Dict) -> Optional[Dict]:
+        """
+        Create AR element from scene geometry. Position is the element's
+        minimum corner; length runs along x, width along y, height along z.
+        """
+        element_type = geometry["type"]
+        position = {"x": geometry["x"], "y": geometry["y"], "z": 0.0}
+        dimensions = {"width": geometry["width"], "length": geometry["length"]}
         
-        if calc_type == "footing_design":
-            size = design_outputs.get("footing_size", 1.0)
-            depth = design_outputs.get("effective_depth", 0.2)
-            
+        if element_type == "footing":
+            position["z"] = -geometry["depth"]
+            dimensions["height"] = geometry["depth"]
             return {
                 "type": "footing",
-                "position": {"x": x_offset, "y": y_offset, "z": 0},
-                "dimensions": {"width": size, "length": size, "height": depth},
+                "position": position,
+                "dimensions": dimensions,
                 "material": "concrete",
                 "color": [0.5, 0.5, 0.5, 0.8],  # RGBA
                 "wireframe": True,
                 "show_dimensions": True
             }
         
-        elif calc_type == "column_design":
-            size = design_outputs.get("column_size", 0.3)
-            height = 3.0  # Default height
-            
+        elif element_type == "column":
+            dimensions["height"] = geometry["height"]
             return {
                 "type": "column",
-                "position": {"x": x_offset, "y": y_offset, "z": 0},
-                "dimensions": {"width": size, "length": size, "height": height},
+                "position": position,
+                "dimensions": dimensions,
                 "material": "concrete",
                 "color": [0.6, 0.6, 0.6, 0.7],
                 "wireframe": True,
                 "show_reinforcement": True
             }
         
-        elif calc_type == "beam_design":
-            width = design_outputs.get("beam_width", 0.23)
-            depth = design_outputs.get("overall_depth", 0.3)
-            length = 3.0  # Default span
-            
+        elif element_type == "beam":
+            position["z"] = DEFAULT_STOREY - geometry["depth"]  # Top flush with the storey level
+            dimensions["height"] = geometry["depth"]
             return {
                 "type": "beam",
-                "position": {"x": x_offset, "y": y_offset, "z": height},
-                "dimensions": {"width": width, "length": length, "height": depth},
+                "position": position,
+                "dimensions": dimensions,
                 "material": "concrete",
                 "color": [0.7, 0.7, 0.7, 0.6],
                 "wireframe": True,
                 "orientation": "horizontal"
             }
         
-        elif calc_type == "slab_design":
-            thickness = design_outputs.get("slab_thickness", 0.1)
-            area = 10.0  # Default area
-            
+        elif element_type == "slab":
+            position["z"] = DEFAULT_STOREY
+            dimensions["height"] = geometry["depth"]
             return {
                 "type": "slab",
-                "position": {"x": x_offset, "y": y_offset, "z": 0},
-                "dimensions": {"width": math.sqrt(area), "length": math.sqrt(area), "height": thickness},
+                "position": position,
+                "dimensions": dimensions,
                 "material": "concrete",
                 "color": [0.8, 0.8, 0.8, 0.5],
                 "wireframe": False,
@@ -24,10 +24,12 @@ class AuditLogger:
         old_values: Optional[Dict] = None,
         new_values: Optional[Dict] = None,
         ip_address: Optional[str] = None,
-        user_agent: Optional[str] = None
+        user_agent: Optional[str] = None,
+        commit: bool = True
     ):
         """
-        Log an action to audit trail
+        Log an action to audit trail. With commit=False the entry is written
+        by the caller's transaction.
         """
         audit_log = AuditLog(
             user_id=user_id,
@@ -43,7 +45,8 @@ class AuditLogger:
         )
         
         self.db.add(audit_log)
-        self.db.commit()
+        if commit:
+            self.db.commit()
     
     def log_calculation(
         self,
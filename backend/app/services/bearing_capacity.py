@@ -0,0 +1,252 @@
+"""
+Bearing Capacity Engine - Tabulated bearing capacity factors and batch evaluation
+of borehole logs against footing sizes and founding depths (IS 6403)
+"""
+
+from typing import Dict, List
+
+import numpy as np
+
+GAMMA_WATER = 9.81  # kN/m³
+
+# Bearing capacity factor tables, 0.1° resolution up to 50°.
+# Nc uses its analytical limit π + 2 at φ = 0 (Prandtl) instead of (Nq - 1)·cot φ.
+PHI_TABLE = np.round(np.arange(0.0, 50.0 + 1e-9, 0.1), 1)
+_phi_rad = np.radians(PHI_TABLE)
+NQ_TABLE = np.exp(np.pi * np.tan(_phi_rad)) * np.tan(np.pi / 4 + _phi_rad / 2) ** 2
+NC_TABLE = np.empty_like(NQ_TABLE)
+NC_TABLE[0] = np.pi + 2.0
+NC_TABLE[1:] = (NQ_TABLE[1:] - 1.0) / np.tan(_phi_rad[1:])
+NGAMMA_TABLE = 2.0 * (NQ_TABLE + 1.0) * np.tan(_phi_rad)
+del _phi_rad
+
+
+def bearing_capacity_factors(phi):
+    """
+    Interpolated (Nc, Nq, Nγ) for friction angle(s) in degrees.
+    Accepts scalars or arrays of any shape.
+    """
+    phi = np.clip(np.asarray(phi, dtype=float), PHI_TABLE[0], PHI_TABLE[-1])
+    return (
+        np.interp(phi, PHI_TABLE, NC_TABLE),
+        np.interp(phi, PHI_TABLE, NQ_TABLE),
+        np.interp(phi, PHI_TABLE, NGAMMA_TABLE)
+    )
+
+
+def shape_factors(width, length=0.0):
+    """
+    Shape factors (sc, sq, sγ). length = 0 denotes a square footing,
+    otherwise IS 6403 rectangular factors with B/L.
+    """
+    width = np.asarray(width, dtype=float)
+    length = np.asarray(length, dtype=float)
+    ratio = np.where(length > 0, width / np.where(length > 0, length, 1.0), 0.0)
+    square = length <= 0
+    sc = np.where(square, 1.3, 1.0 + 0.2 * ratio)
+    sq = np.where(square, 1.0, 1.0 + 0.2 * ratio)
+    sgamma = np.where(square, 0.8, 1.0 - 0.4 * ratio)
+    return sc, sq, sgamma
+
+
+def depth_factor_q(phi, depth, width):
+    """Surcharge depth factor, capped at 1.0 for shallow foundations"""
+    phi_rad = np.radians(np.asarray(phi, dtype=float))
+    dq = 1 + 2 * np.tan(phi_rad) * (1 - np.sin(phi_rad)) ** 2 * (np.asarray(depth) / np.asarray(width))
+    return np.minimum(dq, 1.0)
+
+
+def ultimate_bearing_capacity(cohesion, phi, surcharge, gamma, width, depth, length=0.0):
+    """
+    Terzaghi/IS 6403 ultimate bearing capacity, elementwise over broadcast arrays:
+    q_ult = c·Nc·sc + q·Nq·sq·dq + 0.5·γ·B·Nγ·sγ
+    """
+    nc, nq, ngamma = bearing_capacity_factors(phi)
+    sc, sq, sgamma = shape_factors(width, length)
+    dq = depth_factor_q(phi, depth, width)
+    return (
+        cohesion * nc * sc +
+        surcharge * nq * sq * dq +
+        0.5 * gamma * width * ngamma * sgamma
+    )
+
+
+class BearingCapacityEngine:
+    """Batch bearing capacity evaluation over borehole logs"""
+
+    def __init__(self, factor_of_safety: float = 3.0):
+        self.factor_of_safety = factor_of_safety
+
+    def _stack_boreholes(self, boreholes: List[Dict]) -> Dict:
+        """Pad borehole layer logs into (boreholes × layers) arrays"""
+        n_layers = max(len(bh["layers"]) for bh in boreholes)
+        shape = (len(boreholes), n_layers)
+        bottom = np.full(shape, np.inf)
+        cohesion = np.zeros(shape)
+        phi = np.zeros(shape)
+        gamma = np.zeros(shape)
+        water = np.full(len(boreholes), np.inf)
+
+        for i, bh in enumerate(boreholes):
+            depth = 0.0
+            layers = bh["layers"]
+            for j, layer in enumerate(layers):
+                depth += layer.get("thickness", np.inf)
+                bottom[i, j] = depth
+                cohesion[i, j] = layer.get("cohesion", 0.0)
+                phi[i, j] = layer.get("friction_angle", 0.0)
+                gamma[i, j] = layer["unit_weight"]
+            # Last logged layer continues below the end of the borehole
+            bottom[i, len(layers) - 1] = np.inf
+            # Padding repeats the last layer so index lookups stay in range
+            cohesion[i, len(layers):] = cohesion[i, len(layers) - 1]
+            phi[i, len(layers):] = phi[i, len(layers) - 1]
+            gamma[i, len(layers):] = gamma[i, len(layers) - 1]
+            if bh.get("water_table_depth") is not None:
+                water[i] = bh["water_table_depth"]
+
+        top = np.concatenate([np.zeros((len(boreholes), 1)), bottom[:, :-1]], axis=1)
+        return {
+            "top": top, "bottom": bottom, "cohesion": cohesion, "phi": phi,
+            "gamma": gamma, "water": water
+        }
+
+    def allowable_pressure_matrix(
+        self,
+        boreholes: List[Dict],
+        footing_widths: List[float],
+        foundation_depths: List[float],
+        footing_length_ratio: float = 0.0
+    ) -> np.ndarray:
+        """
+        Safe bearing capacity (kN/m²) as an array of shape
+        (boreholes × depths × widths).
+
+        Each borehole: {"borehole_id", "water_table_depth",
+                        "layers": [{"thickness", "cohesion", "friction_angle", "unit_weight"}]}
+        footing_length_ratio: L/B for rectangular footings, 0 for square.
+        """
+        if not boreholes:
+            raise ValueError("At least one borehole is required")
+        if any(not bh.get("layers") for bh in boreholes):
+            raise ValueError("Every borehole needs at least one soil layer")
+
+        log = self._stack_boreholes(boreholes)
+        widths = np.asarray(footing_widths, dtype=float)[None, None, :]
+        depths = np.asarray(foundation_depths, dtype=float)
+        if np.any(widths <= 0):
+            raise ValueError("Footing widths must be positive")
+
+        # Effective overburden at each founding depth: (boreholes × depths)
+        d = depths[None, :, None]
+        top, bottom = log["top"][:, None, :], log["bottom"][:, None, :]
+        water = log["water"][:, None, None]
+        dry = np.clip(np.minimum(np.minimum(d, bottom), water) - top, 0.0, None)
+        submerged = np.clip(np.minimum(d, bottom) - np.maximum(top, water), 0.0, None)
+        gamma = log["gamma"][:, None, :]
+        surcharge = (gamma * dry + (gamma - GAMMA_WATER) * submerged).sum(axis=-1)
+
+        # Soil at founding level
+        founding = (depths[None, :, None] >= log["bottom"][:, None, :]).sum(axis=-1)
+        founding = np.minimum(founding, log["bottom"].shape[1] - 1)
+        rows = np.arange(len(boreholes))[:, None]
+        cohesion = log["cohesion"][rows, founding][..., None]
+        phi = log["phi"][rows, founding][..., None]
+        gamma_base = log["gamma"][rows, founding][..., None]
+
+        # IS 6403 water table correction on the self-weight term
+        water_factor = 0.5 + 0.5 * np.clip(
+            (log["water"][:, None, None] - depths[None, :, None]) / widths, 0.0, 1.0
+        )
+
+        lengths = widths * footing_length_ratio
+        q_ult = ultimate_bearing_capacity(
+            cohesion, phi, surcharge[..., None], gamma_base * water_factor,
+            widths, depths[None, :, None], lengths
+        )
+        return q_ult / self.factor_of_safety
+
+    def evaluate_boreholes(
+        self,
+        boreholes: List[Dict],
+        footing_widths: List[float],
+        foundation_depths: List[float],
+        footing_length_ratio: float = 0.0
+    ) -> Dict:
+        """Allowable-pressure matrix per borehole (rows = depths, columns = widths)"""
+        matrix = self.allowable_pressure_matrix(
+            boreholes, footing_widths, foundation_depths, footing_length_ratio
+        )
+        return {
+            "footing_widths": list(footing_widths),
+            "foundation_depths": list(foundation_depths),
+            "factor_of_safety": self.factor_of_safety,
+            "boreholes": [
+                {
+                    "borehole_id": bh.get("borehole_id", f"BH-{i + 1}"),
+                    "safe_bearing_capacity": np.round(matrix[i], 2).tolist()
+                }
+                for i, bh in enumerate(boreholes)
+            ],
+            "code_standard": "IS 6403:1981"
+        }
+
+    def foundation_zoning(
+        self,
+        boreholes: List[Dict],
+        column_load: float,
+        footing_widths: List[float],
+        foundation_depths: List[float],
+        footing_length_ratio: float = 0.0
+    ) -> Dict:
+        """
+        For each borehole, the shallowest founding depth and smallest footing
+        that carries column_load (kN). Boreholes with the same recommendation
+        form one foundation zone.
+        """
+        widths = np.asarray(footing_widths, dtype=float)
+        matrix = self.allowable_pressure_matrix(
+            boreholes, widths, foundation_depths, footing_length_ratio
+        )
+        length = widths * footing_length_ratio if footing_length_ratio > 0 else widths
+        applied = column_load / (widths * length)
+        feasible = matrix >= applied[None, None, :]
+
+        zones: Dict[tuple, List[str]] = {}
+        recommendations = []
+        for i, bh in enumerate(boreholes):
+            borehole_id = bh.get("borehole_id", f"BH-{i + 1}")
+            hits = np.argwhere(feasible[i])  # rows sorted by depth, then width
+            if len(hits) == 0:
+                recommendations.append({
+                    "borehole_id": borehole_id,
+                    "feasible": False,
+                    "recommendation": "No shallow footing in the range works; consider piles or a raft"
+                })
+                continue
+            depth_idx, width_idx = hits[0]
+            key = (float(foundation_depths[depth_idx]), float(widths[width_idx]))
+            zones.setdefault(key, []).append(borehole_id)
+            recommendations.append({
+                "borehole_id": borehole_id,
+                "feasible": True,
+                "foundation_depth": key[0],
+                "footing_width": key[1],
+                "safe_bearing_capacity": round(float(matrix[i, depth_idx, width_idx]), 2),
+                "applied_pressure": round(float(applied[width_idx]), 2)
+            })
+
+        return {
+            "column_load": column_load,
+            "boreholes": recommendations,
+            "zones": [
+                {
+                    "zone": f"Z{n + 1}",
+                    "foundation_depth": depth,
+                    "footing_width": width,
+                    "boreholes": ids
+                }
+                for n, ((depth, width), ids) in enumerate(sorted(zones.items()))
+            ],
+            "code_standard": "IS 6403:1981"
+        }
@@ -0,0 +1,213 @@
+"""
+Binary Delta - Compact deltas between file revisions
+
+Both files are cut into content-defined chunks: a cut is allowed where a
+rolling hash of the previous WINDOW bytes has its low bits clear, so an
+insertion or deletion only changes the chunks around it and every later
+boundary re-synchronises. Chunks of the new revision that also occur in the
+base become copy instructions; the rest are literal bytes. The instruction
+stream is zlib-compressed:
+
+    header   magic "CDLT", format version, base size, target size
+    ops      b"C" + offset uint64 + length uint32   copy from the base
+             b"L" + length uint32 + bytes           literal data
+
+Files are processed in SEGMENT_SIZE pieces, so memory stays bounded for
+files of any size. The base revision is passed as an open file, so callers
+can hold on to content that may be removed from a cache meanwhile.
+"""
+
+import hashlib
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, Tuple
+
+import numpy as np
+
+MAGIC = b"CDLT"
+FORMAT_VERSION = 1
+
+WINDOW = 48
+MIN_CHUNK = 2 * 1024
+MAX_CHUNK = 64 * 1024
+CUT_MASK = (1 << 13) - 1  # ~8KB average chunks
+SEGMENT_SIZE = 4 * 1024 * 1024
+MAX_LITERAL = 1024 * 1024  # literal runs are flushed at this size
+MAX_COPY = 0xFFFFFFFF
+
+_HEADER = struct.Struct("<4sHQQ")
+_COPY = struct.Struct("<QI")
+_LENGTH = struct.Struct("<I")
+
+_GEAR = np.random.default_rng(0x5EED).integers(0, 2 ** 63, 256, dtype=np.uint64)
+
+
+def _cut_points(data: bytes) -> np.ndarray:
+    """Offsets c where a chunk may end: the hash of data[c - WINDOW:c] hits the mask"""
+    if len(data) < WINDOW:
+        return np.zeros(0, dtype=np.int64)
+    sums = np.zeros(len(data) + 1, dtype=np.uint64)
+    np.cumsum(_GEAR[np.frombuffer(data, dtype=np.uint8)], dtype=np.uint64, out=sums[1:])
+    window = sums[WINDOW:] - sums[:-WINDOW]
+    return np.flatnonzero((window & np.uint64(CUT_MASK)) == 0) + WINDOW
+
+
+def iter_chunks(f: BinaryIO) -> Iterator[Tuple[int, bytes]]:
+    """(offset, bytes) of the content-defined chunks of a file"""
+    pending = b""
+    offset = 0
+    while True:
+        segment = f.read(SEGMENT_SIZE)
+        data = pending + segment
+        last = 0
+        if segment:
+            # Chunks restart the window at their start; cuts closer than
+            # MIN_CHUNK (>= WINDOW) are never taken, so this matches a
+            # single pass over the whole file
+            for cut in _cut_points(data).tolist():
+                while cut - last > MAX_CHUNK:
+                    yield offset + last, data[last:last + MAX_CHUNK]
+                    last += MAX_CHUNK
+                if cut - last >= MIN_CHUNK:
+                    yield offset + last, data[last:cut]
+                    last = cut
+        while len(data) - last > MAX_CHUNK or (not segment and last < len(data)):
+            end = min(last + MAX_CHUNK, len(data))
+            yield offset + last, data[last:end]
+            last = end
+        if not segment:
+            return
+        pending = data[last:]
+        offset += last
+
+
+def _digest(chunk: bytes) -> bytes:
+    return hashlib.blake2b(chunk, digest_size=16).digest()
+
+
+def create_delta(base: BinaryIO, target_path: Path, delta_path: Path) -> int:
+    """Write the delta turning base into target; returns the delta size in bytes"""
+    index: Dict[bytes, Tuple[int, int]] = {}
+    base.seek(0)
+    for offset, chunk in iter_chunks(base):
+        index.setdefault(_digest(chunk), (offset, len(chunk)))
+
+    compressor = zlib.compressobj(6)
+    written = 0
+    with open(target_path, "rb") as f, open(delta_path, "wb") as out:
+        out.write(_HEADER.pack(MAGIC, FORMAT_VERSION, os.fstat(base.fileno()).st_size, Path(target_path).stat().st_size))
+        written += _HEADER.size
+
+        def emit(op: bytes):
+            nonlocal written
+            data = compressor.compress(op)
+            out.write(data)
+            written += len(data)
+
+        copy = None  # (offset, length) being extended
+        literal = []
+        literal_size = 0
+
+        def flush_copy():
+            nonlocal copy
+            if copy:
+                emit(b"C" + _COPY.pack(*copy))
+                copy = None
+
+        def flush_literal():
+            nonlocal literal, literal_size
+            if literal:
+                emit(b"L" + _LENGTH.pack(literal_size))
+                for part in literal:
+                    emit(part)
+                literal, literal_size = [], 0
+
+        for _, chunk in iter_chunks(f):
+            match = index.get(_digest(chunk))
+            if match is not None:
+                flush_literal()
+                if copy and copy[0] + copy[1] == match[0] and copy[1] + match[1] <= MAX_COPY:
+                    copy = (copy[0], copy[1] + match[1])
+                else:
+                    flush_copy()
+                    copy = match
+            else:
+                flush_copy()
+                literal.append(chunk)
+                literal_size += len(chunk)
+                if literal_size >= MAX_LITERAL:
+                    flush_literal()
+        flush_copy()
+        flush_literal()
+
+        tail = compressor.flush()
+        out.write(tail)
+        written += len(tail)
+    return written
+
+
+class _InflatingReader:
+    """Exact-size reads from a zlib stream"""
+
+    def __init__(self, f: BinaryIO):
+        self._f = f
+        self._inflater = zlib.decompressobj()
+        self._buffer = b""
+
+    def read(self, size: int) -> bytes:
+        while len(self._buffer) < size:
+            if self._inflater.unconsumed_tail:
+                data = self._inflater.unconsumed_tail
+            else:
+                data = self._f.read(64 * 1024)
+                if not data:
+                    self._buffer += self._inflater.flush()
+                    break
+            self._buffer += self._inflater.decompress(data, max(size - len(self._buffer), 64 * 1024))
+        result, self._buffer = self._buffer[:size], self._buffer[size:]
+        return result
+
+
+def apply_delta(base: BinaryIO, delta_path: Path, target_path: Path) -> str:
+    """Rebuild the target revision; returns its SHA-256 hex. Raises ValueError on a bad delta."""
+    hasher = hashlib.sha256()
+    with open(delta_path, "rb") as f, open(target_path, "wb") as out:
+        magic, version, base_size, target_size = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError("Not a file delta")
+        if os.fstat(base.fileno()).st_size != base_size:
+            raise ValueError("Delta does not match its base file")
+
+        ops = _InflatingReader(f)
+        written = 0
+        while True:
+            kind = ops.read(1)
+            if not kind:
+                break
+            if kind == b"C":
+                offset, length = _COPY.unpack(ops.read(_COPY.size))
+                base.seek(offset)
+                while length:
+                    data = base.read(min(length, SEGMENT_SIZE))
+                    if not data:
+                        raise ValueError("Delta copies past the end of its base file")
+                    hasher.update(data)
+                    out.write(data)
+                    written += len(data)
+                    length -= len(data)
+            elif kind == b"L":
+                (length,) = _LENGTH.unpack(ops.read(_LENGTH.size))
+                data = ops.read(length)
+                if len(data) != length:
+                    raise ValueError("Truncated file delta")
+                hasher.update(data)
+                out.write(data)
+                written += length
+            else:
+                raise ValueError("Corrupt file delta")
+
+        if written != target_size:
+            raise ValueError("Delta produced the wrong size")
+    return hasher.hexdigest()
@@ -0,0 +1,190 @@
+"""
+Blob Store - Content-addressed, deduplicated storage of project file content
+
+File content is stored once per SHA-256 under sharded keys
+(blobs/ab/cd/<hash>) in the configured object storage and shared by every
+ProjectFile row with that hash.
+FileBlob.ref_count tracks those rows: adopting an upload either increments an
+existing blob or moves the upload into place, and deleting a file only
+decrements. Blobs whose count reaches zero are removed by collect_garbage
+after a grace period, so a concurrent re-upload of the same content within
+that window simply revives the blob. Files are moved into place before the
+caller commits their row, so collect_garbage also removes blob files that
+have had no row for the grace period (left behind by a failed commit).
+"""
+
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.file_management import FileBlob, ProjectFile
+from app.services.object_storage import StorageBackend, StoredObject, get_storage, storage_for
+
+SWEEP_BATCH_SIZE = 500
+
+
+class BlobStore:
+    """Sharded content-addressed blobs with reference counts in FileBlob"""
+
+    PREFIX = "blobs/"
+
+    def __init__(self, storage: Optional[StorageBackend] = None):
+        self._storage = storage
+
+    @property
+    def storage(self) -> StorageBackend:
+        return self._storage or get_storage()
+
+    def key_for(self, content_hash: str) -> str:
+        return f"{self.PREFIX}{content_hash[:2]}/{content_hash[2:4]}/{content_hash}"
+
+    def adopt(self, db: Session, temp_path: Path, content_hash: str, size: int, references: int = 1) -> FileBlob:
+        """
+        Take ownership of an uploaded file with the given hash and add
+        references (one per ProjectFile row using it). Duplicate content is
+        discarded in favour of the stored blob. The caller commits together
+        with the ProjectFile rows.
+        """
+        referenced = db.execute(
+            update(FileBlob)
+            .where(FileBlob.content_hash == content_hash)
+            .values(ref_count=FileBlob.ref_count + references, orphaned_at=None)
+        ).rowcount
+
+        if referenced:
+            blob = db.get(FileBlob, content_hash)
+            if storage_for(blob.storage_path).exists(blob.storage_path):
+                os.unlink(temp_path)
+                return blob
+
+        # Stored objects start a fresh grace period, so the orphan sweep leaves
+        # them alone until the row is committed
+        location = self.storage.put_file(self.key_for(content_hash), temp_path)
+        if referenced:
+            # Row survived but the content went missing; the upload restores it
+            blob.storage_path = location
+            return blob
+
+        try:
+            with db.begin_nested():
+                blob = FileBlob(
+                    content_hash=content_hash,
+                    size=size,
+                    storage_path=location,
+                    ref_count=references
+                )
+                db.add(blob)
+        except IntegrityError:
+            # A concurrent upload of the same content created the row first
+            db.execute(
+                update(FileBlob)
+                .where(FileBlob.content_hash == content_hash)
+                .values(ref_count=FileBlob.ref_count + references, orphaned_at=None)
+            )
+            blob = db.get(FileBlob, content_hash)
+        return blob
+
+    def release(self, db: Session, content_hash: str):
+        """Drop one reference; the caller commits with the ProjectFile delete"""
+        db.execute(
+            update(FileBlob)
+            .where(FileBlob.content_hash == content_hash)
+            .values(ref_count=FileBlob.ref_count - 1)
+        )
+        db.execute(
+            update(FileBlob)
+            .where(FileBlob.content_hash == content_hash, FileBlob.ref_count <= 0)
+            .values(orphaned_at=datetime.now(timezone.utc))
+        )
+
+    def recount(self, db: Session) -> int:
+        """Rebuild every ref_count from ProjectFile rows; returns blobs changed"""
+        counts = dict(db.execute(
+            select(ProjectFile.content_hash, func.count())
+            .where(ProjectFile.content_hash.isnot(None))
+            .group_by(ProjectFile.content_hash)
+        ).all())
+        changed = 0
+        now = datetime.now(timezone.utc)
+        for content_hash, ref_count in db.execute(select(FileBlob.content_hash, FileBlob.ref_count)).all():
+            actual = counts.get(content_hash, 0)
+            if actual != ref_count:
+                db.execute(
+                    update(FileBlob)
+                    .where(FileBlob.content_hash == content_hash)
+                    .values(ref_count=actual, orphaned_at=None if actual else now)
+                )
+                changed += 1
+        db.commit()
+        return changed
+
+    def collect_garbage(self, db: Session, grace_seconds: Optional[int] = None) -> Dict:
+        """Delete blobs unreferenced, and blob files without a row, for longer than the grace period"""
+        if grace_seconds is None:
+            grace_seconds = settings.BLOB_GC_GRACE_SECONDS
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=grace_seconds)
+
+        candidates = db.execute(
+            select(FileBlob.content_hash, FileBlob.size, FileBlob.storage_path)
+            .where(FileBlob.ref_count <= 0, FileBlob.orphaned_at <= cutoff)
+        ).all()
+
+        deleted = freed = 0
+        for content_hash, size, storage_path in candidates:
+            # Re-check the count in the delete so a blob revived meanwhile survives.
+            # The content goes before the commit: an upload blocked on the row
+            # lock then finds no row and stores its own copy.
+            removed = db.execute(
+                delete(FileBlob)
+                .where(FileBlob.content_hash == content_hash, FileBlob.ref_count <= 0)
+            ).rowcount
+            if removed:
+                storage_for(storage_path).delete(storage_path)
+            db.commit()
+            if not removed:
+                continue
+            deleted += 1
+            freed += size
+
+        orphans, orphan_bytes = self._sweep_unreferenced_files(db, cutoff.timestamp())
+        return {
+            "blobs_deleted": deleted,
+            "bytes_freed": freed + orphan_bytes,
+            "orphan_files_deleted": orphans
+        }
+
+    def _sweep_unreferenced_files(self, db: Session, cutoff: float):
+        """Remove stored blobs older than cutoff (epoch seconds) that have no FileBlob row"""
+        storage = self.storage
+        deleted = freed = 0
+        batch: List[StoredObject] = []
+
+        def flush():
+            nonlocal deleted, freed
+            known = set(db.execute(
+                select(FileBlob.content_hash)
+                .where(FileBlob.content_hash.in_([stored.name for stored in batch]))
+            ).scalars())
+            for stored in batch:
+                if stored.name in known or stored.modified >= cutoff:
+                    continue
+                storage.delete(stored.location)
+                deleted += 1
+                freed += stored.size
+            batch.clear()
+
+        for stored in storage.list(self.PREFIX):
+            batch.append(stored)
+            if len(batch) >= SWEEP_BATCH_SIZE:
+                flush()
+        if batch:
+            flush()
+        return deleted, freed
+
+blob_store = BlobStore()
@@ -2,7 +2,7 @@
 Blueprint Generator - Auto-generates CAD-like drawings from design data
 """
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from reportlab.lib.pagesizes import A4, A3, A2
 from reportlab.lib.units import mm, cm
 from reportlab.lib import colors
@@ -14,20 +14,40 @@ from reportlab.graphics import renderPDF
 import io
 import math
 
+from app.services.blueprint_geometry import DEFAULT_SPAN, DEFAULT_STOREY, element_geometry
+
+DEFAULT_SCALE = 100  # 1:100
+
+# Level of detail by drawing scale (1:n)
+LOD_DETAIL_MAX_SCALE = 100   # reinforcement and inner outlines
+LOD_OUTLINE_MAX_SCALE = 500  # element outlines only; beyond this, markers
+MIN_SYMBOL_SIZE = 1.5        # points; smaller symbols are drawn as markers
+MARKER_SIZE = 3              # points
+
+SYMBOL_GAP = 1 * cm
+FORM_BLEED = 2               # points around a symbol's bounding box for line width
+
 class BlueprintGenerator:
     """Blueprint Generator - Creates technical drawings from design calculations"""
     
+    # Bump whenever a drawing layout changes; invalidates cached renders
+    TEMPLATE_VERSION = "3"
+    
     def __init__(self):
         self.scale_factor = 100  # 1 meter = 100 units in drawing
+        self.drawing_scale = DEFAULT_SCALE  # 1:drawing_scale
     
     def generate_structural_plan(
         self,
         project_data: Dict,
         calculations: List[Dict],
-        page_size: str = "A2"
+        page_size: str = "A2",
+        scale: int = DEFAULT_SCALE
     ) -> bytes:
         """
-        Generate structural plan view (top view)
+        Generate structural plan view (top view).
+        Elements are placed as instances of shared symbols; plans that do not
+        fit one sheet are tiled across as many sheets as needed.
         """
         if page_size == "A2":
             page_width, page_height = A2
@@ -36,55 +56,22 @@ class BlueprintGenerator:
         else:
             page_width, page_height = A4
         
-        buffer = io.BytesIO()
-        c = canvas.Canvas(buffer, pagesize=(page_width, page_height))
-        
-        # Title block
-        self._draw_title_block(c, page_width, page_height, project_data)
-        
-        # Drawing area (leave margins)
-        margin = 2 * cm
-        drawing_width = page_width - 2 * margin
-        drawing_height = page_height - 3 * cm - margin
-        
-        # Draw grid
-        self._draw_grid(c, margin, margin, drawing_width, drawing_height)
-        
-        # Draw structural elements
-        x_offset = margin
-        y_offset = margin
-        
-        for calc in calculations:
-            calc_type = calc.get("calculation_type", "")
-            design_outputs = calc.get("design_outputs", {})
-            
-            if calc_type == "footing_design":
-                self._draw_footing(c, x_offset, y_offset, design_outputs)
-                x_offset += 5 * cm
-            
-            elif calc_type == "column_design":
-                self._draw_column(c, x_offset, y_offset, design_outputs)
-                x_offset += 3 * cm
-            
-            elif calc_type == "beam_design":
-                self._draw_beam(c, x_offset, y_offset, design_outputs)
-                x_offset += 4 * cm
-        
-        # Draw dimensions
-        self._draw_dimensions(c, margin, margin, drawing_width, drawing_height)
-        
-        # Draw legend
-        self._draw_legend(c, page_width - 4 * cm, margin + 1 * cm)
-        
-        c.save()
-        buffer.seek(0)
-        return buffer.getvalue()
+        self.drawing_scale = scale
+        symbols = [
+            self._plan_symbol(calc)
+            for calc in calculations
+        ]
+        return self._render_sheets(
+            project_data, [sym for sym in symbols if sym], page_width, page_height,
+            view_type="PLAN", grid=True, dimensions=True, legend=True
+        )
     
     def generate_elevation_view(
         self,
         project_data: Dict,
         calculations: List[Dict],
-        page_size: str = "A2"
+        page_size: str = "A2",
+        scale: int = DEFAULT_SCALE
     ) -> bytes:
         """
         Generate elevation view (side view)
@@ -94,36 +81,171 @@ class BlueprintGenerator:
         else:
             page_width, page_height = A3
         
+        self.drawing_scale = scale
+        symbols = [
+            self._elevation_symbol(calc)
+            for calc in calculations
+        ]
+        return self._render_sheets(
+            project_data, [sym for sym in symbols if sym], page_width, page_height,
+            view_type="ELEVATION"
+        )
+    
+    def _paper(self, meters: float) -> float:
+        """Length on paper (points) of a real length in metres at the current scale"""
+        return meters * self.scale_factor / 10 * DEFAULT_SCALE / self.drawing_scale
+    
+    def _level_of_detail(self, width: float, height: float) -> str:
+        """'detail', 'outline' or 'marker' for a symbol of the given paper size"""
+        if self.drawing_scale > LOD_OUTLINE_MAX_SCALE or min(width, height) < MIN_SYMBOL_SIZE:
+            return "marker"
+        if self.drawing_scale > LOD_DETAIL_MAX_SCALE:
+            return "outline"
+        return "detail"
+    
+    def _plan_symbol(self, calc: Dict) -> Optional[Tuple]:
+        """(symbol name, width, height, draw) for a plan element, or None"""
+        calc_type = calc.get("calculation_type", "")
+        design_outputs = calc.get("design_outputs") or {}
+        geometry = element_geometry(calc)
+        if calc_type == "footing_design":
+            size = design_outputs.get("footing_size", 1.0)
+            width = height = self._paper(size)
+        elif calc_type == "column_design":
+            size = design_outputs.get("column_size", 0.3)
+            width = height = self._paper(size)
+        elif calc_type == "beam_design":
+            size = design_outputs.get("beam_width", 0.23)
+            span = geometry["length"]
+            width, height = self._paper(span), self._paper(size)
+        else:
+            return None
+        
+        lod = self._level_of_detail(width, height)
+        if lod == "marker":
+            return (f"marker_{calc_type}", MARKER_SIZE, MARKER_SIZE, self._draw_marker)
+        
+        outputs = dict(design_outputs)
+        draw = {
+            "footing_design": lambda c, x, y: self._draw_footing(c, x, y, outputs, detail=lod == "detail"),
+            "column_design": lambda c, x, y: self._draw_column(c, x, y, outputs),
+            "beam_design": lambda c, x, y: self._draw_beam(c, x, y, outputs, span=span)
+        }[calc_type]
+        key = f"{size:.3f}_{span:.3f}" if calc_type == "beam_design" else f"{size:.3f}"
+        return (f"plan_{calc_type}_{lod}_{key}".replace(".", "_"), width, height, draw)
+    
+    def _elevation_symbol(self, calc: Dict) -> Optional[Tuple]:
+        """(symbol name, width, height, draw) for an elevation element, or None"""
+        calc_type = calc.get("calculation_type", "")
+        design_outputs = calc.get("design_outputs") or {}
+        geometry = element_geometry(calc)
+        if calc_type == "column_design":
+            size = design_outputs.get("column_size", 0.3)
+            span = geometry["height"]
+            width, height = self._paper(size), self._paper(span)
+            key = f"{size:.3f}_{span:.3f}"
+        elif calc_type == "beam_design":
+            depth = design_outputs.get("overall_depth", 0.3)
+            span = geometry["length"]
+            width, height = self._paper(span), self._paper(depth)
+            key = f"{depth:.3f}_{span:.3f}"
+        else:
+            return None
+        
+        lod = self._level_of_detail(width, height)
+        if lod == "marker":
+            return (f"marker_{calc_type}", MARKER_SIZE, MARKER_SIZE, self._draw_marker)
+        
+        outputs = dict(design_outputs)
+        draw = {
+            "column_design": lambda c, x, y: self._draw_column_elevation(c, x, y, outputs, height=span, detail=lod == "detail"),
+            "beam_design": lambda c, x, y: self._draw_beam_elevation(c, x, y, outputs, span=span)
+        }[calc_type]
+        return (f"elev_{calc_type}_{lod}_{key}".replace(".", "_"), width, height, draw)
+    
+    def _layout_sheets(self, symbols: List[Tuple], width: float, height: float) -> List[List[Tuple]]:
+        """
+        Flow symbols left to right, bottom to top, starting a new sheet when
+        the drawing area is full. Returns per-sheet lists of (name, x, y).
+        """
+        sheets = [[]]
+        x = y = 0.0
+        row_height = 0.0
+        for name, w, h, _ in symbols:
+            if x > 0 and x + w > width:
+                x = 0.0
+                y += row_height + SYMBOL_GAP
+                row_height = 0.0
+            if y > 0 and y + h > height:
+                sheets.append([])
+                x = y = row_height = 0.0
+            sheets[-1].append((name, x, y))
+            x += w + SYMBOL_GAP
+            row_height = max(row_height, h)
+        return sheets
+    
+    def _render_sheets(
+        self,
+        project_data: Dict,
+        symbols: List[Tuple],
+        page_width: float,
+        page_height: float,
+        view_type: str,
+        grid: bool = False,
+        dimensions: bool = False,
+        legend: bool = False
+    ) -> bytes:
+        """
+        Draw every symbol and the grid once as form XObjects, then place
+        instances on as many sheets as the layout needs
+        """
         buffer = io.BytesIO()
-        c = canvas.Canvas(buffer, pagesize=(page_width, page_height))
-        
-        # Title block
-        self._draw_title_block(c, page_width, page_height, project_data, view_type="ELEVATION")
+        c = canvas.Canvas(buffer, pagesize=(page_width, page_height), pageCompression=1)
         
+        # Drawing area (leave margins)
         margin = 2 * cm
         drawing_width = page_width - 2 * margin
         drawing_height = page_height - 3 * cm - margin
         
-        # Draw elevation
-        x_offset = margin
-        y_offset = margin
-        
-        for calc in calculations:
-            calc_type = calc.get("calculation_type", "")
-            design_outputs = calc.get("design_outputs", {})
-            
-            if calc_type == "column_design":
-                self._draw_column_elevation(c, x_offset, y_offset, design_outputs)
-                x_offset += 3 * cm
-            
-            elif calc_type == "beam_design":
-                self._draw_beam_elevation(c, x_offset, y_offset, design_outputs)
-                x_offset += 4 * cm
+        defined = set()
+        for name, w, h, draw in symbols:
+            if name not in defined:
+                c.beginForm(name, -FORM_BLEED, -FORM_BLEED, w + FORM_BLEED, h + FORM_BLEED)
+                draw(c, 0, 0)
+                c.endForm()
+                defined.add(name)
+        if grid:
+            c.beginForm("grid", 0, 0, drawing_width, drawing_height)
+            self._draw_grid(c, 0, 0, drawing_width, drawing_height)
+            c.endForm()
+        
+        # Keep the legend column clear of elements
+        layout_width = drawing_width - 4 * cm if legend else drawing_width
+        sheets = self._layout_sheets(symbols, layout_width, drawing_height)
+        for number, placements in enumerate(sheets, start=1):
+            sheet_label = f" (SHEET {number} OF {len(sheets)})" if len(sheets) > 1 else ""
+            self._draw_title_block(c, page_width, page_height, project_data, view_type=view_type + sheet_label)
+            if grid:
+                self._place(c, "grid", margin, margin)
+            for name, x, y in placements:
+                self._place(c, name, margin + x, margin + y)
+            if dimensions:
+                self._draw_dimensions(c, margin, margin, drawing_width, drawing_height)
+            if legend:
+                self._draw_legend(c, page_width - 4 * cm, margin + 1 * cm)
+            c.showPage()
         
         c.save()
         buffer.seek(0)
         return buffer.getvalue()
     
+    def _place(self, c, name, x, y):
+        """Place an instance of a form XObject"""
+        c.saveState()
+        c.translate(x, y)
+        c.doForm(name)
+        c.restoreState()
+    
     def generate_section_view(
         self,
         project_data: Dict,
@@ -134,6 +256,7 @@ class BlueprintGenerator:
         Generate section view
         """
         page_width, page_height = A3 if page_size == "A3" else A4
+        self.drawing_scale = DEFAULT_SCALE
         
         buffer = io.BytesIO()
         c = canvas.Canvas(buffer, pagesize=(page_width, page_height))
@@ -162,6 +285,7 @@ class BlueprintGenerator:
         Generate road plan view
         """
         page_width, page_height = A2
+        self.drawing_scale = DEFAULT_SCALE
         
         buffer = io.BytesIO()
         c = canvas.Canvas(buffer, pagesize=(page_width, page_height))
@@ -212,7 +336,7 @@ class BlueprintGenerator:
         c.drawString(2 * cm, page_height - 2 * cm, 
                     f"Project Code: {project_data.get('project_code', 'N/A')}")
         c.drawString(2 * cm, page_height - 2.3 * cm, 
-                    f"Scale: 1:100 | Date: {project_data.get('date', 'N/A')}")
+                    f"Scale: 1:{self.drawing_scale} | Date: {project_data.get('date', 'N/A')}")
     
     def _draw_grid(self, c, x, y, width, height, spacing=1*cm):
         """Draw grid lines"""
@@ -220,21 +344,26 @@ class BlueprintGenerator:
         c.setLineWidth(0.5)
         c.setDash([1, 4])
         
-        # Vertical lines
+        # One path for all lines instead of a stroke per line
+        path = c.beginPath()
         for i in range(int(width / spacing) + 1):
-            c.line(x + i * spacing, y, x + i * spacing, y + height)
-        
-        # Horizontal lines
+            path.moveTo(x + i * spacing, y)
+            path.lineTo(x + i * spacing, y + height)
         for i in range(int(height / spacing) + 1):
-            c.line(x, y + i * spacing, x + width, y + i * spacing)
+            path.moveTo(x, y + i * spacing)
+            path.lineTo(x + width, y + i * spacing)
+        c.drawPath(path, stroke=1, fill=0)
+        c.setDash([])
     
-    def _draw_footing(self, c, x, y, design_outputs):
+    def _draw_footing(self, c, x, y, design_outputs, detail=True):
         """Draw footing plan"""
-        size = design_outputs.get("footing_size", 1.0) * self.scale_factor / 10
+        size = self._paper(design_outputs.get("footing_size", 1.0))
         
         c.setStrokeColor(colors.black)
         c.setLineWidth(2)
         c.rect(x, y, size, size, fill=0)
+        if not detail:
+            return
         
         # Column outline
         col_size = size * 0.2
@@ -245,30 +374,32 @@ class BlueprintGenerator:
     
     def _draw_column(self, c, x, y, design_outputs):
         """Draw column plan"""
-        size = design_outputs.get("column_size", 0.3) * self.scale_factor / 10
+        size = self._paper(design_outputs.get("column_size", 0.3))
         
         c.setStrokeColor(colors.black)
         c.setLineWidth(2)
         c.setFillColor(colors.darkgrey)
         c.rect(x, y, size, size, fill=1)
     
-    def _draw_beam(self, c, x, y, design_outputs):
+    def _draw_beam(self, c, x, y, design_outputs, span=DEFAULT_SPAN):
         """Draw beam plan"""
-        width = design_outputs.get("beam_width", 0.23) * self.scale_factor / 10
-        length = 3 * self.scale_factor / 10  # Assume 3m span
+        width = self._paper(design_outputs.get("beam_width", 0.23))
+        length = self._paper(span)
         
         c.setStrokeColor(colors.black)
         c.setLineWidth(2)
         c.rect(x, y, length, width, fill=0)
     
-    def _draw_column_elevation(self, c, x, y, design_outputs):
+    def _draw_column_elevation(self, c, x, y, design_outputs, height=DEFAULT_STOREY, detail=True):
         """Draw column elevation"""
-        width = design_outputs.get("column_size", 0.3) * self.scale_factor / 10
-        height = 3 * self.scale_factor / 10  # Assume 3m height
+        width = self._paper(design_outputs.get("column_size", 0.3))
+        height = self._paper(height)
         
         c.setStrokeColor(colors.black)
         c.setLineWidth(2)
         c.rect(x, y, width, height, fill=0)
+        if not detail:
+            return
         
         # Reinforcement bars (simplified)
         c.setStrokeColor(colors.red)
@@ -277,16 +408,22 @@ class BlueprintGenerator:
         for i in range(1, 4):
             c.line(x + i * bar_spacing, y, x + i * bar_spacing, y + height)
     
-    def _draw_beam_elevation(self, c, x, y, design_outputs):
+    def _draw_beam_elevation(self, c, x, y, design_outputs, span=DEFAULT_SPAN):
         """Draw beam elevation"""
-        width = design_outputs.get("beam_width", 0.23) * self.scale_factor / 10
-        depth = design_outputs.get("overall_depth", 0.3) * self.scale_factor / 10
-        length = 3 * self.scale_factor / 10
+        depth = self._paper(design_outputs.get("overall_depth", 0.3))
+        length = self._paper(span)
         
         c.setStrokeColor(colors.black)
         c.setLineWidth(2)
         c.rect(x, y, length, depth, fill=0)
     
+    def _draw_marker(self, c, x, y):
+        """Fixed-size element marker for scales too small to show outlines"""
+        c.setStrokeColor(colors.black)
+        c.setFillColor(colors.darkgrey)
+        c.setLineWidth(0.5)
+        c.rect(x, y, MARKER_SIZE, MARKER_SIZE, fill=1)
+    
     def _draw_footing_section(self, c, x, y, design_outputs):
         """Draw footing section"""
         size = design_outputs.get("footing_size", 1.0) * self.scale_factor / 10
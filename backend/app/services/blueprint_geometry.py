@@ -0,0 +1,367 @@
+"""
+Blueprint Geometry - One element scene per project, shared by every drawing writer
+
+build_scene turns completed calculations into positioned elements (metres) once;
+project_views projects that scene into plan, elevation and section primitives in
+a single pass; writers (SVG, DXF, PDF) turn those primitives into files. SVG
+and DXF are streamed; ReportLab only writes a PDF out on save(), so the PDF
+writer builds the document in memory and yields it once.
+
+Primitives are tuples in metres:
+    ("rect", layer, x, y, width, height, filled)
+    ("line", layer, x1, y1, x2, y2)
+"""
+
+import io
+import math
+from typing import Dict, Iterator, List, Optional
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A3, landscape
+from reportlab.lib.units import cm
+from reportlab.pdfgen import canvas
+
+DEFAULT_SPAN = 3.0        # m, when a beam calculation has no span input
+DEFAULT_STOREY = 3.0      # m, when a column calculation has no length input
+DEFAULT_SLAB_AREA = 100.0  # m², as assumed by the BOQ
+ELEMENT_GAP = 1.0         # m between elements laid out automatically
+ROW_WIDTH = 40.0          # m before the automatic layout starts a new row
+VIEW_GAP = 5.0            # m between views sharing one model space
+COVER = 0.04              # m, reinforcement cover for drawn bars
+
+VIEWS = ("plan", "elevation", "section")
+
+LAYERS = {
+    "FOOTING": {"color": colors.black, "aci": 7},
+    "COLUMN": {"color": colors.darkgrey, "aci": 8},
+    "BEAM": {"color": colors.black, "aci": 7},
+    "SLAB": {"color": colors.black, "aci": 7},
+    "REBAR": {"color": colors.red, "aci": 1},
+    "GROUND": {"color": colors.brown, "aci": 30},
+}
+
+
+def element_geometry(calc: Dict) -> Optional[Dict]:
+    """
+    Real dimensions (m) of one structural element from its calculation.
+    Spans, heights and areas come from the calculation inputs where given.
+    """
+    outputs = calc.get("design_outputs") or {}
+    inputs = calc.get("input_parameters") or {}
+    calc_type = calc.get("calculation_type", "")
+
+    if calc_type == "footing_design":
+        size = outputs.get("footing_size", 1.0)
+        return {
+            "type": "footing",
+            "width": size,
+            "length": size,
+            "depth": outputs.get("effective_depth", 0.2),
+            "column_width": inputs.get("column_size") or size * 0.2
+        }
+    if calc_type == "column_design":
+        size = outputs.get("column_size", 0.3)
+        return {
+            "type": "column",
+            "width": size,
+            "length": size,
+            "height": inputs.get("column_length", DEFAULT_STOREY)
+        }
+    if calc_type == "beam_design":
+        return {
+            "type": "beam",
+            "width": outputs.get("beam_width", 0.23),
+            "length": inputs.get("span", DEFAULT_SPAN),
+            "depth": outputs.get("overall_depth", 0.3)
+        }
+    if calc_type == "slab_design":
+        side = math.sqrt(inputs.get("area", DEFAULT_SLAB_AREA))
+        return {
+            "type": "slab",
+            "width": side,
+            "length": side,
+            "depth": outputs.get("slab_thickness", 0.15)
+        }
+    return None
+
+
+def build_scene(calculations: List[Dict]) -> Dict:
+    """
+    Positioned elements for a project. Elements with an input "position"
+    ({"x", "y"} in m) keep it; the rest are laid out in rows.
+    """
+    elements = []
+    x = y = row_depth = 0.0
+    for calc in calculations:
+        geometry = element_geometry(calc)
+        if geometry is None:
+            continue
+        position = (calc.get("input_parameters") or {}).get("position")
+        if position:
+            geometry["x"], geometry["y"] = position.get("x", 0.0), position.get("y", 0.0)
+        else:
+            if x > 0 and x + geometry["length"] > ROW_WIDTH:
+                x, y, row_depth = 0.0, y + row_depth + ELEMENT_GAP, 0.0
+            geometry["x"], geometry["y"] = x, y
+            x += geometry["length"] + ELEMENT_GAP
+            row_depth = max(row_depth, geometry["width"])
+        geometry["code"] = calc.get("calculation_code", "")
+        elements.append(geometry)
+    return {"elements": elements}
+
+
+def _rebar_lines(layer_list, x, y, width, height, bars=3, vertical=True):
+    for i in range(1, bars + 1):
+        offset = COVER + (width - 2 * COVER) * (i - 1) / max(bars - 1, 1)
+        if vertical:
+            layer_list.append(("line", "REBAR", x + offset, y + COVER, x + offset, y + height - COVER))
+        else:
+            layer_list.append(("line", "REBAR", x + COVER, y + offset, x + height - COVER, y + offset))
+
+
+def project_views(scene: Dict, views=VIEWS) -> Dict[str, List]:
+    """Plan, elevation and section primitives from one pass over the scene"""
+    out = {view: [] for view in views}
+    plan = out.get("plan")
+    elevation = out.get("elevation")
+    section = out.get("section")
+    section_x = 0.0
+
+    for e in scene["elements"]:
+        x, y, kind = e["x"], e["y"], e["type"]
+
+        if plan is not None:
+            if kind == "footing":
+                plan.append(("rect", "FOOTING", x, y, e["length"], e["width"], False))
+                inset = (e["length"] - e["column_width"]) / 2
+                plan.append(("rect", "COLUMN", x + inset, y + inset, e["column_width"], e["column_width"], True))
+            elif kind == "column":
+                plan.append(("rect", "COLUMN", x, y, e["length"], e["width"], True))
+            elif kind == "beam":
+                plan.append(("rect", "BEAM", x, y, e["length"], e["width"], False))
+            elif kind == "slab":
+                plan.append(("rect", "SLAB", x, y, e["length"], e["width"], False))
+
+        if elevation is not None:
+            if kind == "footing":
+                elevation.append(("rect", "FOOTING", x, -e["depth"], e["length"], e["depth"], False))
+            elif kind == "column":
+                elevation.append(("rect", "COLUMN", x, 0.0, e["length"], e["height"], False))
+                _rebar_lines(elevation, x, 0.0, e["length"], e["height"])
+            elif kind == "beam":
+                soffit = DEFAULT_STOREY - e["depth"]
+                elevation.append(("rect", "BEAM", x, soffit, e["length"], e["depth"], False))
+                _rebar_lines(elevation, x, soffit, e["depth"], e["length"], bars=2, vertical=False)
+            elif kind == "slab":
+                elevation.append(("rect", "SLAB", x, DEFAULT_STOREY, e["length"], e["depth"], False))
+
+        if section is not None:
+            # Cross-sections side by side, each cut through its element's centre
+            if kind == "footing":
+                section.append(("rect", "FOOTING", section_x, 0.0, e["length"], e["depth"], False))
+                inset = (e["length"] - e["column_width"]) / 2
+                section.append(("rect", "COLUMN", section_x + inset, e["depth"], e["column_width"], e["depth"] * 0.5, True))
+                width = e["length"]
+            elif kind in ("column", "beam"):
+                depth = e["width"] if kind == "column" else e["depth"]
+                section.append(("rect", kind.upper(), section_x, 0.0, e["width"], depth, False))
+                _rebar_lines(section, section_x, 0.0, e["width"], depth, bars=2)
+                width = e["width"]
+            else:
+                strip = min(e["length"], 1.0)  # 1 m strip
+                section.append(("rect", "SLAB", section_x, 0.0, strip, e["depth"], False))
+                width = strip
+            section_x += width + ELEMENT_GAP
+
+    if elevation:
+        left = min(p[2] for p in elevation)
+        right = max(p[2] + p[4] if p[0] == "rect" else p[4] for p in elevation)
+        elevation.append(("line", "GROUND", left - ELEMENT_GAP, 0.0, right + ELEMENT_GAP, 0.0))
+    return out
+
+
+def extents(primitives: List) -> Optional[tuple]:
+    """(min_x, min_y, max_x, max_y) of a primitive list"""
+    if not primitives:
+        return None
+    xs, ys = [], []
+    for p in primitives:
+        if p[0] == "rect":
+            xs += [p[2], p[2] + p[4]]
+            ys += [p[3], p[3] + p[5]]
+        else:
+            xs += [p[2], p[4]]
+            ys += [p[3], p[5]]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+class SVGWriter:
+    """SVG with one group per view, stacked vertically, in millimetres"""
+
+    media_type = "image/svg+xml"
+    extension = "svg"
+
+    def write(self, views: Dict[str, List], project_data: Dict) -> Iterator[str]:
+        boxes = {name: extents(prims) for name, prims in views.items() if prims}
+        width = max((b[2] - b[0] for b in boxes.values()), default=1.0)
+        height = sum(b[3] - b[1] for b in boxes.values()) + VIEW_GAP * max(len(boxes) - 1, 0)
+        mm = 1000.0
+
+        yield (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{width * mm:.0f}mm" height="{height * mm:.0f}mm" '
+            f'viewBox="0 0 {width * mm:.1f} {height * mm:.1f}">\n'
+            f'<title>{_xml(project_data.get("project_name", "Project"))}</title>\n'
+        )
+        top = 0.0
+        for name, box in boxes.items():
+            min_x, min_y, max_x, max_y = box
+            # Flip y so the drawing reads with z / north up
+            yield (
+                f'<g id="{name}" transform="translate({-min_x * mm:.1f},{(top + max_y) * mm:.1f}) scale(1,-1)" '
+                'fill="none" stroke-width="1" vector-effect="non-scaling-stroke">\n'
+            )
+            for p in views[name]:
+                color = LAYERS[p[1]]["color"].hexval()[2:]
+                if p[0] == "rect":
+                    fill = f"#{color}" if p[6] else "none"
+                    yield (
+                        f'<rect class="{p[1]}" x="{p[2] * mm:.1f}" y="{p[3] * mm:.1f}" width="{p[4] * mm:.1f}" '
+                        f'height="{p[5] * mm:.1f}" stroke="#{color}" fill="{fill}"/>\n'
+                    )
+                else:
+                    yield (
+                        f'<line class="{p[1]}" x1="{p[2] * mm:.1f}" y1="{p[3] * mm:.1f}" x2="{p[4] * mm:.1f}" '
+                        f'y2="{p[5] * mm:.1f}" stroke="#{color}"/>\n'
+                    )
+            yield "</g>\n"
+            top += (max_y - min_y) + VIEW_GAP
+        yield "</svg>\n"
+
+
+def _xml(text: str) -> str:
+    return str(text).replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+class DXFWriter:
+    """
+    ASCII DXF R12 (AC1009, metres). Views sit side by side in model space
+    on layers named <VIEW>-<LAYER>, all drawn with the CONTINUOUS linetype.
+    R12 has no $INSUNITS header variable, so units are not declared.
+    """
+
+    media_type = "application/dxf"
+    extension = "dxf"
+
+    @staticmethod
+    def _pairs(*pairs) -> str:
+        return "".join(f"{code}\n{value}\n" for code, value in pairs)
+
+    def write(self, views: Dict[str, List], project_data: Dict) -> Iterator[str]:
+        p = self._pairs
+        yield p((0, "SECTION"), (2, "HEADER"), (9, "$ACADVER"), (1, "AC1009"), (0, "ENDSEC"))
+
+        # Strict R12 readers reject layers whose linetype is not in the LTYPE table
+        yield p((0, "SECTION"), (2, "TABLES"), (0, "TABLE"), (2, "LTYPE"), (70, 1),
+                (0, "LTYPE"), (2, "CONTINUOUS"), (70, 0), (3, "Solid line"),
+                (72, 65), (73, 0), (40, "0.0"), (0, "ENDTAB"))
+
+        layer_names = [f"{view.upper()}-{layer}" for view in views for layer in LAYERS]
+        yield p((0, "TABLE"), (2, "LAYER"), (70, len(layer_names)))
+        for view in views:
+            for layer, style in LAYERS.items():
+                yield p((0, "LAYER"), (2, f"{view.upper()}-{layer}"), (70, 0), (62, style["aci"]), (6, "CONTINUOUS"))
+        yield p((0, "ENDTAB"), (0, "ENDSEC"))
+
+        yield p((0, "SECTION"), (2, "ENTITIES"))
+        offset = 0.0
+        for view, prims in views.items():
+            box = extents(prims)
+            if box is None:
+                continue
+            dx = offset - box[0]
+            for prim in prims:
+                layer = f"{view.upper()}-{prim[1]}"
+                if prim[0] == "rect":
+                    x, y, w, h = prim[2] + dx, prim[3], prim[4], prim[5]
+                    yield p((0, "POLYLINE"), (8, layer), (66, 1), (70, 1))
+                    for vx, vy in ((x, y), (x + w, y), (x + w, y + h), (x, y + h)):
+                        yield p((0, "VERTEX"), (8, layer), (10, f"{vx:.4f}"), (20, f"{vy:.4f}"))
+                    yield p((0, "SEQEND"), (8, layer))
+                else:
+                    yield p((0, "LINE"), (8, layer),
+                            (10, f"{prim[2] + dx:.4f}"), (20, f"{prim[3]:.4f}"),
+                            (11, f"{prim[4] + dx:.4f}"), (21, f"{prim[5]:.4f}"))
+            yield p((0, "TEXT"), (8, f"{view.upper()}-FOOTING"), (10, f"{offset:.4f}"),
+                    (20, f"{box[1] - 1.0:.4f}"), (40, 0.3), (1, view.upper()))
+            offset += (box[2] - box[0]) + VIEW_GAP
+        yield p((0, "ENDSEC"), (0, "EOF"))
+
+
+class PDFWriter:
+    """
+    ReportLab PDF with one page per view, scaled to fit an A3 landscape sheet.
+    The canvas writes nothing until save(), so the whole document is built in
+    memory and yielded as a single chunk.
+    """
+
+    media_type = "application/pdf"
+    extension = "pdf"
+
+    def write(self, views: Dict[str, List], project_data: Dict) -> Iterator[bytes]:
+        buffer = io.BytesIO()
+        page_width, page_height = landscape(A3)
+        c = canvas.Canvas(buffer, pagesize=(page_width, page_height), pageCompression=1)
+        margin = 2 * cm
+
+        for view, prims in views.items():
+            box = extents(prims)
+            if box is None:
+                continue
+            c.setFont("Helvetica-Bold", 14)
+            c.drawString(margin, page_height - 1.5 * cm,
+                         f"{project_data.get('project_name', 'Project')} - {view.upper()}")
+            c.setFont("Helvetica", 10)
+            c.drawString(margin, page_height - 2 * cm, f"Project Code: {project_data.get('project_code', 'N/A')}")
+
+            area_w = page_width - 2 * margin
+            area_h = page_height - 3 * cm - margin
+            k = min(area_w / max(box[2] - box[0], 1e-6), area_h / max(box[3] - box[1], 1e-6))
+            # k is points per metre, so one paper metre (72 / 0.0254 pt) covers this many real metres
+            c.drawString(margin, page_height - 2.5 * cm, f"Scale: 1:{72 / 0.0254 / k:.0f}")
+
+            c.saveState()
+            c.translate(margin - box[0] * k, margin - box[1] * k)
+            c.setLineWidth(0.7)
+            for prim in prims:
+                color = LAYERS[prim[1]]["color"]
+                c.setStrokeColor(color)
+                if prim[0] == "rect":
+                    c.setFillColor(color)
+                    c.rect(prim[2] * k, prim[3] * k, prim[4] * k, prim[5] * k, fill=1 if prim[6] else 0)
+                else:
+                    c.line(prim[2] * k, prim[3] * k, prim[4] * k, prim[5] * k)
+            c.restoreState()
+            c.showPage()
+
+        c.save()
+        yield buffer.getvalue()
+
+
+WRITERS = {
+    "svg": SVGWriter,
+    "dxf": DXFWriter,
+    "pdf": PDFWriter,
+}
+
+
+def export_drawings(calculations: List[Dict], project_data: Dict, fmt: str, views=VIEWS) -> Iterator:
+    """Build the scene once and stream it through the writer for fmt"""
+    writer_cls = WRITERS.get(fmt)
+    if writer_cls is None:
+        raise ValueError(f"Unsupported drawing format: {fmt}")
+    unknown = [view for view in views if view not in VIEWS]
+    if unknown:
+        raise ValueError(f"Unknown views: {', '.join(unknown)}")
+    scene = build_scene(calculations)
+    return writer_cls().write(project_views(scene, views), project_data)
@@ -3,94 +3,112 @@ BOQ Calculator - Automatically generates Bill of Quantities
 """
 
 from typing import Dict, List
-from app.models.calculation import Calculation
-from app.models.material import BOQ, BOQItem, Material, MaterialGrade
+from sqlalchemy import and_, delete, exists, func, insert, select
+from app.models.calculation import Calculation, CalculationStatus, CalculationType
+from app.models.material import BOQ, BOQItem, BOQContribution, Material, MaterialGrade
 from app.services.engineering_calculations import StructuralDesignEngine
 
+STEEL_DENSITY = 7850  # kg/m³
+
+DEFAULT_WASTAGE_FACTORS = {
+    "cement": 0.02,  # 2%
+    "steel": 0.05,   # 5%
+    "concrete": 0.02, # 2%
+    "sand": 0.02,
+    "aggregate": 0.02
+}
+
+def _footing_quantities(calc: Calculation) -> Dict[str, float]:
+    design_outputs = calc.design_outputs or {}
+    footing_size = design_outputs.get("footing_size", 0)
+    depth = design_outputs.get("effective_depth", 0)
+    volume = footing_size * footing_size * depth
+    return {
+        "concrete": volume,
+        "excavation": volume * 1.2  # 20% extra for excavation
+    }
+
+def _column_quantities(calc: Calculation) -> Dict[str, float]:
+    design_outputs = calc.design_outputs or {}
+    column_size = design_outputs.get("column_size", 0)
+    # Assume column height from project
+    height = 3.0  # Default, should come from project
+    steel_area = design_outputs.get("steel_area_required", 0) / 1e6  # Convert mm² to m²
+    return {
+        "concrete": column_size * column_size * height,
+        "steel": steel_area * height * STEEL_DENSITY
+    }
+
+def _beam_quantities(calc: Calculation) -> Dict[str, float]:
+    design_outputs = calc.design_outputs or {}
+    width = design_outputs.get("beam_width", 0)
+    depth = design_outputs.get("overall_depth", 0)
+    # Assume span from inputs
+    span = (calc.input_parameters or {}).get("span", 5.0)
+    steel_area = design_outputs.get("steel_area_required", 0) / 1e6
+    return {
+        "concrete": width * depth * span,
+        "steel": steel_area * span * STEEL_DENSITY
+    }
+
+def _slab_quantities(calc: Calculation) -> Dict[str, float]:
+    design_outputs = calc.design_outputs or {}
+    thickness = design_outputs.get("slab_thickness", 0)
+    # Assume area from inputs
+    area = (calc.input_parameters or {}).get("area", 100.0)
+    steel_area = design_outputs.get("steel_area_required", 0) / 1e6
+    return {
+        "concrete": thickness * area,
+        "steel": steel_area * area * STEEL_DENSITY
+    }
+
+# Calculation types that contribute quantities to the BOQ
+QUANTITY_EXTRACTORS = {
+    CalculationType.FOOTING_DESIGN: _footing_quantities,
+    CalculationType.COLUMN_DESIGN: _column_quantities,
+    CalculationType.BEAM_DESIGN: _beam_quantities,
+    CalculationType.SLAB_DESIGN: _slab_quantities,
+}
+
 class BOQCalculator:
     """BOQ Calculator Service"""
     
     def __init__(self, db_session):
         self.db = db_session
     
-    def calculate_material_quantities(
+    def calculation_contributions(self, calc: Calculation) -> Dict[str, float]:
+        """
+        Raw (pre-wastage) material quantities contributed by one calculation
+        """
+        extractor = QUANTITY_EXTRACTORS.get(CalculationType(calc.calculation_type))
+        if extractor is None:
+            return {}
+        return {
+            material: quantity
+            for material, quantity in extractor(calc).items()
+            if quantity
+        }
+    
+    def finalize_quantities(
         self,
-        calculations: List[Calculation],
+        raw_quantities: Dict[str, float],
         wastage_factors: Dict[str, float] = None
     ) -> Dict[str, float]:
         """
-        Calculate total material quantities from calculations
+        Derive cement/sand/aggregate from concrete and apply wastage factors
         """
         if wastage_factors is None:
-            wastage_factors = {
-                "cement": 0.02,  # 2%
-                "steel": 0.05,   # 5%
-                "concrete": 0.02, # 2%
-                "sand": 0.02,
-                "aggregate": 0.02
-            }
+            wastage_factors = DEFAULT_WASTAGE_FACTORS
         
         quantities = {
             "cement": 0.0,
-            "steel": 0.0,
-            "concrete": 0.0,
+            "steel": raw_quantities.get("steel", 0.0),
+            "concrete": raw_quantities.get("concrete", 0.0),
             "sand": 0.0,
             "aggregate": 0.0,
-            "excavation": 0.0
+            "excavation": raw_quantities.get("excavation", 0.0)
         }
         
-        for calc in calculations:
-            design_outputs = calc.design_outputs or {}
-            calc_type = calc.calculation_type
-            
-            if calc_type.value == "footing_design":
-                # Extract footing quantities
-                footing_size = design_outputs.get("footing_size", 0)
-                depth = design_outputs.get("effective_depth", 0)
-                volume = footing_size * footing_size * depth
-                quantities["concrete"] += volume
-                quantities["excavation"] += volume * 1.2  # 20% extra for excavation
-                
-            elif calc_type.value == "column_design":
-                # Extract column quantities
-                column_size = design_outputs.get("column_size", 0)
-                # Assume column height from project
-                height = 3.0  # Default, should come from project
-                volume = column_size * column_size * height
-                quantities["concrete"] += volume
-                
-                # Steel
-                steel_area = design_outputs.get("steel_area_required", 0) / 1e6  # Convert mm² to m²
-                steel_density = 7850  # kg/m³
-                steel_volume = steel_area * height
-                quantities["steel"] += steel_volume * steel_density
-                
-            elif calc_type.value == "beam_design":
-                # Extract beam quantities
-                width = design_outputs.get("beam_width", 0)
-                depth = design_outputs.get("overall_depth", 0)
-                # Assume span from inputs
-                span = calc.input_parameters.get("span", 5.0)
-                volume = width * depth * span
-                quantities["concrete"] += volume
-                
-                # Steel
-                steel_area = design_outputs.get("steel_area_required", 0) / 1e6
-                steel_volume = steel_area * span
-                quantities["steel"] += steel_volume * 7850
-                
-            elif calc_type.value == "slab_design":
-                # Extract slab quantities
-                thickness = design_outputs.get("slab_thickness", 0)
-                # Assume area from inputs
-                area = calc.input_parameters.get("area", 100.0)
-                volume = thickness * area
-                quantities["concrete"] += volume
-                
-                # Steel
-                steel_area = design_outputs.get("steel_area_required", 0) / 1e6
-                quantities["steel"] += steel_area * area * 7850
-        
         # Calculate cement from concrete (assuming 1:2:4 mix for M25)
         # 1 m³ concrete ≈ 300-350 kg cement (varies by grade)
         cement_per_cubic_meter = 350  # kg/m³ (approximate for M25)
@@ -109,6 +127,95 @@ class BOQCalculator:
         
         return quantities
     
+    def calculate_material_quantities(
+        self,
+        calculations: List[Calculation],
+        wastage_factors: Dict[str, float] = None
+    ) -> Dict[str, float]:
+        """
+        Calculate total material quantities from calculations
+        """
+        raw = {}
+        for calc in calculations:
+            for material, quantity in self.calculation_contributions(calc).items():
+                raw[material] = raw.get(material, 0.0) + quantity
+        return self.finalize_quantities(raw, wastage_factors)
+    
+    def refresh_project_contributions(self, project_id: int) -> Dict[str, int]:
+        """
+        Bring stored contribution rows in line with the project's completed
+        calculations. Only calculations that are new or changed since their rows
+        were derived are re-read; everything else is left untouched.
+        """
+        completed = and_(
+            Calculation.project_id == project_id,
+            Calculation.status == CalculationStatus.COMPLETED,
+            Calculation.calculation_type.in_(list(QUANTITY_EXTRACTORS))
+        )
+        
+        # Rows whose calculation was deleted or is no longer completed
+        removed = self.db.execute(
+            delete(BOQContribution)
+            .where(
+                BOQContribution.project_id == project_id,
+                ~BOQContribution.calculation_id.in_(select(Calculation.id).where(completed))
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        
+        # Completed calculations without an up-to-date contribution row
+        fresh = exists().where(
+            BOQContribution.calculation_id == Calculation.id,
+            BOQContribution.calculation_revision == Calculation.revision
+        )
+        # Locked, so concurrent refreshes replace the rows one after the other
+        stale = self.db.query(Calculation).filter(completed, ~fresh).order_by(Calculation.id).with_for_update().all()
+        
+        if stale:
+            stale_ids = [calc.id for calc in stale]
+            self.db.execute(
+                delete(BOQContribution)
+                .where(BOQContribution.calculation_id.in_(stale_ids))
+                .execution_options(synchronize_session=False)
+            )
+            rows = [
+                {
+                    "project_id": project_id,
+                    "calculation_id": calc.id,
+                    "material": material,
+                    "quantity": quantity,
+                    "calculation_revision": calc.revision
+                }
+                for calc in stale
+                for material, quantity in (self.calculation_contributions(calc) or {None: 0.0}).items()
+            ]
+            self.db.execute(insert(BOQContribution), rows)
+        
+        self.db.flush()
+        return {"removed": removed or 0, "refreshed": len(stale)}
+    
+    def aggregate_project_quantities(
+        self,
+        project_id: int,
+        wastage_factors: Dict[str, float] = None
+    ) -> Dict[str, float]:
+        """
+        Project material totals from stored contributions in one GROUP BY
+        """
+        totals = self.db.execute(
+            select(BOQContribution.material, func.sum(BOQContribution.quantity))
+            .where(BOQContribution.project_id == project_id, BOQContribution.material.isnot(None))
+            .group_by(BOQContribution.material)
+        ).all()
+        return self.finalize_quantities({material: total for material, total in totals}, wastage_factors)
+    
+    def project_contribution_count(self, project_id: int) -> int:
+        """Number of calculations currently contributing to the project BOQ"""
+        return self.db.execute(
+            select(func.count(func.distinct(BOQContribution.calculation_id)))
+            .where(BOQContribution.project_id == project_id, BOQContribution.material.isnot(None))
+        ).scalar() or 0
+    
     def generate_boq_items(
         self,
         quantities: Dict[str, float],
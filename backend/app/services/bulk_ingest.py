@@ -0,0 +1,436 @@
+"""
+Bulk Ingest - Whole archives of drawings and documents added in one request
+
+A ZIP archive is read as it arrives, entry by entry from the local file
+headers, so neither the archive nor any entry is held in memory and the
+central directory at the end is never needed. Each entry is inflated
+straight into a temporary file while being hashed.
+
+Once the archive has been read, one transaction:
+- creates the ProjectFolder rows for the archive's directories,
+- stores each distinct content once through the blob store,
+- inserts every ProjectFile and search document in executemany batches,
+- adjusts the workspace summary and writes a single audit entry.
+
+A failed archive leaves no rows behind.
+"""
+
+import asyncio
+import mimetypes
+import struct
+import zlib
+from pathlib import Path, PurePosixPath
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.audit import ActionType
+from app.models.file_management import FileCategory, FileType, ProjectFile, ProjectFolder
+from app.services.audit_logger import AuditLogger
+from app.services.blob_store import blob_store
+from app.services.file_search import file_search
+from app.services.file_uploads import UploadTooLarge, get_file_type, incoming_path, stream_to_file
+from app.services.workspace_summary import workspace_summary
+
+BULK_CHUNK_SIZE = 1000  # rows per executemany batch
+READ_SIZE = 256 * 1024
+
+_LOCAL_HEADER = struct.Struct("<4sHHHHHIIIHH")
+_LOCAL_SIGNATURE = b"PK\x03\x04"
+_END_SIGNATURES = (b"PK\x01\x02", b"PK\x05\x06", b"PK\x06\x06")  # central directory onwards
+_DESCRIPTOR_SIGNATURE = b"PK\x07\x08"
+_ZIP64_EXTRA = 0x0001
+
+FLAG_ENCRYPTED = 0x1
+FLAG_DESCRIPTOR = 0x8
+FLAG_UTF8 = 0x800
+STORED, DEFLATED = 0, 8
+
+IGNORED_PREFIXES = ("__MACOSX/",)
+
+
+class ArchiveError(ValueError):
+    """The upload is not a ZIP archive that can be read as a stream"""
+
+
+class _Buffered:
+    """Exact reads, and pushing back unused bytes, over an async byte stream"""
+
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self._chunks = chunks.__aiter__()
+        self._buffer = b""
+
+    async def _fill(self) -> bool:
+        try:
+            chunk = await self._chunks.__anext__()
+        except StopAsyncIteration:
+            return False
+        self._buffer += chunk
+        return True
+
+    async def read_exact(self, size: int) -> bytes:
+        while len(self._buffer) < size:
+            if not await self._fill():
+                raise ArchiveError("Archive ended unexpectedly")
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    async def read_some(self, limit: int) -> bytes:
+        if not self._buffer and not await self._fill():
+            raise ArchiveError("Archive ended unexpectedly")
+        data, self._buffer = self._buffer[:limit], self._buffer[limit:]
+        return data
+
+    def unread(self, data: bytes):
+        self._buffer = data + self._buffer
+
+    async def drain(self):
+        self._buffer = b""
+        async for _ in self._chunks:
+            pass
+
+
+class ZipEntry:
+    """One entry of a streamed archive; its data must be read before the next entry"""
+
+    def __init__(self, stream: _Buffered, name: str, flags: int, method: int,
+                 crc: int, compressed_size: Optional[int], size: Optional[int], zip64: bool):
+        self.name = name
+        self.is_dir = name.endswith("/")
+        self._stream = stream
+        self._flags = flags
+        self._method = method
+        self._crc = crc
+        self._compressed_size = compressed_size
+        self._size = size
+        self._zip64 = zip64
+        self.started = False
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        """Decompressed data, checked against the entry's CRC-32 and size"""
+        self.started = True
+        if self._method == STORED and self._compressed_size is None:
+            async for data in self._stored_until_descriptor():
+                yield data
+            return
+
+        crc = size = 0
+        inflater = zlib.decompressobj(-15) if self._method == DEFLATED else None
+        remaining = self._compressed_size
+
+        while True:
+            if inflater and inflater.unconsumed_tail:
+                # Output is bounded per call, so highly compressed input is inflated piecewise
+                raw = inflater.unconsumed_tail
+            elif remaining is not None:
+                if remaining == 0:
+                    break
+                raw = await self._stream.read_some(min(READ_SIZE, remaining))
+                remaining -= len(raw)
+            else:
+                # Deflate data ends itself; the rest belongs to what follows
+                raw = await self._stream.read_some(READ_SIZE)
+            try:
+                data = inflater.decompress(raw, READ_SIZE) if inflater else raw
+            except zlib.error:
+                raise ArchiveError(f"Entry {self.name} is corrupt")
+            if data:
+                crc = zlib.crc32(data, crc)
+                size += len(data)
+                yield data
+            if remaining is None and inflater.eof:
+                self._stream.unread(inflater.unused_data)
+                break
+        if inflater and not inflater.eof:
+            raise ArchiveError(f"Truncated entry {self.name}")
+
+        if self._flags & FLAG_DESCRIPTOR:
+            first = await self._stream.read_exact(4)
+            if first == _DESCRIPTOR_SIGNATURE:
+                first = await self._stream.read_exact(4)
+            (self._crc,) = struct.unpack("<I", first)
+            fmt = "<QQ" if self._zip64 else "<II"
+            _, self._size = struct.unpack(fmt, await self._stream.read_exact(struct.calcsize(fmt)))
+        if crc != self._crc or size != self._size:
+            raise ArchiveError(f"Entry {self.name} is corrupt")
+
+
+    async def _stored_until_descriptor(self) -> AsyncIterator[bytes]:
+        """
+        Uncompressed data of unknown length ends at the first data descriptor
+        whose CRC-32 and sizes match everything before it
+        """
+        descriptor = struct.Struct("<4sIQQ" if self._zip64 else "<4sIII")
+        crc = size = 0
+        pending = b""
+        while True:
+            pending += await self._stream.read_some(READ_SIZE)
+            position = pending.find(_DESCRIPTOR_SIGNATURE)
+            while position != -1 and position + descriptor.size <= len(pending):
+                _, stored_crc, compressed, uncompressed = descriptor.unpack_from(pending, position)
+                data = pending[:position]
+                if (stored_crc == zlib.crc32(data, crc) and compressed == uncompressed == size + len(data)):
+                    if data:
+                        yield data
+                    self._stream.unread(pending[position + descriptor.size:])
+                    return
+                position = pending.find(_DESCRIPTOR_SIGNATURE, position + 1)
+            # Hold back what could still be the start of the descriptor
+            keep = len(pending) - (descriptor.size - 1)
+            if position != -1:
+                keep = min(keep, position)
+            if keep > 0:
+                data, pending = pending[:keep], pending[keep:]
+                crc = zlib.crc32(data, crc)
+                size += len(data)
+                yield data
+
+
+def _zip64_sizes(extra: bytes) -> Optional[Tuple[int, int]]:
+    offset = 0
+    while offset + 4 <= len(extra):
+        header_id, length = struct.unpack_from("<HH", extra, offset)
+        if header_id == _ZIP64_EXTRA and length >= 16:
+            return struct.unpack_from("<QQ", extra, offset + 4)  # uncompressed, compressed
+        offset += 4 + length
+    return None
+
+
+async def iter_zip_entries(chunks: AsyncIterator[bytes]) -> AsyncIterator[ZipEntry]:
+    """Entries of a ZIP archive arriving as a stream, in archive order"""
+    stream = _Buffered(chunks)
+    while True:
+        signature = await stream.read_exact(4)
+        if signature in _END_SIGNATURES:
+            await stream.drain()
+            return
+        if signature != _LOCAL_SIGNATURE:
+            raise ArchiveError("Not a ZIP archive")
+        (_, _, flags, method, _, _, crc, compressed_size, size,
+         name_length, extra_length) = _LOCAL_HEADER.unpack(signature + await stream.read_exact(_LOCAL_HEADER.size - 4))
+        raw_name = await stream.read_exact(name_length)
+        extra = await stream.read_exact(extra_length)
+
+        name = raw_name.decode("utf-8" if flags & FLAG_UTF8 else "cp437")
+        if flags & FLAG_ENCRYPTED:
+            raise ArchiveError(f"Entry {name} is encrypted")
+        if method not in (STORED, DEFLATED):
+            raise ArchiveError(f"Entry {name} uses an unsupported compression method")
+        zip64 = 0xFFFFFFFF in (compressed_size, size)
+        if zip64:
+            sizes = _zip64_sizes(extra)
+            if sizes is None:
+                raise ArchiveError(f"Entry {name} has no ZIP64 sizes")
+            size, compressed_size = sizes
+        else:
+            zip64 = _zip64_sizes(extra) is not None
+
+        if flags & FLAG_DESCRIPTOR:
+            compressed_size = size = None  # taken from the data descriptor
+
+        entry = ZipEntry(stream, name, flags, method, crc, compressed_size, size, zip64)
+        yield entry
+        if not entry.started:
+            # Skip entries the caller did not read
+            async for _ in entry.chunks():
+                pass
+
+
+def _clean_path(name: str) -> Optional[PurePosixPath]:
+    """Archive path as relative folder parts and file name; None for entries to skip"""
+    if name.startswith(IGNORED_PREFIXES):
+        return None
+    parts = [part for part in name.replace("\\", "/").split("/") if part not in ("", ".")]
+    if not parts or ".." in parts:
+        return None
+    return PurePosixPath(*parts)
+
+
+class _StagedFile:
+    def __init__(self, path: PurePosixPath, temp_path: Path, content_hash: str, size: int):
+        self.path = path
+        self.temp_path = temp_path
+        self.content_hash = content_hash
+        self.size = size
+
+
+class BulkIngestService:
+    """Adds every file of an archive to a project workspace in one transaction"""
+
+    def __init__(self, db_session: Session):
+        self.db = db_session
+
+    async def ingest(
+        self,
+        project_id: int,
+        user_id: int,
+        chunks: AsyncIterator[bytes],
+        category: FileCategory,
+        folder_path: Optional[str] = None,
+        tags: Optional[str] = None,
+        archive_name: Optional[str] = None
+    ) -> Dict:
+        """Read the archive, then store it; returns a summary with the new file ids"""
+        base = _clean_path(folder_path) if folder_path else None
+        staged: List[_StagedFile] = []
+        directories = set()
+        budget = settings.MAX_CHUNKED_UPLOAD_SIZE
+        try:
+            async for entry in iter_zip_entries(chunks):
+                path = _clean_path(entry.name)
+                if path is None:
+                    continue
+                if entry.is_dir:
+                    directories.add(path)
+                    continue
+                if len(staged) >= settings.BULK_UPLOAD_MAX_FILES:
+                    raise UploadTooLarge(f"Archive holds more than {settings.BULK_UPLOAD_MAX_FILES} files")
+
+                temp_path = incoming_path()
+                try:
+                    size, hasher = await stream_to_file(entry.chunks(), temp_path, max_size=budget)
+                except BaseException:
+                    temp_path.unlink(missing_ok=True)
+                    raise
+                budget -= size
+                staged.append(_StagedFile(path, temp_path, hasher.hexdigest(), size))
+
+            return await asyncio.to_thread(
+                self._persist, project_id, user_id, staged, directories, base, category, tags, archive_name
+            )
+        finally:
+            for item in staged:
+                item.temp_path.unlink(missing_ok=True)
+
+    def _folders(self, project_id: int, user_id: int, paths: List[PurePosixPath]) -> int:
+        """Create missing ProjectFolders for paths and their parents; returns how many were created"""
+        wanted = set()
+        for path in paths:
+            wanted.update(path.parents[i] for i in range(len(path.parts) - 1))
+            wanted.add(path)
+        if not wanted:
+            return 0
+        existing = dict(self.db.execute(
+            select(ProjectFolder.folder_path, ProjectFolder.id)
+            .where(ProjectFolder.project_id == project_id, ProjectFolder.folder_path.in_([str(p) for p in wanted]))
+        ).all())
+
+        created = 0
+        # Parents before children, one batch per depth
+        for depth in sorted({len(path.parts) for path in wanted}):
+            level = sorted(str(p) for p in wanted if len(p.parts) == depth and str(p) not in existing)
+            if not level:
+                continue
+            rows = self.db.execute(
+                insert(ProjectFolder).returning(
+                    ProjectFolder.folder_path, ProjectFolder.id, sort_by_parameter_order=True
+                ),
+                [
+                    {
+                        "project_id": project_id,
+                        "folder_name": PurePosixPath(path).name,
+                        "folder_path": path,
+                        "parent_folder_id": existing.get(str(PurePosixPath(path).parent)),
+                        "created_by": user_id
+                    }
+                    for path in level
+                ]
+            ).all()
+            existing.update(dict(rows))
+            created += len(rows)
+        return created
+
+    def _persist(
+        self,
+        project_id: int,
+        user_id: int,
+        staged: List[_StagedFile],
+        directories: set,
+        base: Optional[PurePosixPath],
+        category: FileCategory,
+        tags: Optional[str],
+        archive_name: Optional[str]
+    ) -> Dict:
+        def folder_of(path: PurePosixPath) -> Optional[PurePosixPath]:
+            parent = path.parent
+            if base is not None:
+                parent = base / parent
+            return None if str(parent) == "." else parent
+
+        try:
+            folders = [folder_of(item.path) for item in staged]
+            folders_created = self._folders(
+                project_id, user_id,
+                [f for f in folders if f is not None] + [base / d if base else d for d in directories]
+            )
+
+            # Identical entries share one blob with one reference each
+            references: Dict[str, int] = {}
+            for item in staged:
+                references[item.content_hash] = references.get(item.content_hash, 0) + 1
+            locations = {}
+            for item in staged:
+                if item.content_hash not in locations:
+                    blob = blob_store.adopt(
+                        self.db, item.temp_path, item.content_hash, item.size,
+                        references=references[item.content_hash]
+                    )
+                    locations[item.content_hash] = blob.storage_path
+
+            rows = []
+            for item, folder in zip(staged, folders):
+                name = item.path.name
+                mime_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+                rows.append({
+                    "project_id": project_id,
+                    "file_name": f"{item.content_hash}{PurePosixPath(name).suffix}",
+                    "original_file_name": name,
+                    "file_path": locations[item.content_hash],
+                    "file_size": item.size,
+                    "content_hash": item.content_hash,
+                    "mime_type": mime_type,
+                    "file_type": get_file_type(mime_type, name),
+                    "file_category": category,
+                    "folder_path": f"{folder}/" if folder is not None else f"{category.value}/",
+                    "tags": tags,
+                    "uploaded_by": user_id
+                })
+
+            file_ids = []
+            for start in range(0, len(rows), BULK_CHUNK_SIZE):
+                batch = rows[start:start + BULK_CHUNK_SIZE]
+                file_ids.extend(self.db.execute(
+                    insert(ProjectFile).returning(ProjectFile.id, sort_by_parameter_order=True), batch
+                ).scalars())
+                file_search.index_rows(self.db, [{**row, "id": file_id} for row, file_id in zip(batch, file_ids[start:])])
+
+            total_size = sum(item.size for item in staged)
+            workspace_summary.files_added(self.db, project_id, {category: (len(rows), total_size)})
+
+            summary = {
+                "files_created": len(rows),
+                "folders_created": folders_created,
+                "total_size": total_size,
+                "duplicate_entries": len(staged) - len(locations)
+            }
+            AuditLogger(self.db).log_action(
+                user_id=user_id,
+                action_type=ActionType.CREATE,
+                entity_type="ProjectFile",
+                entity_code=archive_name,
+                action_description=f"Bulk upload: {len(rows)} files from {archive_name or 'archive'}",
+                new_values=summary,
+                commit=False
+            )
+            self.db.commit()
+        except BaseException:
+            self.db.rollback()
+            raise
+
+        summary["file_ids"] = file_ids
+        summary["pdf_file_ids"] = [
+            file_id for file_id, row in zip(file_ids, rows) if row["file_type"] == FileType.PDF
+        ]
+        return summary
@@ -0,0 +1,89 @@
+"""
+Bulk Persistence - Writes BOQ and cost-estimate headers together with all of
+their line items in a single transaction
+"""
+
+from typing import Dict, Iterable, List
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.material import BOQ, BOQItem
+from app.models.cost import CostEstimate, CostItem
+
+# Rows per executemany batch; keeps statement size and driver memory bounded
+# for infrastructure BOQs with tens of thousands of line items
+BULK_CHUNK_SIZE = 5000
+
+
+def _chunks(rows: List[Dict], size: int) -> Iterable[List[Dict]]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _insert_with_items(
+    db: Session,
+    header_model,
+    header: Dict,
+    item_model,
+    foreign_key: str,
+    items: List[Dict],
+    chunk_size: int
+) -> Dict:
+    """
+    Insert the header with RETURNING (so server defaults such as created_at come
+    back without a refresh query), then the items in chunked executemany batches,
+    and commit once. Nothing is left behind if any statement fails.
+    """
+    try:
+        row = db.execute(
+            insert(header_model).values(**header).returning(*header_model.__table__.c)
+        ).mappings().one()
+        header_id = row["id"]
+        for chunk in _chunks(items, chunk_size):
+            db.execute(
+                insert(item_model),
+                [{**item, foreign_key: header_id} for item in chunk]
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    result = dict(row)
+    result["items_count"] = len(items)
+    return result
+
+
+def persist_boq(
+    db: Session,
+    header: Dict,
+    items: List[Dict],
+    chunk_size: int = BULK_CHUNK_SIZE
+) -> Dict:
+    """
+    Persist a BOQ and its items atomically.
+
+    header: BOQ column values (without id)
+    items: BOQItem column values (without id / boq_id)
+    Returns the stored BOQ columns plus items_count.
+    """
+    return _insert_with_items(db, BOQ, header, BOQItem, "boq_id", items, chunk_size)
+
+
+def persist_cost_estimate(
+    db: Session,
+    header: Dict,
+    items: List[Dict],
+    chunk_size: int = BULK_CHUNK_SIZE
+) -> Dict:
+    """
+    Persist a cost estimate and its items atomically.
+
+    header: CostEstimate column values (without id)
+    items: CostItem column values (without id / cost_estimate_id)
+    Returns the stored estimate columns plus items_count.
+    """
+    return _insert_with_items(
+        db, CostEstimate, header, CostItem, "cost_estimate_id", items, chunk_size
+    )
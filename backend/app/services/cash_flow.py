@@ -0,0 +1,257 @@
+"""
+Cash Flow Engine - Time-phased cost, escalation and S-curves from the schedule
+
+Cost items are linked to schedule activities (CostItemActivity) and spent
+uniformly over each activity's planned dates. Any part of an item that is not
+linked is spread over the whole project span. The monthly phasing of every
+activity is cached on the estimate (phase_wise_costs) together with the dates
+it was derived from, so a schedule change only re-phases the activities whose
+dates moved.
+"""
+
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.advanced_features import ScheduleActivity
+from app.models.cost import CostEstimate, CostItem, CostItemActivity
+
+PROJECT_SPAN_KEY = "project"
+
+
+def _as_date(value) -> Optional[date]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.fromisoformat(str(value)).date()
+
+
+def monthly_fractions(start: date, end: date) -> Tuple[str, List[float]]:
+    """
+    Fraction of a uniformly spent amount falling in each calendar month from
+    start (inclusive) to end (exclusive). Returns (first month "YYYY-MM", fractions).
+    """
+    s = np.datetime64(start, "D")
+    e = np.datetime64(end, "D")
+    first = s.astype("datetime64[M]")
+    if e <= s:
+        return str(first), [1.0]
+
+    last = (e - np.timedelta64(1, "D")).astype("datetime64[M]")
+    bounds = np.arange(first, last + 2).astype("datetime64[D]")
+    bounds = np.clip(bounds, s, e)
+    days = np.diff(bounds).astype(float)
+    return str(first), (days / days.sum()).tolist()
+
+
+def _month_offset(month: str, origin: str) -> int:
+    return int((np.datetime64(month, "M") - np.datetime64(origin, "M")).astype(int))
+
+
+class CashFlowEngine:
+    """Schedule-linked cash flow for cost estimates"""
+
+    def __init__(self, db_session: Session):
+        self.db = db_session
+
+    def link_items(self, estimate_id: int, links: List[Dict]) -> Dict:
+        """
+        Link cost items to activities.
+        links: [{"item_code", "activity_code", "share"}]; existing links of the
+        listed items are replaced.
+        """
+        estimate = self._get_estimate(estimate_id)
+
+        item_ids = dict(self.db.execute(
+            select(CostItem.item_code, CostItem.id).where(CostItem.cost_estimate_id == estimate_id)
+        ).all())
+        activity_ids = dict(self.db.execute(
+            select(ScheduleActivity.activity_code, ScheduleActivity.id)
+            .where(ScheduleActivity.project_id == estimate.project_id)
+        ).all())
+
+        rows = []
+        shares: Dict[int, float] = {}
+        for link in links:
+            item_id = item_ids.get(link["item_code"])
+            if item_id is None:
+                raise ValueError(f"Cost item {link['item_code']} not found in estimate")
+            activity_id = activity_ids.get(link["activity_code"])
+            if activity_id is None:
+                raise ValueError(f"Activity {link['activity_code']} not found in project schedule")
+            share = link.get("share", 1.0)
+            shares[item_id] = shares.get(item_id, 0.0) + share
+            rows.append({
+                "cost_estimate_id": estimate_id,
+                "cost_item_id": item_id,
+                "activity_id": activity_id,
+                "share": share
+            })
+
+        over = [code for code, item_id in item_ids.items() if shares.get(item_id, 0.0) > 1.0 + 1e-9]
+        if over:
+            raise ValueError(f"Shares exceed 1.0 for items: {', '.join(sorted(over))}")
+
+        self.db.execute(
+            delete(CostItemActivity).where(
+                CostItemActivity.cost_estimate_id == estimate_id,
+                CostItemActivity.cost_item_id.in_(list(shares))
+            )
+        )
+        if rows:
+            self.db.execute(insert(CostItemActivity), rows)
+        self.db.commit()
+
+        return {"cost_estimate_id": estimate_id, "links": len(rows), "items_linked": len(shares)}
+
+    def _get_estimate(self, estimate_id: int) -> CostEstimate:
+        estimate = self.db.query(CostEstimate).filter(CostEstimate.id == estimate_id).first()
+        if not estimate:
+            raise ValueError("Cost estimate not found")
+        return estimate
+
+    def _activity_amounts(self, estimate_id: int) -> Tuple[Dict[int, float], float]:
+        """Linked amount per activity and the unlinked remainder, in two aggregates"""
+        linked = dict(self.db.execute(
+            select(CostItemActivity.activity_id, func.sum(CostItem.total_amount * CostItemActivity.share))
+            .join(CostItem, CostItem.id == CostItemActivity.cost_item_id)
+            .where(CostItemActivity.cost_estimate_id == estimate_id)
+            .group_by(CostItemActivity.activity_id)
+        ).all())
+        items_total = self.db.execute(
+            select(func.coalesce(func.sum(CostItem.total_amount), 0.0))
+            .where(CostItem.cost_estimate_id == estimate_id)
+        ).scalar()
+        return linked, max(items_total - sum(linked.values()), 0.0)
+
+    def _escalation_indices(
+        self,
+        months: List[str],
+        base_month: str,
+        annual_rate: float,
+        indices: Dict[str, float]
+    ) -> np.ndarray:
+        """
+        Price index per month relative to base_month. Published indices win;
+        other months compound the annual rate monthly.
+        """
+        offsets = np.array([_month_offset(m, base_month) for m in months], dtype=float)
+        factor = (1.0 + annual_rate / 12.0) ** np.maximum(offsets, 0.0)
+        if indices:
+            base_index = indices.get(base_month, 1.0)
+            for i, month in enumerate(months):
+                if month in indices:
+                    factor[i] = indices[month] / base_index
+        return factor
+
+    def phase_estimate(
+        self,
+        estimate_id: int,
+        escalation_indices: Dict[str, float] = None,
+        annual_escalation_rate: Optional[float] = None,
+        base_month: Optional[str] = None
+    ) -> Dict:
+        """
+        Monthly draws, escalation and S-curve for a cost estimate.
+
+        escalation_indices: {"YYYY-MM": index}, e.g. WPI values; base_month
+        (default: first month of the cash flow) is the price base of the estimate.
+        annual_escalation_rate: used for months without an index (default: the
+        estimate's escalation_percentage).
+        """
+        estimate = self._get_estimate(estimate_id)
+        activities = self.db.execute(
+            select(ScheduleActivity.id, ScheduleActivity.planned_start_date, ScheduleActivity.planned_end_date)
+            .where(ScheduleActivity.project_id == estimate.project_id)
+        ).all()
+        dated = {
+            activity_id: (_as_date(start), _as_date(end) or _as_date(start))
+            for activity_id, start, end in activities
+            if start is not None
+        }
+        if not dated:
+            raise ValueError("Project schedule has no dated activities")
+
+        linked, unlinked = self._activity_amounts(estimate_id)
+        spans = {str(activity_id): dated[activity_id] for activity_id in linked if activity_id in dated}
+        # Links to undated activities fall back to the project span
+        unlinked += sum(amount for activity_id, amount in linked.items() if activity_id not in dated)
+        amounts = {str(activity_id): linked[activity_id] for activity_id in linked if activity_id in dated}
+        if unlinked > 0:
+            spans[PROJECT_SPAN_KEY] = (
+                min(start for start, _ in dated.values()),
+                max(end for _, end in dated.values())
+            )
+            amounts[PROJECT_SPAN_KEY] = unlinked
+        if not amounts:
+            raise ValueError("Cost estimate has no cost items to phase")
+
+        # Re-phase only activities whose dates changed since the last run
+        previous = (estimate.phase_wise_costs or {}).get("phasing", {})
+        phasing = {}
+        rephased = 0
+        for key, (start, end) in spans.items():
+            cached = previous.get(key)
+            if cached and cached["start"] == start.isoformat() and cached["end"] == end.isoformat():
+                phasing[key] = cached
+                continue
+            first_month, fractions = monthly_fractions(start, end)
+            phasing[key] = {
+                "start": start.isoformat(),
+                "end": end.isoformat(),
+                "first_month": first_month,
+                "fractions": fractions
+            }
+            rephased += 1
+
+        origin = min(p["first_month"] for p in phasing.values())
+        horizon = max(_month_offset(p["first_month"], origin) + len(p["fractions"]) for p in phasing.values())
+        months = [str(np.datetime64(origin, "M") + i) for i in range(horizon)]
+
+        base_draws = np.zeros(horizon)
+        for key, p in phasing.items():
+            offset = _month_offset(p["first_month"], origin)
+            base_draws[offset:offset + len(p["fractions"])] += amounts[key] * np.asarray(p["fractions"])
+
+        if annual_escalation_rate is None:
+            annual_escalation_rate = estimate.escalation_percentage or 0.0
+        index = self._escalation_indices(months, base_month or origin, annual_escalation_rate, escalation_indices or {})
+        escalated_draws = base_draws * index
+
+        markup = (1.0 + (estimate.contingency_percentage or 0.0)) * (1.0 + (estimate.gst_percentage or 0.0))
+        total_draws = escalated_draws * markup
+        cumulative = np.cumsum(total_draws)
+        grand_total = cumulative[-1] if horizon else 0.0
+
+        result = {
+            "cost_estimate_id": estimate_id,
+            "months": months,
+            "monthly_base_draws": np.round(base_draws, 2).tolist(),
+            "escalation_index": np.round(index, 4).tolist(),
+            "monthly_escalated_draws": np.round(escalated_draws, 2).tolist(),
+            "monthly_total_draws": np.round(total_draws, 2).tolist(),
+            "cumulative_cost": np.round(cumulative, 2).tolist(),
+            "s_curve_percent": np.round(cumulative / grand_total * 100, 2).tolist() if grand_total else [],
+            "base_cost_phased": round(float(base_draws.sum()), 2),
+            "escalation_amount": round(float((escalated_draws - base_draws).sum()), 2),
+            "total_cost": round(float(grand_total), 2),
+            "peak_month": months[int(np.argmax(total_draws))],
+            "activities_rephased": rephased,
+            "activities_reused": len(phasing) - rephased
+        }
+
+        estimate.phase_wise_costs = {
+            "phasing": phasing,
+            "months": months,
+            "monthly_total_draws": result["monthly_total_draws"],
+            "escalation_amount": result["escalation_amount"]
+        }
+        self.db.commit()
+
+        return result
@@ -3,14 +3,61 @@ Cost Estimation Service
 """
 
 from typing import Dict, List, Optional
-from app.models.material import BOQItem
-from app.models.cost import ScheduleOfRates
+
+import numpy as np
+
+from app.services.rate_book import RateBook, rate_books
+
+# Fallback rates by item-code prefix when the SOR has no entry
+DEFAULT_RATES = {
+    "CONC": 5000,  # Concrete per m³
+    "STL": 60,    # Steel per kg
+    "CEM": 8,     # Cement per kg
+    "SAND": 800,  # Sand per m³
+    "AGG": 1000,  # Aggregate per m³
+    "EXC": 200    # Excavation per m³
+}
 
 class CostEstimator:
     """Cost Estimation Service"""
     
-    def __init__(self, db_session):
+    def __init__(self, db_session, sor_authority: Optional[str] = None, sor_version: Optional[str] = None):
         self.db = db_session
+        self.sor_authority = sor_authority
+        self.sor_version = sor_version
+        self._rate_book = None
+    
+    @property
+    def rate_book(self) -> RateBook:
+        """SOR edition used for pricing, loaded once from the shared cache"""
+        if self._rate_book is None:
+            self._rate_book = rate_books.get(self.db, self.sor_authority, self.sor_version)
+        return self._rate_book
+    
+    def resolve_rate(
+        self,
+        item_code: str,
+        rate_source: str = "SOR"
+    ) -> Dict:
+        """
+        Unit rate with its provenance (rate_source, sor_item_code)
+        """
+        if rate_source == "SOR":
+            entry = self.rate_book.lookup(item_code)
+            if entry:
+                return {
+                    "unit_rate": entry["unit_rate"],
+                    "rate_source": "SOR",
+                    "sor_item_code": entry["sor_item_code"]
+                }
+        
+        # Extract prefix from item code
+        prefix = item_code.split("-")[0]
+        return {
+            "unit_rate": DEFAULT_RATES.get(prefix, 100),
+            "rate_source": "Default",
+            "sor_item_code": None
+        }
     
     def get_unit_rate(
         self,
@@ -20,29 +67,110 @@ class CostEstimator:
         """
         Get unit rate from SOR or market rates
         """
-        if rate_source == "SOR":
-            # Query SOR
-            sor_item = self.db.query(ScheduleOfRates).filter(
-                ScheduleOfRates.item_code == item_code,
-                ScheduleOfRates.is_active == True
-            ).first()
-            
-            if sor_item:
-                return sor_item.unit_rate
+        return self.resolve_rate(item_code, rate_source)["unit_rate"]
+    
+    def price_items(
+        self,
+        items: List[Dict],
+        rate_source: str = "SOR"
+    ) -> List[Dict]:
+        """
+        Cost items for BOQ line items (item_code, item_description, category,
+        quantity, unit). One in-memory lookup per item, no queries once the
+        rate book is cached.
+        """
+        priced = []
+        for item in items:
+            rate = self.resolve_rate(item["item_code"], rate_source)
+            priced.append({
+                "item_code": item["item_code"],
+                "item_description": item["item_description"],
+                "category": item["category"],
+                "quantity": item["quantity"],
+                "unit": item["unit"],
+                "unit_rate": rate["unit_rate"],
+                "total_amount": item["quantity"] * rate["unit_rate"],
+                "rate_source": rate["rate_source"],
+                "sor_item_code": rate["sor_item_code"]
+            })
+        return priced
+    
+    def scenario_matrix(
+        self,
+        items: List[Dict],
+        contingency_percentages: List[float],
+        escalation_percentages: List[float],
+        gst_percentages: List[float],
+        rate_book_choices: List[Dict] = None
+    ) -> Dict:
+        """
+        Total cost over every (rate book × contingency × escalation × GST)
+        combination, following the create_cost_estimate formula:
+        total = base · (1 + contingency + escalation) · (1 + GST)
         
-        # Default rates (fallback)
-        default_rates = {
-            "CONC": 5000,  # Concrete per m³
-            "STL": 60,    # Steel per kg
-            "CEM": 8,     # Cement per kg
-            "SAND": 800,  # Sand per m³
-            "AGG": 1000,  # Aggregate per m³
-            "EXC": 200    # Excavation per m³
-        }
+        Quantities are read into one array; each rate book contributes a rate
+        vector, so base costs are a single matrix-vector product and the
+        remaining axes an outer product. Nothing is persisted.
         
-        # Extract prefix from item code
-        prefix = item_code.split("-")[0]
-        return default_rates.get(prefix, 100)
+        rate_book_choices: [{"sor_authority", "sor_version"}], default the latest SOR
+        """
+        if not rate_book_choices:
+            rate_book_choices = [{"sor_authority": self.sor_authority, "sor_version": self.sor_version}]
+        if not (contingency_percentages and escalation_percentages and gst_percentages):
+            raise ValueError("Each scenario axis needs at least one value")
+        
+        quantities = np.array([item["quantity"] for item in items], dtype=float)
+        codes = [item["item_code"] for item in items]
+        
+        books = []
+        rates = np.empty((len(rate_book_choices), len(items)))
+        for b, choice in enumerate(rate_book_choices):
+            estimator = CostEstimator(self.db, choice.get("sor_authority"), choice.get("sor_version"))
+            rates[b] = [estimator.resolve_rate(code)["unit_rate"] for code in codes]
+            books.append({
+                "sor_authority": estimator.rate_book.authority,
+                "sor_version": estimator.rate_book.version
+            })
+        
+        base = rates @ quantities  # (books,)
+        contingency = np.asarray(contingency_percentages, dtype=float)
+        escalation = np.asarray(escalation_percentages, dtype=float)
+        gst = np.asarray(gst_percentages, dtype=float)
+        
+        markup = 1.0 + contingency[:, None] + escalation[None, :]  # (c, e)
+        total = (
+            base[:, None, None, None] *
+            markup[None, :, :, None] *
+            (1.0 + gst)[None, None, None, :]
+        )  # (books, c, e, g)
+        
+        cheapest = np.unravel_index(np.argmin(total), total.shape)
+        dearest = np.unravel_index(np.argmax(total), total.shape)
+        
+        def scenario(index):
+            b, c, e, g = (int(i) for i in index)
+            return {
+                **books[b],
+                "contingency_percentage": float(contingency[c]),
+                "escalation_percentage": float(escalation[e]),
+                "gst_percentage": float(gst[g]),
+                "total_cost": round(float(total[b, c, e, g]), 2)
+            }
+        
+        return {
+            "axes": {
+                "rate_books": books,
+                "contingency_percentages": contingency.tolist(),
+                "escalation_percentages": escalation.tolist(),
+                "gst_percentages": gst.tolist()
+            },
+            "item_count": len(items),
+            "base_costs": np.round(base, 2).tolist(),
+            "total_costs": np.round(total, 2).tolist(),
+            "scenario_count": int(total.size),
+            "cheapest": scenario(cheapest),
+            "most_expensive": scenario(dearest)
+        }
     
     def calculate_cost_with_escalation(
         self,
@@ -14,6 +14,9 @@ import io
 class DocumentGenerator:
     """Document Generation Service"""
     
+    # Bump whenever a template's layout or content changes; invalidates cached renders
+    TEMPLATE_VERSION = "1"
+    
     def generate_calculation_sheet(
         self,
         calculation_data: Dict,
@@ -63,10 +66,10 @@ class DocumentGenerator:
         story.append(Spacer(1, 0.2*inch))
         
         # Compliance Status
-        compliance_status = calculation_data.get('compliance_status', 'N/A')
+        compliance_status = calculation_data.get('compliance_status') or 'N/A'
         status_color = colors.green if compliance_status == 'compliant' else colors.red
         story.append(Paragraph(
-            f"<b>Compliance Status:</b> <font color='{status_color.hex}'> {compliance_status.upper()}</font>",
+            f"<b>Compliance Status:</b> <font color='#{status_color.hexval()[2:]}'> {compliance_status.upper()}</font>",
             styles['Normal']
         ))
         
@@ -0,0 +1,84 @@
+"""
+File Access - Download permission checks with a short-lived per-(user, file) cache
+
+Media players and PDF viewers issue many range requests for one file; the
+decision from the first request is reused for ACCESS_CACHE_TTL seconds (or
+until the share expires) instead of querying FileShare each time. Sharing or
+deleting a file invalidates its entries in this process; other workers pick
+up the change when their entries expire.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.file_management import FileShare, ProjectFile
+
+ACCESS_CACHE_TTL = 60  # seconds
+ACCESS_CACHE_SIZE = 10000
+
+
+class FileAccessCache:
+    """LRU of download decisions keyed by (user id, file id)"""
+
+    def __init__(self, ttl: float = ACCESS_CACHE_TTL, max_entries: int = ACCESS_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[int, int], Tuple[bool, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evaluate(self, db: Session, file_record: ProjectFile, user_id: int) -> Tuple[bool, float]:
+        """(allowed, monotonic deadline for reusing the decision)"""
+        deadline = time.monotonic() + self.ttl
+        if file_record.is_public or file_record.uploaded_by == user_id:
+            return True, deadline
+
+        share = db.query(FileShare).filter(
+            FileShare.file_id == file_record.id,
+            FileShare.shared_with_user_id == user_id
+        ).first()
+        if not share or not share.can_download:
+            return False, deadline
+
+        if share.expires_at is not None:
+            expires_at = share.expires_at
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            remaining = (expires_at - datetime.now(timezone.utc)).total_seconds()
+            if remaining <= 0:
+                return False, deadline
+            deadline = min(deadline, time.monotonic() + remaining)
+        return True, deadline
+
+    def can_download(self, db: Session, file_record: ProjectFile, user_id: int) -> bool:
+        key = (user_id, file_record.id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                return entry[0]
+
+        allowed, deadline = self._evaluate(db, file_record, user_id)
+        with self._lock:
+            self._entries[key] = (allowed, deadline)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return allowed
+
+    def invalidate(self, file_id: int):
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == file_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+file_access = FileAccessCache()
@@ -0,0 +1,277 @@
+"""
+File Search - Ranked full-text search over project files
+
+Every ProjectFile has a FileSearchDocument holding its name, tags,
+description and, for PDFs, extracted text. Matching is done by the
+database's own inverted index:
+
+    PostgreSQL  GIN index over a weighted tsvector (name > tags >
+                description > text), ranked with ts_rank_cd
+    SQLite      FTS5 table in the database file, kept in sync by triggers,
+                ranked with bm25 using the same weights
+    other       substring matching on name, tags and description, unranked
+
+Every query word must match, as a prefix. PDF text is extracted by a
+background task after the upload response, so a new file can be found by
+name straight away and by content shortly after.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, exists, func, insert, literal_column, or_, select, text
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.models.file_management import (
+    SEARCH_VECTOR_SQL, FileSearchDocument, FileType, ProjectFile, TextExtractionStatus
+)
+from app.services.pdf_text import extract_pdf_text
+
+MAX_QUERY_TERMS = 16
+BACKFILL_BATCH_SIZE = 1000
+EXTRACT_BATCH_SIZE = 100
+BM25_WEIGHTS = (10.0, 5.0, 2.0, 1.0)  # title, tags, description, content_text
+
+_TERM = re.compile(r"[^\W_]+")  # letters and digits, split like the indexed text
+
+
+def search_terms(query: str) -> List[str]:
+    """Lower-cased words of a query; punctuation never reaches the index syntax"""
+    return _TERM.findall(query.lower())[:MAX_QUERY_TERMS]
+
+
+def _document_vector():
+    # Same expression as the GIN index, so PostgreSQL can use it
+    return literal_column(f"({SEARCH_VECTOR_SQL})")
+
+
+def _latest_file():
+    return exists().where(ProjectFile.id == FileSearchDocument.file_id, ProjectFile.is_latest == True)
+
+
+class FileSearchIndex:
+    """Maintains search documents and runs ranked queries"""
+
+    # Indexing
+
+    def index_file(self, db: Session, file_record: ProjectFile):
+        """Create or refresh the search document of a flushed file; the caller commits"""
+        document = db.get(FileSearchDocument, file_record.id)
+        if document is None:
+            document = FileSearchDocument(
+                file_id=file_record.id,
+                project_id=file_record.project_id,
+                extraction_status=(
+                    TextExtractionStatus.PENDING if file_record.file_type == FileType.PDF
+                    else TextExtractionStatus.SKIPPED
+                )
+            )
+            db.add(document)
+        document.title = file_record.original_file_name
+        document.tags = file_record.tags
+        document.description = file_record.description
+
+    def index_rows(self, db: Session, files: List[Dict]):
+        """Search documents for bulk-inserted files given as ProjectFile column dicts with id"""
+        if not files:
+            return
+        db.execute(insert(FileSearchDocument), [
+            {
+                "file_id": f["id"],
+                "project_id": f["project_id"],
+                "title": f["original_file_name"],
+                "tags": f.get("tags"),
+                "description": f.get("description"),
+                "extraction_status": (
+                    TextExtractionStatus.PENDING if f["file_type"] == FileType.PDF
+                    else TextExtractionStatus.SKIPPED
+                )
+            }
+            for f in files
+        ])
+
+    def remove(self, db: Session, file_id: int):
+        """Drop a file's search document; the caller commits with the file delete"""
+        db.execute(delete(FileSearchDocument).where(FileSearchDocument.file_id == file_id))
+
+    def backfill(self, db: Session, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+        """Create search documents for files stored before search indexing"""
+        created = 0
+        while True:
+            rows = db.execute(
+                select(
+                    ProjectFile.id, ProjectFile.project_id, ProjectFile.original_file_name,
+                    ProjectFile.tags, ProjectFile.description, ProjectFile.file_type
+                )
+                .where(~exists().where(FileSearchDocument.file_id == ProjectFile.id))
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                return created
+            db.execute(insert(FileSearchDocument), [
+                {
+                    "file_id": file_id,
+                    "project_id": project_id,
+                    "title": name,
+                    "tags": tags,
+                    "description": description,
+                    "extraction_status": (
+                        TextExtractionStatus.PENDING if file_type == FileType.PDF
+                        else TextExtractionStatus.SKIPPED
+                    )
+                }
+                for file_id, project_id, name, tags, description, file_type in rows
+            ])
+            db.commit()
+            created += len(rows)
+
+    def extract_pending(
+        self,
+        file_ids: Optional[Iterable[int]] = None,
+        limit: int = EXTRACT_BATCH_SIZE,
+        session_factory=SessionLocal
+    ) -> Dict:
+        """
+        Extract and index the text of pending PDFs. Runs outside the request
+        in its own session, committing after each file.
+        """
+        from app.services.file_versions import FileVersionService
+
+        db = session_factory()
+        try:
+            versions = FileVersionService(db)
+            query = db.query(FileSearchDocument, ProjectFile).join(
+                ProjectFile, ProjectFile.id == FileSearchDocument.file_id
+            ).filter(FileSearchDocument.extraction_status == TextExtractionStatus.PENDING)
+            if file_ids is not None:
+                query = query.filter(FileSearchDocument.file_id.in_(list(file_ids)))
+
+            extracted = failed = 0
+            for document, file_record in query.limit(limit).all():
+                try:
+                    # Versions stored as deltas are rebuilt first
+                    with versions.open_content(file_record) as f:
+                        document.content_text = extract_pdf_text(f)
+                    document.extraction_status = TextExtractionStatus.DONE
+                    extracted += 1
+                except (OSError, ValueError):
+                    document.extraction_status = TextExtractionStatus.FAILED
+                    failed += 1
+                db.commit()
+            return {"extracted": extracted, "failed": failed}
+        finally:
+            db.close()
+
+    # Queries
+
+    @staticmethod
+    def _engine(db: Session) -> str:
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            return "postgresql"
+        if dialect == "sqlite" and db.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'file_search_fts'")
+        ).first():
+            return "sqlite"
+        return "like"
+
+    def search(
+        self,
+        db: Session,
+        project_id: int,
+        query: str,
+        skip: int = 0,
+        limit: int = 20
+    ) -> List[Tuple[int, float]]:
+        """(file id, score) of the project's latest files matching query, best first"""
+        terms = search_terms(query)
+        if not terms:
+            return []
+        engine = self._engine(db)
+
+        if engine == "postgresql":
+            vector = _document_vector()
+            tsquery = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+            rank = func.ts_rank_cd(vector, tsquery)
+            rows = db.execute(
+                select(FileSearchDocument.file_id, rank)
+                .where(
+                    FileSearchDocument.project_id == project_id,
+                    vector.op("@@")(tsquery),
+                    _latest_file()
+                )
+                .order_by(rank.desc(), FileSearchDocument.file_id.desc())
+                .offset(skip)
+                .limit(limit)
+            ).all()
+            return [(file_id, float(score)) for file_id, score in rows]
+
+        if engine == "sqlite":
+            weights = ", ".join(str(weight) for weight in BM25_WEIGHTS)
+            rows = db.execute(
+                text(
+                    f"SELECT d.file_id, bm25(file_search_fts, {weights}) AS rank "
+                    "FROM file_search_fts JOIN file_search_documents d ON d.file_id = file_search_fts.rowid "
+                    "JOIN project_files f ON f.id = d.file_id "
+                    "WHERE file_search_fts MATCH :match AND d.project_id = :project_id AND f.is_latest = 1 "
+                    "ORDER BY rank, d.file_id DESC LIMIT :limit OFFSET :skip"
+                ),
+                {
+                    "match": " ".join(f'"{term}"*' for term in terms),
+                    "project_id": project_id,
+                    "limit": limit,
+                    "skip": skip
+                }
+            ).all()
+            # bm25 is lower for better matches
+            return [(file_id, -float(score)) for file_id, score in rows]
+
+        rows = db.execute(
+            select(ProjectFile.id)
+            .where(ProjectFile.project_id == project_id, ProjectFile.is_latest == True, *self._like(terms))
+            .order_by(ProjectFile.uploaded_at.desc(), ProjectFile.id.desc())
+            .offset(skip)
+            .limit(limit)
+        ).all()
+        return [(file_id, 0.0) for (file_id,) in rows]
+
+    @staticmethod
+    def _like(terms: List[str]):
+        return [
+            or_(
+                ProjectFile.original_file_name.ilike(f"%{term}%"),
+                ProjectFile.description.ilike(f"%{term}%"),
+                ProjectFile.tags.ilike(f"%{term}%")
+            )
+            for term in terms
+        ]
+
+    def match_condition(self, db: Session, project_id: int, query: str):
+        """Unranked filter on ProjectFile for composing with other list filters"""
+        terms = search_terms(query)
+        if not terms:
+            return ProjectFile.id.is_(None)
+        engine = self._engine(db)
+
+        if engine == "postgresql":
+            vector = _document_vector()
+            tsquery = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+            return ProjectFile.id.in_(
+                select(FileSearchDocument.file_id)
+                .where(FileSearchDocument.project_id == project_id, vector.op("@@")(tsquery))
+            )
+
+        if engine == "sqlite":
+            return ProjectFile.id.in_(
+                select(literal_column("rowid"))
+                .select_from(text("file_search_fts"))
+                .where(text("file_search_fts MATCH :match").bindparams(
+                    match=" ".join(f'"{term}"*' for term in terms)
+                ))
+            )
+
+        return and_(*self._like(terms))
+
+
+file_search = FileSearchIndex()
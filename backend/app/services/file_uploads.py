@@ -0,0 +1,487 @@
+"""
+File Uploads - Non-blocking file writes and resumable chunked uploads
+
+Bytes are written with aiofiles so large uploads do not stall the event loop,
+and SHA-256 is computed while streaming. Chunked uploads follow an
+init / put part / complete protocol: parts are written in order at the
+session's received offset, a retried part that starts before it is
+acknowledged without rewriting, and the remains of an interrupted part are
+overwritten by the next attempt. Parts of one upload are serialised by a
+per-upload lock in this process and, across workers, by claiming the
+session's offset in a short transaction: the bytes stream in with no
+transaction open, and received_bytes is then advanced by a conditional
+UPDATE that only the claim holder can make. The running hash lives in
+memory; a session resumed on another worker (or after a restart) re-hashes
+the stored prefix once. Database work runs in a thread so it does not block
+the event loop.
+"""
+
+import asyncio
+import hashlib
+import os
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+import aiofiles
+import aiofiles.os
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.file_management import ProjectFile, FileCategory, FileType, UploadSession, UploadStatus
+from app.services.blob_store import blob_store
+from app.services.file_search import file_search
+from app.services.workspace_summary import workspace_summary
+
+READ_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+# upload_id -> (sha256 of the first n bytes, n)
+_hashers: Dict[str, Tuple] = {}
+
+# upload_id -> [lock, holders and waiters]
+_locks: Dict[str, list] = {}
+
+
+@asynccontextmanager
+async def _upload_lock(upload_id: str):
+    """Serialise part writes, completion and abort of one upload in this process"""
+    entry = _locks.setdefault(upload_id, [asyncio.Lock(), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if not entry[1]:
+            _locks.pop(upload_id, None)
+
+
+def get_file_type(mime_type: str, file_name: str) -> FileType:
+    """Determine file type from mime type and extension"""
+    if mime_type.startswith("image/"):
+        return FileType.IMAGE
+    elif mime_type == "application/pdf":
+        return FileType.PDF
+    elif mime_type in ["application/msword", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"]:
+        return FileType.DOCUMENT
+    elif mime_type in ["application/vnd.ms-excel", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"]:
+        return FileType.SPREADSHEET
+    elif mime_type in ["video/mp4", "video/avi"]:
+        return FileType.VIDEO
+    elif file_name.endswith((".dwg", ".dxf")):
+        return FileType.CAD
+    elif mime_type in ["application/zip", "application/x-rar-compressed"]:
+        return FileType.ARCHIVE
+    else:
+        return FileType.OTHER
+
+
+class UploadTooLarge(ValueError):
+    """Upload exceeds the configured size limit"""
+
+
+def upload_dir() -> Path:
+    return Path(settings.UPLOAD_DIR)
+
+
+def incoming_path(name: Optional[str] = None) -> Path:
+    """Temporary path for bytes being received, before they are adopted by the blob store"""
+    directory = upload_dir() / ".incoming"
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory / f"{name or uuid.uuid4().hex}.part"
+
+
+async def stream_to_file(
+    chunks: AsyncIterator[bytes],
+    path: Path,
+    max_size: Optional[int] = None,
+    hasher=None,
+    mode: str = "wb",
+    offset: int = 0
+) -> Tuple:
+    """
+    Write an async byte stream to path, starting at offset. Returns (bytes
+    written, hasher). Raises UploadTooLarge once more than max_size bytes arrive.
+    """
+    hasher = hasher or hashlib.sha256()
+    written = 0
+    async with aiofiles.open(path, mode) as out:
+        if offset:
+            await out.seek(offset)
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            written += len(chunk)
+            if max_size is not None and written > max_size:
+                raise UploadTooLarge(f"Upload exceeds {max_size} bytes")
+            hasher.update(chunk)
+            await out.write(chunk)
+    return written, hasher
+
+
+async def iter_upload_file(upload, chunk_size: int = READ_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Async chunks of a Starlette UploadFile"""
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def _hash_prefix(path: Path, length: int):
+    hasher = hashlib.sha256()
+    remaining = length
+    async with aiofiles.open(path, "rb") as f:
+        while remaining > 0:
+            chunk = await f.read(min(READ_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            hasher.update(chunk)
+            remaining -= len(chunk)
+    return hasher
+
+
+class ChunkedUploadService:
+    """Resumable chunked uploads into a project workspace"""
+
+    def __init__(self, db_session: Session):
+        self.db = db_session
+
+    def init(
+        self,
+        project_id: int,
+        user_id: int,
+        file_name: str,
+        total_size: int,
+        category: FileCategory,
+        mime_type: Optional[str] = None,
+        folder_path: Optional[str] = None,
+        description: Optional[str] = None,
+        tags: Optional[str] = None,
+        parent_file_id: Optional[int] = None
+    ) -> UploadSession:
+        if total_size < 0:
+            raise ValueError("File size must not be negative")
+        if total_size > settings.MAX_CHUNKED_UPLOAD_SIZE:
+            raise UploadTooLarge(f"Upload exceeds {settings.MAX_CHUNKED_UPLOAD_SIZE} bytes")
+
+        upload_id = uuid.uuid4().hex
+        temp_path = incoming_path(upload_id)
+        temp_path.touch()
+
+        session = UploadSession(
+            upload_id=upload_id,
+            project_id=project_id,
+            created_by=user_id,
+            original_file_name=file_name,
+            mime_type=mime_type or "application/octet-stream",
+            file_category=category,
+            folder_path=folder_path,
+            description=description,
+            tags=tags,
+            parent_file_id=parent_file_id,
+            total_size=total_size,
+            part_size=settings.UPLOAD_PART_SIZE,
+            received_bytes=0,
+            temp_path=str(temp_path),
+            status=UploadStatus.UPLOADING,
+            expires_at=datetime.now(timezone.utc) + timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS)
+        )
+        self.db.add(session)
+        self.db.commit()
+        self.db.refresh(session)
+        _hashers[upload_id] = (hashlib.sha256(), 0)
+        return session
+
+    def get(self, upload_id: str, user_id: int) -> UploadSession:
+        session = self.db.query(UploadSession).filter(UploadSession.upload_id == upload_id).first()
+        if not session or session.created_by != user_id:
+            raise LookupError("Upload session not found")
+        return session
+
+    def _require_active(self, session: UploadSession):
+        if session.status != UploadStatus.UPLOADING:
+            raise ValueError(f"Upload session is {session.status.value}")
+        expires_at = session.expires_at
+        if expires_at is not None:
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            if expires_at < datetime.now(timezone.utc):
+                raise ValueError("Upload session has expired")
+
+    async def _hasher_for(self, session: UploadSession):
+        hasher, hashed = _hashers.get(session.upload_id, (None, -1))
+        if hashed != session.received_bytes:
+            hasher = await _hash_prefix(Path(session.temp_path), session.received_bytes)
+        return hasher
+
+    async def _lock_row(self, session: UploadSession):
+        """Reload the session under a row lock held until the next commit or rollback"""
+        await asyncio.to_thread(self.db.refresh, session, with_for_update=True)
+
+    def _claim_part(self, session: UploadSession, offset: int, token: str) -> Optional[Tuple[Path, int]]:
+        """
+        Claim the part at offset in a short transaction. Returns the temp path
+        and total size to write with, or None for a retried part already stored.
+        """
+        try:
+            self.db.refresh(session)
+            self._require_active(session)
+            if offset > session.received_bytes:
+                raise ValueError(f"Expected part at offset {session.received_bytes}, got {offset}")
+            if offset == session.received_bytes:
+                now = datetime.now(timezone.utc)
+                claimed = self.db.execute(
+                    update(UploadSession)
+                    .where(
+                        UploadSession.id == session.id,
+                        UploadSession.status == UploadStatus.UPLOADING,
+                        UploadSession.received_bytes == offset,
+                        or_(
+                            UploadSession.part_token.is_(None),
+                            UploadSession.part_started_at < now - timedelta(seconds=settings.UPLOAD_PART_TIMEOUT_SECONDS)
+                        )
+                    )
+                    .values(part_token=token, part_started_at=now)
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                if not claimed:
+                    self.db.refresh(session)
+                    if offset == session.received_bytes:
+                        raise ValueError("Another part of this upload is in progress")
+            target = (Path(session.temp_path), session.total_size) if offset == session.received_bytes else None
+            self.db.commit()
+            return target
+        except BaseException:
+            self.db.rollback()
+            raise
+
+    def _finish_part(self, session: UploadSession, token: str, received_bytes: Optional[int]):
+        """Store the new offset (or just release the claim) if the claim is still ours"""
+        values = {"part_token": None, "part_started_at": None}
+        if received_bytes is not None:
+            values["received_bytes"] = received_bytes
+        try:
+            finished = self.db.execute(
+                update(UploadSession)
+                .where(
+                    UploadSession.id == session.id,
+                    UploadSession.part_token == token,
+                    UploadSession.status == UploadStatus.UPLOADING
+                )
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            self.db.commit()
+        except BaseException:
+            self.db.rollback()
+            raise
+        if received_bytes is not None and not finished:
+            raise ValueError("Upload part timed out or the upload was aborted; resume from received_bytes")
+
+    async def put_part(self, session: UploadSession, offset: int, chunks: AsyncIterator[bytes]) -> UploadSession:
+        """
+        Write a part starting at offset. Parts must arrive in order; a part
+        starting before the stored offset is a retry and is ignored, and the
+        returned received_bytes tells the client where to resume. No database
+        transaction is open while the part streams in.
+        """
+        upload_id = session.upload_id
+        async with _upload_lock(upload_id):
+            token = uuid.uuid4().hex
+            target = await asyncio.to_thread(self._claim_part, session, offset, token)
+            if target is None:
+                # Drain a retried part that is already stored
+                async for _ in chunks:
+                    pass
+                await asyncio.to_thread(self.db.refresh, session)
+                await asyncio.to_thread(self.db.commit)
+                return session
+
+            temp_path, total_size = target
+            try:
+                hasher, hashed = _hashers.pop(upload_id, (None, -1))
+                if hashed != offset:
+                    hasher = await _hash_prefix(temp_path, offset)
+                # Written in place, so leftovers of an interrupted part are overwritten
+                written, hasher = await stream_to_file(
+                    chunks, temp_path, max_size=total_size - offset,
+                    hasher=hasher, mode="r+b", offset=offset
+                )
+            except BaseException:
+                await asyncio.to_thread(self._finish_part, session, token, None)
+                raise
+            await asyncio.to_thread(self._finish_part, session, token, offset + written)
+            _hashers[upload_id] = (hasher, offset + written)
+            await asyncio.to_thread(self.db.refresh, session)
+            await asyncio.to_thread(self.db.commit)
+            return session
+
+    def _create_file(self, session: UploadSession, content_hash: str) -> ProjectFile:
+        if session.parent_file_id:
+            return self._create_version(session, content_hash)
+        blob = blob_store.adopt(self.db, Path(session.temp_path), content_hash, session.total_size)
+        db_file = ProjectFile(
+            project_id=session.project_id,
+            file_name=f"{content_hash}{Path(session.original_file_name).suffix}",
+            original_file_name=session.original_file_name,
+            file_path=blob.storage_path,
+            file_size=session.total_size,
+            content_hash=content_hash,
+            mime_type=session.mime_type,
+            file_type=get_file_type(session.mime_type, session.original_file_name),
+            file_category=session.file_category,
+            folder_path=session.folder_path or f"{session.file_category.value}/",
+            description=session.description,
+            tags=session.tags,
+            uploaded_by=session.created_by
+        )
+        self.db.add(db_file)
+        self.db.flush()
+        workspace_summary.file_added(self.db, db_file)
+        file_search.index_file(self.db, db_file)
+
+        session.status = UploadStatus.COMPLETED
+        session.content_hash = content_hash
+        session.file_id = db_file.id
+        self.db.commit()
+        self.db.refresh(db_file)
+        return db_file
+
+    def _create_version(self, session: UploadSession, content_hash: str) -> ProjectFile:
+        from app.services.file_versions import FileVersionService
+
+        def mark_completed(db_file: ProjectFile):
+            session.status = UploadStatus.COMPLETED
+            session.content_hash = content_hash
+            session.file_id = db_file.id
+
+        return FileVersionService(self.db).add_version(
+            session.parent_file_id,
+            Path(session.temp_path),
+            content_hash,
+            session.total_size,
+            session.created_by,
+            file_name=session.original_file_name,
+            mime_type=session.mime_type,
+            description=session.description,
+            tags=session.tags,
+            on_created=mark_completed
+        )
+
+    async def complete(self, session: UploadSession, expected_sha256: Optional[str] = None) -> ProjectFile:
+        """Verify the upload and add it to the project workspace via the blob store"""
+        async with _upload_lock(session.upload_id):
+            await self._lock_row(session)
+            try:
+                self._require_active(session)
+                if session.received_bytes != session.total_size:
+                    raise ValueError(
+                        f"Upload incomplete: {session.received_bytes} of {session.total_size} bytes received"
+                    )
+
+                path = Path(session.temp_path)
+                stored = (await aiofiles.os.stat(path)).st_size
+                if stored < session.total_size:
+                    raise ValueError("Stored upload is shorter than its size; upload is corrupt")
+                if stored > session.total_size:
+                    async with aiofiles.open(path, "r+b") as f:
+                        await f.truncate(session.total_size)
+
+                content_hash = (await self._hasher_for(session)).hexdigest()
+                if expected_sha256 and expected_sha256.lower() != content_hash:
+                    raise ValueError("SHA-256 mismatch; upload is corrupt")
+
+                db_file = await asyncio.to_thread(self._create_file, session, content_hash)
+            except BaseException:
+                await asyncio.to_thread(self.db.rollback)
+                raise
+            _hashers.pop(session.upload_id, None)
+            return db_file
+
+    async def abort(self, session: UploadSession):
+        async with _upload_lock(session.upload_id):
+            await self._lock_row(session)
+            try:
+                self._require_active(session)
+                session.status = UploadStatus.ABORTED
+                await asyncio.to_thread(self.db.commit)
+            except BaseException:
+                await asyncio.to_thread(self.db.rollback)
+                raise
+            _hashers.pop(session.upload_id, None)
+            try:
+                await aiofiles.os.remove(session.temp_path)
+            except FileNotFoundError:
+                pass
+
+    def expire_sessions(self) -> Dict:
+        """
+        Abort uploads past their expiry and remove their stored parts, plus
+        incoming files older than the session TTL that no active upload owns
+        (e.g. direct uploads interrupted by a crash). Running hashes of uploads
+        no longer active are dropped from memory.
+        """
+        now = datetime.now(timezone.utc)
+        # Sessions with a part in flight (claimed, or locked while completing)
+        # are left for the next sweep
+        expired = self.db.query(UploadSession).filter(
+            UploadSession.status == UploadStatus.UPLOADING,
+            UploadSession.expires_at < now,
+            or_(
+                UploadSession.part_token.is_(None),
+                UploadSession.part_started_at < now - timedelta(seconds=settings.UPLOAD_PART_TIMEOUT_SECONDS)
+            )
+        ).with_for_update(skip_locked=True).all()
+        for session in expired:
+            session.status = UploadStatus.ABORTED
+        self.db.commit()
+
+        removed = 0
+        for session in expired:
+            _hashers.pop(session.upload_id, None)
+            try:
+                os.unlink(session.temp_path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+
+        active = {
+            upload_id for (upload_id,) in self.db.query(UploadSession.upload_id).filter(
+                UploadSession.status == UploadStatus.UPLOADING
+            )
+        }
+        for upload_id in [upload_id for upload_id in _hashers if upload_id not in active]:
+            _hashers.pop(upload_id, None)
+
+        cutoff = now.timestamp() - settings.UPLOAD_SESSION_TTL_HOURS * 3600
+        incoming = upload_dir() / ".incoming"
+        if incoming.is_dir():
+            for path in incoming.glob("*.part"):
+                if path.stem in active:
+                    continue
+                try:
+                    if path.stat().st_mtime < cutoff:
+                        path.unlink()
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+
+        return {"uploads_expired": len(expired), "parts_removed": removed}
+
+    @staticmethod
+    def describe(session: UploadSession) -> Dict:
+        return {
+            "upload_id": session.upload_id,
+            "file_name": session.original_file_name,
+            "total_size": session.total_size,
+            "part_size": session.part_size,
+            "received_bytes": session.received_bytes,
+            "status": session.status.value,
+            "content_hash": session.content_hash,
+            "file_id": session.file_id,
+            "expires_at": session.expires_at.isoformat() if session.expires_at else None
+        }
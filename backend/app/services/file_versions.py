@@ -0,0 +1,331 @@
+"""
+File Versions - Revisions of project files stored as binary deltas
+
+A new revision of a file becomes a new ProjectFile row (version + 1,
+parent_file_id pointing at the revision before). Its content is stored as a
+binary delta against the previous revision, unless:
+
+- the chain of deltas would reach FILE_VERSION_SNAPSHOT_INTERVAL,
+- the delta is not much smaller than the file, or
+- the content is already a stored blob.
+
+In those cases the revision is stored in full via the blob store. Reading a
+revision applies at most FILE_VERSION_SNAPSHOT_INTERVAL - 1 deltas.
+Deltas live in the configured object storage next to the blobs.
+Reconstructed files, and full copies fetched from remote storage, are kept
+in a size-bounded local LRU keyed by content hash; a new revision's upload
+seeds it, so the latest version is usually served without any
+reconstruction. Content is handed out as open files, so an eviction while a
+download is streaming does not cut it short.
+
+Only the latest revision can be revised. is_latest moves with a single
+conditional UPDATE in the same transaction as the new row, so one of two
+concurrent revisions fails instead of both becoming latest.
+"""
+
+import shutil
+import uuid
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.file_management import FileBlob, FileDelta, ProjectFile
+from app.services.binary_delta import apply_delta, create_delta
+from app.services.blob_store import blob_store
+from app.services.file_search import file_search
+from app.services.file_uploads import get_file_type, incoming_path
+from app.services.object_storage import get_storage, storage_for
+from app.services.render_cache import RenderCache
+from app.services.workspace_summary import workspace_summary
+
+DELTA_MAX_RATIO = 0.5  # store in full when the delta is larger than this share of the file
+
+_caches: Dict[str, RenderCache] = {}
+
+
+class VersionConflict(ValueError):
+    """The file was revised concurrently or is not the latest version"""
+
+
+def version_cache() -> RenderCache:
+    """LRU of reconstructed revisions under the upload directory"""
+    directory = str(Path(settings.UPLOAD_DIR) / "version_cache")
+    if directory not in _caches:
+        _caches[directory] = RenderCache(directory, settings.VERSION_CACHE_MAX_BYTES)
+    return _caches[directory]
+
+
+class FileVersionService:
+    """Creates and reads delta-compressed file revisions"""
+
+    def __init__(self, db_session: Session):
+        self.db = db_session
+
+    def delta_for(self, file_record: ProjectFile) -> Optional[FileDelta]:
+        if file_record.content_hash:
+            return None
+        return self.db.get(FileDelta, file_record.id)
+
+    def content_hash(self, file_record: ProjectFile) -> Optional[str]:
+        """SHA-256 of a file's full content, whichever way it is stored"""
+        delta = self.delta_for(file_record)
+        return delta.target_hash if delta else file_record.content_hash
+
+    def _open_stored(self, file_record: ProjectFile) -> BinaryIO:
+        """Open content stored in full, fetching it into the cache from remote storage"""
+        storage = storage_for(file_record.file_path)
+        local = storage.local_path(file_record.file_path)
+        if local is not None:
+            return open(local, "rb")
+        cache = version_cache()
+        cached = cache.open(file_record.content_hash)
+        if cached is not None:
+            return cached
+        target = cache.temp_path(file_record.content_hash)
+        try:
+            storage.download(file_record.file_path, target)
+            return _store_open(cache, file_record.content_hash, target)
+        except BaseException:
+            target.unlink(missing_ok=True)
+            raise
+
+    def _apply(self, base: BinaryIO, delta: FileDelta, target: Path) -> str:
+        storage = storage_for(delta.storage_path)
+        delta_path = storage.local_path(delta.storage_path)
+        if delta_path is not None:
+            return apply_delta(base, delta_path, target)
+        delta_path = incoming_path()
+        try:
+            storage.download(delta.storage_path, delta_path)
+            return apply_delta(base, delta_path, target)
+        finally:
+            delta_path.unlink(missing_ok=True)
+
+    def open_content(self, file_record: ProjectFile) -> BinaryIO:
+        """
+        Open the full content for reading, reconstructing a delta revision if
+        needed. The caller owns (and closes) the handle, which stays readable
+        if the version cache evicts the file meanwhile.
+        """
+        delta = self.delta_for(file_record)
+        if delta is None:
+            return self._open_stored(file_record)
+        cache = version_cache()
+        cached = cache.open(delta.target_hash)
+        if cached is not None:
+            return cached
+
+        # Walk back to the nearest full or cached revision
+        chain = [delta]
+        while True:
+            base_record = self.db.get(ProjectFile, chain[-1].base_file_id)
+            base_delta = self.delta_for(base_record)
+            if base_delta is None:
+                base = self._open_stored(base_record)
+                break
+            base = cache.open(base_delta.target_hash)
+            if base is not None:
+                break
+            chain.append(base_delta)
+
+        for step in reversed(chain):
+            target = cache.temp_path(step.target_hash)
+            try:
+                with base:
+                    digest = self._apply(base, step, target)
+                if digest != step.target_hash:
+                    raise ValueError(f"Reconstructed version of file {step.file_id} does not match its hash")
+                base = _store_open(cache, step.target_hash, target)
+            except BaseException:
+                target.unlink(missing_ok=True)
+                raise
+        return base
+
+    def _blob_exists(self, content_hash: str) -> bool:
+        return self.db.execute(
+            select(FileBlob.content_hash).where(FileBlob.content_hash == content_hash)
+        ).first() is not None
+
+    def _write_delta(self, parent: ProjectFile, temp_path: Path, size: int):
+        """(location, size) of a stored delta against parent, or None when a full copy is better"""
+        delta_path = incoming_path()
+        try:
+            with self.open_content(parent) as base:
+                delta_size = create_delta(base, temp_path, delta_path)
+            if delta_size > size * DELTA_MAX_RATIO:
+                return None
+            return get_storage().put_file(f"deltas/{uuid.uuid4().hex}.delta", delta_path), delta_size
+        finally:
+            delta_path.unlink(missing_ok=True)
+
+    def add_version(
+        self,
+        parent_id: int,
+        temp_path: Path,
+        content_hash: str,
+        size: int,
+        user_id: int,
+        file_name: Optional[str] = None,
+        mime_type: Optional[str] = None,
+        description: Optional[str] = None,
+        tags: Optional[str] = None,
+        on_created: Optional[Callable[[ProjectFile], None]] = None
+    ) -> ProjectFile:
+        """
+        Store temp_path as the next revision of parent_id and make it the
+        latest. on_created is called with the flushed row so related changes
+        commit with it. Commits; temp_path is consumed on success.
+        """
+        parent = self.db.query(ProjectFile).filter(ProjectFile.id == parent_id).with_for_update().first()
+        if parent is None:
+            raise LookupError("File not found")
+        if not parent.is_latest:
+            raise VersionConflict("Only the latest version of a file can be revised")
+
+        parent_delta = self.delta_for(parent)
+        chain_length = (parent_delta.chain_length if parent_delta else 0) + 1
+        written = None
+        if chain_length < settings.FILE_VERSION_SNAPSHOT_INTERVAL and not self._blob_exists(content_hash):
+            written = self._write_delta(parent, temp_path, size)
+
+        try:
+            if written is None:
+                blob = blob_store.adopt(self.db, temp_path, content_hash, size)
+                stored_hash, file_path = content_hash, blob.storage_path
+            else:
+                stored_hash, file_path = None, written[0]
+
+            flipped = self.db.execute(
+                update(ProjectFile)
+                .where(ProjectFile.id == parent.id, ProjectFile.is_latest == True)
+                .values(is_latest=False)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if not flipped:
+                raise VersionConflict("The file was revised concurrently")
+            # The loaded parent still reads as latest, so it is uncounted once
+            workspace_summary.file_removed(self.db, parent)
+            parent.is_latest = False
+
+            file_name = file_name or parent.original_file_name
+            mime_type = mime_type or parent.mime_type
+            db_file = ProjectFile(
+                project_id=parent.project_id,
+                file_name=f"{content_hash}{Path(file_name).suffix}",
+                original_file_name=file_name,
+                file_path=file_path,
+                file_size=size,
+                content_hash=stored_hash,
+                mime_type=mime_type,
+                file_type=get_file_type(mime_type, file_name),
+                file_category=parent.file_category,
+                folder_path=parent.folder_path,
+                description=description if description is not None else parent.description,
+                tags=tags if tags is not None else parent.tags,
+                uploaded_by=user_id,
+                version=(parent.version or 1) + 1,
+                is_latest=True,
+                parent_file_id=parent.id,
+                is_public=parent.is_public,
+                related_calculation_id=parent.related_calculation_id,
+                related_boq_id=parent.related_boq_id,
+                related_cost_estimate_id=parent.related_cost_estimate_id,
+                related_document_id=parent.related_document_id
+            )
+            self.db.add(db_file)
+            self.db.flush()
+            if written is not None:
+                self.db.add(FileDelta(
+                    file_id=db_file.id,
+                    base_file_id=parent.id,
+                    storage_path=written[0],
+                    delta_size=written[1],
+                    target_hash=content_hash,
+                    chain_length=chain_length
+                ))
+            workspace_summary.file_added(self.db, db_file)
+            file_search.index_file(self.db, db_file)
+            if on_created is not None:
+                on_created(db_file)
+            self.db.commit()
+        except BaseException:
+            self.db.rollback()
+            if written is not None:
+                storage_for(written[0]).delete(written[0])
+            raise
+
+        self.db.refresh(db_file)
+        if written is not None:
+            # The upload is the reconstructed latest version; keep it
+            version_cache().store_file(content_hash, temp_path, content_hash[:32])
+        return db_file
+
+    def history(self, file_record: ProjectFile) -> List[ProjectFile]:
+        """Every revision in the file's lineage, newest first"""
+        latest = file_record
+        while True:
+            child = self.db.query(ProjectFile).filter(ProjectFile.parent_file_id == latest.id).first()
+            if child is None:
+                break
+            latest = child
+        revisions = [latest]
+        while revisions[-1].parent_file_id:
+            revisions.append(self.db.get(ProjectFile, revisions[-1].parent_file_id))
+        return revisions
+
+    def prepare_delete(self, file_record: ProjectFile) -> List[str]:
+        """
+        Detach a revision before it is deleted; the caller deletes the row and
+        commits, then removes the returned stored objects. Revisions stored as deltas
+        against it are stored in full, the next revision is re-parented, and
+        deleting the latest revision makes the previous one latest again.
+        """
+        obsolete = []
+        for dependent in self.db.query(FileDelta).filter(FileDelta.base_file_id == file_record.id).all():
+            revision = self.db.get(ProjectFile, dependent.file_id)
+            staged = incoming_path()
+            with self.open_content(revision) as source, open(staged, "wb") as out:
+                shutil.copyfileobj(source, out)
+            blob = blob_store.adopt(self.db, staged, dependent.target_hash, revision.file_size)
+            revision.content_hash = dependent.target_hash
+            revision.file_path = blob.storage_path
+            obsolete.append(dependent.storage_path)
+            self.db.delete(dependent)
+
+        own_delta = self.delta_for(file_record)
+        if own_delta is not None:
+            obsolete.append(own_delta.storage_path)
+            self.db.delete(own_delta)
+
+        self.db.execute(
+            update(ProjectFile)
+            .where(ProjectFile.parent_file_id == file_record.id)
+            .values(parent_file_id=file_record.parent_file_id)
+            .execution_options(synchronize_session=False)
+        )
+        if file_record.is_latest and file_record.parent_file_id:
+            previous = self.db.get(ProjectFile, file_record.parent_file_id)
+            previous.is_latest = True
+            self.db.flush()
+            workspace_summary.file_added(self.db, previous)
+        self.db.flush()
+        return obsolete
+
+
+def _store_open(cache: RenderCache, key: str, source: Path) -> BinaryIO:
+    """Move a finished file into the cache, keeping it open in case it is evicted at once"""
+    f = open(source, "rb")
+    try:
+        cache.store_file(key, source, key[:32])
+    except BaseException:
+        f.close()
+        raise
+    return f
+
+
+def remove_stored(locations: List[str]):
+    for location in locations:
+        storage_for(location).delete(location)
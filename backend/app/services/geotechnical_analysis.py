@@ -4,6 +4,10 @@ Geotechnical Analysis Service - Advanced soil analysis and foundation design
 
 from typing import Dict, List
 import math
+from app.services.bearing_capacity import (
+    bearing_capacity_factors, shape_factors, depth_factor_q, ultimate_bearing_capacity
+)
+from app.services.slope_stability import SlopeStabilityEngine
 
 class GeotechnicalAnalysisService:
     """Geotechnical Analysis Service - Advanced soil mechanics"""
@@ -21,38 +25,25 @@ class GeotechnicalAnalysisService:
         """
         Calculate soil bearing capacity using Terzaghi's method (IS 6403)
         """
-        # Bearing capacity factors
-        phi_rad = math.radians(angle_of_internal_friction)
-        
-        Nc = (math.exp(math.pi * math.tan(phi_rad)) * (math.tan(math.pi/4 + phi_rad/2))**2 - 1) * (1 / math.tan(phi_rad))
-        Nq = math.exp(math.pi * math.tan(phi_rad)) * (math.tan(math.pi/4 + phi_rad/2))**2
-        Ngamma = 2 * (Nq + 1) * math.tan(phi_rad)
+        # Bearing capacity factors (tabulated; valid down to φ = 0)
+        Nc, Nq, Ngamma = (float(f) for f in bearing_capacity_factors(angle_of_internal_friction))
         
         # Shape factors
-        if foundation_length > 0:
-            # Rectangular footing
-            shape_factor_c = 1 + 0.2 * (foundation_width / foundation_length)
-            shape_factor_q = 1 + 0.2 * (foundation_width / foundation_length)
-            shape_factor_gamma = 1 - 0.4 * (foundation_width / foundation_length)
-        else:
-            # Square/circular footing
-            shape_factor_c = 1.3
-            shape_factor_q = 1.0
-            shape_factor_gamma = 0.8
+        shape_factor_c, shape_factor_q, shape_factor_gamma = (
+            float(f) for f in shape_factors(foundation_width, foundation_length)
+        )
         
         # Depth factors (simplified)
-        depth_factor_q = 1 + 2 * math.tan(phi_rad) * (1 - math.sin(phi_rad))**2 * (foundation_depth / foundation_width)
-        depth_factor_q = min(depth_factor_q, 1.0)  # Cap at 1.0 for shallow foundations
+        depth_factor = float(depth_factor_q(angle_of_internal_friction, foundation_depth, foundation_width))
         
         # Terzaghi's bearing capacity equation
         # q_ult = c*Nc*sc*dc + q*Nq*sq*dq + 0.5*gamma*B*Ngamma*sgamma
         q = unit_weight * foundation_depth  # Surcharge
         
-        q_ult = (
-            cohesion * Nc * shape_factor_c +
-            q * Nq * shape_factor_q * depth_factor_q +
-            0.5 * unit_weight * foundation_width * Ngamma * shape_factor_gamma
-        )
+        q_ult = float(ultimate_bearing_capacity(
+            cohesion, angle_of_internal_friction, q, unit_weight,
+            foundation_width, foundation_depth, foundation_length
+        ))
         
         # Safe bearing capacity (with factor of safety = 3)
         safe_bearing_capacity = q_ult / 3.0
@@ -72,7 +63,7 @@ class GeotechnicalAnalysisService:
                 "sgamma": round(shape_factor_gamma, 2)
             },
             "depth_factors": {
-                "dq": round(depth_factor_q, 2)
+                "dq": round(depth_factor, 2)
             },
             "factor_of_safety": 3.0,
             "code_standard": "IS 6403:1981"
@@ -88,41 +79,62 @@ class GeotechnicalAnalysisService:
         water_table_depth: float = None
     ) -> Dict:
         """
-        Analyze slope stability using simplified Bishop's method
+        Analyze stability of a simple homogeneous slope using Bishop's simplified
+        method of slices with a slip-circle search (Janbu reported alongside)
         """
+        if not 0 < slope_angle < 90:
+            raise ValueError("Slope angle must be between 0 and 90 degrees (exclusive)")
+        if slope_height <= 0:
+            raise ValueError("Slope height must be positive")
+        if unit_weight <= 0:
+            raise ValueError("Unit weight must be positive")
+        
         phi_rad = math.radians(angle_of_internal_friction)
         beta_rad = math.radians(slope_angle)
         
-        # Simplified stability analysis
-        # Factor of safety = (c + sigma*tan(phi)) / (gamma*H*sin(beta)*cos(beta))
-        
-        # Average stress
-        sigma = 0.5 * unit_weight * slope_height
+        # Build the slope geometry: toe at origin, level ground beyond toe and crest
+        run = slope_height / math.tan(beta_rad)
+        margin = 2.0 * max(slope_height, run)
+        ground_profile = [
+            {"x": -margin, "y": 0.0},
+            {"x": 0.0, "y": 0.0},
+            {"x": run, "y": slope_height},
+            {"x": run + margin, "y": slope_height}
+        ]
+        soil_layers = [{
+            "cohesion": soil_cohesion,
+            "friction_angle": angle_of_internal_friction,
+            "unit_weight": unit_weight
+        }]
+        phreatic_surface = None
+        if water_table_depth is not None:
+            # Water table parallel to the ground surface
+            phreatic_surface = [
+                {"x": p["x"], "y": p["y"] - water_table_depth} for p in ground_profile
+            ]
         
-        # Factor of safety (simplified)
-        numerator = soil_cohesion + sigma * math.tan(phi_rad)
-        denominator = unit_weight * slope_height * math.sin(beta_rad) * math.cos(beta_rad)
+        engine = SlopeStabilityEngine(max_workers=1)
+        bishop = engine.analyze(ground_profile, soil_layers, phreatic_surface, method="bishop")
+        janbu = engine.analyze(ground_profile, soil_layers, phreatic_surface, method="janbu")
         
-        factor_of_safety = numerator / denominator if denominator > 0 else 999
+        factor_of_safety = bishop["factor_of_safety"]
+        if factor_of_safety is None:
+            factor_of_safety = 999  # No kinematically admissible slip surface
         
         # Critical slope angle
         critical_angle = math.degrees(math.atan(math.tan(phi_rad) + (soil_cohesion / (unit_weight * slope_height))))
         
-        # Stability status
-        if factor_of_safety >= 1.5:
-            status = "stable"
-        elif factor_of_safety >= 1.2:
-            status = "marginal"
-        else:
-            status = "unstable"
-        
         return {
             "slope_height": slope_height,
             "slope_angle": slope_angle,
             "factor_of_safety": round(factor_of_safety, 3),
+            "janbu_factor_of_safety": janbu["factor_of_safety"],
             "critical_slope_angle": round(critical_angle, 2),
-            "status": status,
+            "critical_circle": bishop["critical_circle"],
+            "trial_surfaces": bishop["trial_surfaces"],
+            "status": SlopeStabilityEngine.classify(factor_of_safety),
             "recommendation": self._get_slope_recommendation(factor_of_safety),
+            "method": "Bishop simplified (method of slices)",
             "code_standard": "IS 7894:1975"
         }
     
@@ -192,10 +204,12 @@ class GeotechnicalAnalysisService:
         pile_type: str = "bored",  # bored, driven
         pile_diameter: float = 0.6,
         pile_length: float = 10.0,
-        skin_friction_coefficient: float = 0.5
+        skin_friction_coefficient: float = 0.5,
+        undrained_cohesion: float = 50.0  # kN/m² at pile tip
     ) -> Dict:
         """
-        Design pile foundation (simplified)
+        Design pile foundation (simplified, single geometry).
+        Use PileGroupOptimizer for layered profiles and group layouts.
         """
         # Unit skin friction (simplified)
         # Values depend on soil type
@@ -216,7 +230,7 @@ class GeotechnicalAnalysisService:
         # For cohesive soils: Qb = 9 * cu * Ab
         # For granular: Qb = Nq * sigma_v * Ab
         pile_area = math.pi * (pile_diameter / 2)**2
-        end_bearing_capacity = 9 * 50 * pile_area  # Simplified (assuming cu = 50 kN/m²)
+        end_bearing_capacity = 9 * undrained_cohesion * pile_area
         
         # Total capacity
         total_capacity = skin_friction_capacity + end_bearing_capacity
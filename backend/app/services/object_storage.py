@@ -0,0 +1,397 @@
+"""
+Object Storage - Where stored file content lives
+
+Durable file content (blobs and version deltas) is written through a
+StorageBackend chosen by STORAGE_BACKEND:
+
+    filesystem  files under UPLOAD_DIR, on local disk or a shared volume
+    s3          an S3-compatible bucket (AWS S3, MinIO, Ceph, ...)
+
+put_file returns a location string that is stored on the row: a path for the
+filesystem, s3://bucket/key for S3. storage_for() picks the backend from the
+location itself, so rows written before a backend switch stay readable.
+
+S3 backends hand out presigned GET URLs, so clients download from the bucket
+directly and the API only authorizes. Requests are signed with AWS Signature
+Version 4 using the standard library; no SDK is needed.
+"""
+
+import hashlib
+import hmac
+import os
+import shutil
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+from urllib.error import HTTPError
+from urllib.parse import quote, urlsplit
+from urllib.request import Request, urlopen
+
+from app.core.config import settings
+
+COPY_BUFFER_SIZE = 1024 * 1024
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+
+
+class StorageError(OSError):
+    """The storage backend rejected a request"""
+
+
+class StoredObject:
+    """A stored object found by listing a prefix"""
+
+    def __init__(self, location: str, name: str, size: int, modified: float):
+        self.location = location
+        self.name = name
+        self.size = size
+        self.modified = modified  # epoch seconds
+
+
+class StorageBackend:
+    """Interface of a place file content is stored, addressed by key on write and by location after"""
+
+    def put_file(self, key: str, source: Path) -> str:
+        """Store a local file under key, consuming it; returns its location"""
+        raise NotImplementedError
+
+    def exists(self, location: str) -> bool:
+        raise NotImplementedError
+
+    def delete(self, location: str):
+        """Remove an object; a missing object is not an error"""
+        raise NotImplementedError
+
+    def local_path(self, location: str) -> Optional[Path]:
+        """Path the content can be read from directly, if the backend is a filesystem"""
+        return None
+
+    def download(self, location: str, dest: Path):
+        """Copy an object into a local file"""
+        raise NotImplementedError
+
+    def list(self, prefix: str) -> Iterator[StoredObject]:
+        """Objects whose key starts with prefix"""
+        raise NotImplementedError
+
+    def signed_url(self, location: str, filename: str, media_type: str, expires_in: int) -> Optional[str]:
+        """Short-lived URL for downloading straight from storage; None if the API must serve it"""
+        return None
+
+
+class FilesystemStorage(StorageBackend):
+    """Keys are paths relative to a root directory; locations are the resulting paths"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def put_file(self, key: str, source: Path) -> str:
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(source, path)
+        # The move keeps the source's mtime; stored files count as new
+        os.utime(path)
+        return str(path)
+
+    def exists(self, location: str) -> bool:
+        return Path(location).exists()
+
+    def delete(self, location: str):
+        try:
+            os.unlink(location)
+        except FileNotFoundError:
+            pass
+
+    def local_path(self, location: str) -> Optional[Path]:
+        return Path(location)
+
+    def download(self, location: str, dest: Path):
+        shutil.copyfile(location, dest)
+
+    def list(self, prefix: str) -> Iterator[StoredObject]:
+        directory = self.root / prefix
+        if not directory.is_dir():
+            return
+        for path in directory.rglob("*"):
+            if path.is_file():
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                yield StoredObject(str(path), path.name, stat.st_size, stat.st_mtime)
+
+
+def _hmac(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode("utf-8"), hashlib.sha256).digest()
+
+
+def _uri_encode(value: str, safe: str = "") -> str:
+    return quote(value, safe="-_.~" + safe)
+
+
+def sigv4_signature(
+    secret_key: str,
+    region: str,
+    method: str,
+    host: str,
+    path: str,
+    query: Dict[str, str],
+    headers: Dict[str, str],
+    payload_hash: str,
+    amz_date: str
+) -> Tuple[str, str]:
+    """(signed header names, signature) for an S3 request, per AWS Signature Version 4"""
+    canonical_headers = {"host": host, **{name.lower(): value.strip() for name, value in headers.items()}}
+    signed_headers = ";".join(sorted(canonical_headers))
+    canonical_request = "\n".join([
+        method,
+        _uri_encode(path, safe="/"),
+        "&".join(f"{_uri_encode(k)}={_uri_encode(v)}" for k, v in sorted(query.items())),
+        "".join(f"{name}:{canonical_headers[name]}\n" for name in sorted(canonical_headers)),
+        signed_headers,
+        payload_hash
+    ])
+    scope = f"{amz_date[:8]}/{region}/s3/aws4_request"
+    string_to_sign = "\n".join([
+        "AWS4-HMAC-SHA256",
+        amz_date,
+        scope,
+        hashlib.sha256(canonical_request.encode("utf-8")).hexdigest()
+    ])
+    key = _hmac(f"AWS4{secret_key}".encode("utf-8"), amz_date[:8])
+    for part in (region, "s3", "aws4_request"):
+        key = _hmac(key, part)
+    return signed_headers, hmac.new(key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def _amz_date(now: Optional[datetime] = None) -> str:
+    return (now or datetime.now(timezone.utc)).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _xml_children(element, name: str):
+    # S3 responses are namespaced; match on the local name
+    return [child for child in element if child.tag.rsplit("}", 1)[-1] == name]
+
+
+def _xml_text(element, name: str) -> Optional[str]:
+    children = _xml_children(element, name)
+    return children[0].text if children else None
+
+
+class _SlicedFile:
+    """At most length bytes of a file from its current position"""
+
+    def __init__(self, f: BinaryIO, length: int):
+        self._f = f
+        self._remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if self._remaining <= 0:
+            return b""
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._f.read(size)
+        self._remaining -= len(data)
+        return data
+
+
+class S3Storage(StorageBackend):
+    """
+    Path-style requests to an S3-compatible endpoint. Files over the multipart
+    threshold are uploaded in parts, so objects can exceed the 5GB single-PUT
+    limit.
+    """
+
+    def __init__(
+        self,
+        endpoint_url: str,
+        bucket: str,
+        access_key: str,
+        secret_key: str,
+        region: str = "us-east-1",
+        multipart_threshold: int = 64 * 1024 * 1024,
+        part_size: int = 64 * 1024 * 1024
+    ):
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.multipart_threshold = multipart_threshold
+        self.part_size = part_size
+        self._host = urlsplit(self.endpoint_url).netloc
+
+    @classmethod
+    def from_settings(cls) -> "S3Storage":
+        if not (settings.S3_ENDPOINT_URL and settings.S3_BUCKET):
+            raise StorageError("S3 storage needs S3_ENDPOINT_URL and S3_BUCKET")
+        return cls(
+            settings.S3_ENDPOINT_URL,
+            settings.S3_BUCKET,
+            settings.S3_ACCESS_KEY or "",
+            settings.S3_SECRET_KEY or "",
+            settings.S3_REGION,
+            settings.S3_MULTIPART_THRESHOLD,
+            settings.S3_PART_SIZE
+        )
+
+    def _split(self, location: str) -> Tuple[str, str]:
+        bucket, _, key = location[len("s3://"):].partition("/")
+        return bucket, key
+
+    def _path(self, bucket: str, key: str = "") -> str:
+        return f"/{bucket}/{key}" if key else f"/{bucket}"
+
+    def _request(
+        self,
+        method: str,
+        bucket: str,
+        key: str = "",
+        query: Optional[Dict[str, str]] = None,
+        body=None,
+        length: Optional[int] = None
+    ):
+        query = query or {}
+        path = self._path(bucket, key)
+        amz_date = _amz_date()
+        headers = {"x-amz-content-sha256": UNSIGNED_PAYLOAD, "x-amz-date": amz_date}
+        signed_headers, signature = sigv4_signature(
+            self.secret_key, self.region, method, self._host, path, query, headers, UNSIGNED_PAYLOAD, amz_date
+        )
+        headers["Authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key}/{amz_date[:8]}/{self.region}/s3/aws4_request, "
+            f"SignedHeaders={signed_headers}, Signature={signature}"
+        )
+        if length is not None:
+            headers["Content-Length"] = str(length)
+        url = self.endpoint_url + _uri_encode(path, safe="/")
+        if query:
+            url += "?" + "&".join(f"{_uri_encode(k)}={_uri_encode(v)}" for k, v in sorted(query.items()))
+        try:
+            return urlopen(Request(url, data=body, headers=headers, method=method))
+        except HTTPError as e:
+            if e.code == 404:
+                raise FileNotFoundError(f"{bucket}/{key}")
+            raise StorageError(f"S3 {method} {bucket}/{key} failed with HTTP {e.code}")
+
+    def put_file(self, key: str, source: Path) -> str:
+        size = os.path.getsize(source)
+        if size > self.multipart_threshold:
+            self._put_multipart(key, source, size)
+        else:
+            with open(source, "rb") as f:
+                self._request("PUT", self.bucket, key, body=f, length=size).close()
+        os.unlink(source)
+        return f"s3://{self.bucket}/{key}"
+
+    def _put_multipart(self, key: str, source: Path, size: int):
+        with self._request("POST", self.bucket, key, {"uploads": ""}, body=b"") as response:
+            upload_id = _xml_text(ET.fromstring(response.read()), "UploadId")
+        parts: List[Tuple[int, str]] = []
+        try:
+            with open(source, "rb") as f:
+                for number, offset in enumerate(range(0, size, self.part_size), start=1):
+                    length = min(self.part_size, size - offset)
+                    with self._request(
+                        "PUT", self.bucket, key, {"partNumber": str(number), "uploadId": upload_id},
+                        body=_SlicedFile(f, length), length=length
+                    ) as response:
+                        parts.append((number, response.headers["ETag"]))
+            manifest = "".join(
+                f"<Part><PartNumber>{number}</PartNumber><ETag>{etag}</ETag></Part>" for number, etag in parts
+            )
+            body = f"<CompleteMultipartUpload>{manifest}</CompleteMultipartUpload>".encode("utf-8")
+            self._request("POST", self.bucket, key, {"uploadId": upload_id}, body=body, length=len(body)).close()
+        except BaseException:
+            try:
+                self._request("DELETE", self.bucket, key, {"uploadId": upload_id}).close()
+            except (OSError, StorageError):
+                pass
+            raise
+
+    def exists(self, location: str) -> bool:
+        try:
+            self._request("HEAD", *self._split(location)).close()
+            return True
+        except FileNotFoundError:
+            return False
+
+    def delete(self, location: str):
+        try:
+            self._request("DELETE", *self._split(location)).close()
+        except FileNotFoundError:
+            pass
+
+    def download(self, location: str, dest: Path):
+        with self._request("GET", *self._split(location)) as response, open(dest, "wb") as out:
+            shutil.copyfileobj(response, out, COPY_BUFFER_SIZE)
+
+    def list(self, prefix: str) -> Iterator[StoredObject]:
+        token = None
+        while True:
+            query = {"list-type": "2", "prefix": prefix}
+            if token:
+                query["continuation-token"] = token
+            with self._request("GET", self.bucket, query=query) as response:
+                result = ET.fromstring(response.read())
+            for entry in _xml_children(result, "Contents"):
+                key = _xml_text(entry, "Key")
+                modified = datetime.strptime(
+                    _xml_text(entry, "LastModified")[:19], "%Y-%m-%dT%H:%M:%S"
+                ).replace(tzinfo=timezone.utc)
+                yield StoredObject(
+                    f"s3://{self.bucket}/{key}", key.rsplit("/", 1)[-1],
+                    int(_xml_text(entry, "Size")), modified.timestamp()
+                )
+            if _xml_text(result, "IsTruncated") != "true":
+                return
+            token = _xml_text(result, "NextContinuationToken")
+
+    def presign(
+        self,
+        method: str,
+        bucket: str,
+        key: str,
+        expires_in: int,
+        extra_query: Optional[Dict[str, str]] = None,
+        now: Optional[datetime] = None
+    ) -> str:
+        amz_date = _amz_date(now)
+        query = {
+            "X-Amz-Algorithm": "AWS4-HMAC-SHA256",
+            "X-Amz-Credential": f"{self.access_key}/{amz_date[:8]}/{self.region}/s3/aws4_request",
+            "X-Amz-Date": amz_date,
+            "X-Amz-Expires": str(expires_in),
+            "X-Amz-SignedHeaders": "host",
+            **(extra_query or {})
+        }
+        path = self._path(bucket, key)
+        _, signature = sigv4_signature(
+            self.secret_key, self.region, method, self._host, path, query, {}, UNSIGNED_PAYLOAD, amz_date
+        )
+        query["X-Amz-Signature"] = signature
+        return (
+            self.endpoint_url + _uri_encode(path, safe="/") + "?"
+            + "&".join(f"{_uri_encode(k)}={_uri_encode(v)}" for k, v in sorted(query.items()))
+        )
+
+    def signed_url(self, location: str, filename: str, media_type: str, expires_in: int) -> Optional[str]:
+        bucket, key = self._split(location)
+        return self.presign("GET", bucket, key, expires_in, {
+            "response-content-disposition": f"attachment; filename*=utf-8''{quote(filename)}",
+            "response-content-type": media_type
+        })
+
+
+def get_storage() -> StorageBackend:
+    """The configured backend, for new content"""
+    if settings.STORAGE_BACKEND == "s3":
+        return S3Storage.from_settings()
+    return FilesystemStorage(settings.UPLOAD_DIR)
+
+
+def storage_for(location: str) -> StorageBackend:
+    """The backend holding an existing location"""
+    if location.startswith("s3://"):
+        return S3Storage.from_settings()
+    return FilesystemStorage(settings.UPLOAD_DIR)
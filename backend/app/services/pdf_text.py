@@ -0,0 +1,127 @@
+"""
+PDF Text - Plain text extraction from uploaded PDFs for search indexing
+
+Uses pypdf when it is installed. Without it, a minimal reader pulls the
+string operands of text-showing operators (Tj, TJ, ', ") out of the page
+content streams, decoding ASCII85 and Flate filters. That is enough for
+PDFs produced by reportlab and most simple single-byte-font documents.
+Decoded stream data is limited in proportion to the text budget, so a
+crafted stream cannot inflate into gigabytes.
+"""
+
+import base64
+import os
+import re
+import zlib
+from typing import BinaryIO
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # optional dependency
+    PdfReader = None
+
+MAX_TEXT_CHARS = 1_000_000
+MAX_PDF_BYTES = 200 * 1024 * 1024  # larger files are not read by the fallback reader
+CONTENT_BYTES_PER_CHAR = 16  # decoded content stream bytes allowed per character of text budget
+
+_STREAM = re.compile(rb"obj\s*<<((?:(?!endobj).)*?)>>\s*stream\r?\n(.*?)(?:\r?\n)?endstream", re.S)
+_TEXT_BLOCK = re.compile(rb"BT(.*?)ET", re.S)
+_SHOW_STRING = re.compile(rb"\((?:[^()\\]|\\.|\((?:[^()\\]|\\.)*\))*\)\s*(?:Tj|'|\")")
+_SHOW_ARRAY = re.compile(rb"\[((?:[^\]\\]|\\.)*)\]\s*TJ", re.S)
+_LITERAL = re.compile(rb"\(((?:[^()\\]|\\.|\((?:[^()\\]|\\.)*\))*)\)")
+_FILTERS = re.compile(rb"/Filter\s*(\[[^\]]*\]|/\w+)")
+_NAME = re.compile(rb"/(\w+)")
+_ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f"}
+
+def _inflate(data: bytes, limit: int) -> bytes:
+    # Bounded, so a small stream cannot inflate into gigabytes
+    return zlib.decompressobj().decompress(data, limit)
+
+
+def _ascii85(data: bytes, limit: int) -> bytes:
+    data = data.strip()
+    if len(data) + 3 * data.count(b"z") > limit:  # "z" decodes to four bytes
+        raise ValueError("ASCII85 stream exceeds the decoding budget")
+    return base64.a85decode(data, adobe=True, ignorechars=b" \t\n\r\v")
+
+
+# Decoders take the encoded data and the most bytes they may produce
+_DECODERS = {
+    b"FlateDecode": _inflate,
+    b"ASCII85Decode": _ascii85,
+}
+
+
+def _unescape(literal: bytes) -> str:
+    def replace(match):
+        code = match.group(1)
+        if code[:1].isdigit():
+            return bytes([int(code, 8) & 0xFF])
+        if code in (b"\n", b"\r"):
+            return b""
+        return _ESCAPES.get(code, code)
+
+    raw = re.sub(rb"\\([0-7]{1,3}|.)", replace, literal, flags=re.S)
+    return raw.decode("latin-1")
+
+
+def _text_from_content(content: bytes) -> str:
+    parts = []
+    for block in _TEXT_BLOCK.findall(content):
+        for match in _SHOW_STRING.finditer(block):
+            parts.append(_unescape(_LITERAL.match(match.group(0)).group(1)))
+        for array in _SHOW_ARRAY.findall(block):
+            parts.append("".join(_unescape(s) for s in _LITERAL.findall(array)))
+    return " ".join(parts)
+
+
+def _fallback_text(data: bytes, max_chars: int) -> str:
+    """
+    Text of the content streams until max_chars are found or
+    max_chars × CONTENT_BYTES_PER_CHAR bytes have been decoded
+    """
+    parts, length = [], 0
+    budget = max_chars * CONTENT_BYTES_PER_CHAR
+    for match in _STREAM.finditer(data):
+        dictionary, stream = match.groups()
+        filters = _FILTERS.search(dictionary)
+        names = _NAME.findall(filters.group(1)) if filters else []
+        if any(name not in _DECODERS for name in names):
+            continue  # images and other encodings carry no text we can read
+        try:
+            for name in names:
+                stream = _DECODERS[name](stream, budget)
+        except (ValueError, zlib.error):
+            continue
+        budget -= len(stream)
+        text = _text_from_content(stream)
+        if text:
+            parts.append(text)
+            length += len(text)
+        if length >= max_chars or budget <= 0:
+            break
+    return "\n".join(parts)
+
+
+def extract_pdf_text(f: BinaryIO, max_chars: int = MAX_TEXT_CHARS) -> str:
+    """Text of a PDF open for reading, truncated to max_chars. Raises ValueError for unreadable files."""
+    if PdfReader is not None:
+        try:
+            reader = PdfReader(f)
+            parts, length = [], 0
+            for page in reader.pages:
+                text = page.extract_text() or ""
+                parts.append(text)
+                length += len(text)
+                if length >= max_chars:
+                    break
+            return "\n".join(parts)[:max_chars]
+        except Exception as e:
+            raise ValueError(f"Unreadable PDF: {e}")
+
+    if os.fstat(f.fileno()).st_size > MAX_PDF_BYTES:
+        raise ValueError("PDF too large for text extraction without pypdf")
+    data = f.read()
+    if not data.startswith(b"%PDF"):
+        raise ValueError("Not a PDF")
+    return _fallback_text(data, max_chars)[:max_chars]
@@ -0,0 +1,346 @@
+"""
+Pile Group Design Optimizer - Sweeps pile diameter × length × group layout over
+layered soil profiles and picks the cheapest feasible group per pile cap (IS 2911)
+"""
+
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import math
+import os
+
+import numpy as np
+
+from app.services.bearing_capacity import bearing_capacity_factors
+
+GAMMA_WATER = 9.81  # kN/m³
+
+# Caps below this count are optimized in-process
+PARALLEL_THRESHOLD = 2000
+
+# Largest diameter × length × layout sweep; selection holds (caps × sweep) arrays
+MAX_CONFIGURATIONS = 2000
+MAX_PILE_LENGTH = 100.0  # m; soil profiles are sampled every 0.25 m down to the longest pile
+
+DEFAULT_LAYOUTS: List[Tuple[int, int]] = [
+    (1, 1), (1, 2), (1, 3), (2, 2), (2, 3), (3, 3), (3, 4), (4, 4), (4, 5), (5, 5)
+]
+
+DEFAULT_RATES = {
+    "pile_concrete": 12000,  # per m³, bored cast-in-situ incl. reinforcement
+    "cap_concrete": 8000     # per m³, incl. reinforcement and formwork
+}
+
+
+def _adhesion_factor(cu: np.ndarray) -> np.ndarray:
+    """IS 2911 adhesion factor α: 1.0 up to 40 kPa, 0.5 above 70 kPa"""
+    return np.interp(cu, [40.0, 70.0], [1.0, 0.5])
+
+
+def _profile_arrays(profile: Dict, z: np.ndarray) -> Dict:
+    """Sample a layered profile at depths z (m below cap soffit)"""
+    layers = profile["layers"]
+    bottoms = np.cumsum([layer.get("thickness", np.inf) for layer in layers])
+    bottoms[-1] = np.inf
+    idx = np.searchsorted(bottoms, z, side="right")
+    idx = np.minimum(idx, len(layers) - 1)
+
+    cohesion = np.array([layer.get("cohesion", 0.0) for layer in layers])[idx]
+    phi = np.array([layer.get("friction_angle", 0.0) for layer in layers])[idx]
+    gamma = np.array([layer["unit_weight"] for layer in layers], dtype=float)[idx]
+    cohesive = np.array([
+        layer.get("soil_type", "").lower() == "clay" or
+        (layer.get("friction_angle", 0.0) == 0 and layer.get("cohesion", 0.0) > 0)
+        for layer in layers
+    ])[idx]
+
+    water = profile.get("water_table_depth")
+    gamma_eff = gamma - GAMMA_WATER * (z >= water) if water is not None else gamma
+    return {
+        "cohesion": cohesion, "phi": phi, "gamma_eff": gamma_eff, "cohesive": cohesive
+    }
+
+
+def _single_pile_tables(
+    profile: Dict,
+    diameters: np.ndarray,
+    lengths: np.ndarray,
+    pile_type: str,
+    dz: float = 0.25
+) -> Dict:
+    """
+    Ultimate skin friction per unit perimeter, end bearing per unit area and
+    elastic/base properties for every (diameter × length) pair.
+    """
+    z_max = float(lengths.max())
+    n = int(math.ceil(z_max / dz))
+    z = (np.arange(n) + 0.5) * dz
+    soil = _profile_arrays(profile, z)
+
+    # Effective overburden, limited below the critical depth of 15D
+    sigma_v = np.cumsum(soil["gamma_eff"] * dz) - 0.5 * soil["gamma_eff"] * dz
+    z_crit = 15.0 * diameters[:, None]
+    sigma_v_d = np.interp(np.minimum(z[None, :], z_crit), z, sigma_v)  # (D × z)
+
+    earth_pressure = 1.5 if pile_type == "driven" else 1.0
+    tan_delta = np.tan(np.radians(soil["phi"]))
+    skin_unit = np.where(
+        soil["cohesive"][None, :],
+        (_adhesion_factor(soil["cohesion"]) * soil["cohesion"])[None, :],
+        earth_pressure * sigma_v_d * tan_delta[None, :]
+    )
+    skin_cumulative = np.concatenate(
+        [np.zeros((len(diameters), 1)), np.cumsum(skin_unit * dz, axis=1)], axis=1
+    )
+    z_edges = np.arange(n + 1) * dz
+    # Interpolate to each length: (D × L)
+    skin_per_perimeter = np.stack([
+        np.interp(lengths, z_edges, skin_cumulative[i]) for i in range(len(diameters))
+    ])
+
+    # End bearing at the tip
+    tip = np.clip(np.searchsorted(z, lengths) - 1, 0, n - 1)
+    _, nq, ngamma = bearing_capacity_factors(soil["phi"][tip])
+    sigma_tip = np.stack([np.interp(lengths, z, sigma_v_d[i]) for i in range(len(diameters))])
+    base_unit = np.where(
+        soil["cohesive"][tip][None, :],
+        9.0 * soil["cohesion"][tip][None, :],
+        0.5 * diameters[:, None] * soil["gamma_eff"][tip][None, :] * ngamma[None, :] +
+        sigma_tip * nq[None, :]
+    )
+    return {"skin_per_perimeter": skin_per_perimeter, "base_unit": base_unit}
+
+
+def _validate_sweep(
+    profile: Dict,
+    diameters: np.ndarray,
+    lengths: np.ndarray,
+    layouts: List[Tuple[int, int]]
+) -> None:
+    if diameters.size == 0 or lengths.size == 0 or not layouts:
+        raise ValueError("At least one diameter, one length and one layout are required")
+    if not np.all(np.isfinite(diameters)) or np.any(diameters <= 0):
+        raise ValueError("Pile diameters must be positive")
+    if not np.all(np.isfinite(lengths)) or np.any(lengths <= 0):
+        raise ValueError("Pile lengths must be positive")
+    if lengths.max() > MAX_PILE_LENGTH:
+        raise ValueError(f"Pile lengths must not exceed {MAX_PILE_LENGTH:g} m")
+    if any(len(layout) != 2 or min(layout) < 1 for layout in layouts):
+        raise ValueError("Layouts must be (rows, cols) with at least one pile each way")
+    size = diameters.size * lengths.size * len(layouts)
+    if size > MAX_CONFIGURATIONS:
+        raise ValueError(
+            f"Sweep of {size} configurations exceeds the limit of {MAX_CONFIGURATIONS}"
+        )
+    if not profile.get("layers"):
+        raise ValueError("Every soil profile needs at least one soil layer")
+
+
+def _select_cheapest(
+    loads: np.ndarray,
+    capacity: np.ndarray,
+    settlement_per_kn: np.ndarray,
+    base_settlement_ratio: np.ndarray,
+    cost: np.ndarray,
+    allowable_settlement: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    For caps sharing one soil profile, the flat index of the cheapest feasible
+    configuration. Arrays other than loads are (D × L × layouts).
+    Returns (index, settlement_mm, feasible).
+    """
+    load = loads[:, None, None, None]
+    # Settlement grows with the working load per unit group capacity
+    settlement = load * settlement_per_kn[None] + base_settlement_ratio[None] * load / capacity[None]
+    ok = (capacity[None] >= load) & (settlement <= allowable_settlement)
+    masked = np.where(ok, cost[None], np.inf).reshape(len(loads), -1)
+    best = np.argmin(masked, axis=1)
+    feasible = np.isfinite(masked[np.arange(len(loads)), best])
+    return best, settlement.reshape(len(loads), -1)[np.arange(len(loads)), best], feasible
+
+
+def _select_chunk(args):
+    """Process-pool entry point"""
+    return _select_cheapest(*args)
+
+
+class PileGroupOptimizer:
+    """Pile group design sweep with group efficiency and settlement checks"""
+
+    def __init__(
+        self,
+        factor_of_safety: float = 2.5,
+        spacing_ratio: float = 3.0,
+        allowable_settlement: float = 25.0,  # mm
+        concrete_modulus: float = 25e6,  # kN/m²
+        rates: Optional[Dict[str, float]] = None,
+        max_workers: Optional[int] = None
+    ):
+        if factor_of_safety <= 0 or spacing_ratio <= 0 or allowable_settlement <= 0:
+            raise ValueError("Factor of safety, spacing ratio and allowable settlement must be positive")
+        self.factor_of_safety = factor_of_safety
+        self.spacing_ratio = spacing_ratio
+        self.allowable_settlement = allowable_settlement
+        self.concrete_modulus = concrete_modulus
+        self.rates = {**DEFAULT_RATES, **(rates or {})}
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def evaluate_profile(
+        self,
+        profile: Dict,
+        diameters: List[float],
+        lengths: List[float],
+        layouts: List[Tuple[int, int]],
+        pile_type: str = "bored"
+    ) -> Dict:
+        """
+        Group safe capacity, settlement coefficients and cost for every
+        (diameter × length × layout) combination. All arrays are (D × L × K).
+        """
+        d = np.asarray(diameters, dtype=float)
+        length = np.asarray(lengths, dtype=float)
+        _validate_sweep(profile, d, length, layouts)
+        rows = np.array([r for r, _ in layouts], dtype=float)
+        cols = np.array([c for _, c in layouts], dtype=float)
+        n_piles = rows * cols
+
+        single = _single_pile_tables(profile, d, length, pile_type)
+        area = math.pi * d ** 2 / 4
+        q_skin = math.pi * d[:, None] * single["skin_per_perimeter"]
+        q_base = area[:, None] * single["base_unit"]
+        q_single = q_skin + q_base  # (D × L)
+
+        # Converse-Labarre group efficiency
+        spacing = self.spacing_ratio * d
+        theta = np.degrees(np.arctan(d / spacing))[:, None]
+        efficiency = 1.0 - theta / 90.0 * ((cols - 1) * rows + (rows - 1) * cols) / (rows * cols)
+        efficiency = np.broadcast_to(efficiency[:, None, :], (len(d), len(length), len(layouts)))
+
+        # Block failure of the group as a single pier
+        block_b = (cols[None, :] - 1) * spacing[:, None] + d[:, None]  # (D × K)
+        block_l = (rows[None, :] - 1) * spacing[:, None] + d[:, None]
+        q_block = (
+            2 * (block_b + block_l)[:, None, :] * single["skin_per_perimeter"][:, :, None] +
+            (block_b * block_l)[:, None, :] * single["base_unit"][:, :, None]
+        )
+        q_group = np.minimum(efficiency * n_piles * q_single[:, :, None], q_block)
+        capacity = q_group / self.factor_of_safety
+
+        # Settlement: elastic shortening + base movement (Vesic), group amplification sqrt(Bg/D)
+        amplification = np.sqrt(np.maximum(block_b, block_l) / d[:, None])[:, None, :]
+        shortening = (length[None, :] / (area[:, None] * self.concrete_modulus))[:, :, None] / n_piles
+        settlement_per_kn = 1000 * shortening * amplification  # mm per kN of cap load
+        base_settlement_ratio = 1000 * (d / 100)[:, None, None] * amplification * np.ones_like(capacity)
+
+        # Cost: piles plus cap (150 mm edge distance beyond pile faces)
+        cap_thickness = np.maximum(0.6, 2.0 * d)[:, None]
+        cap_volume = (block_b + 0.3) * (block_l + 0.3) * cap_thickness  # (D × K)
+        pile_volume = area[:, None, None] * length[None, :, None] * n_piles[None, None, :]
+        cost = (
+            pile_volume * self.rates["pile_concrete"] +
+            cap_volume[:, None, :] * self.rates["cap_concrete"]
+        )
+
+        return {
+            "single_ultimate": q_single,
+            "efficiency": efficiency,
+            "capacity": capacity,
+            "settlement_per_kn": settlement_per_kn,
+            "base_settlement_ratio": base_settlement_ratio,
+            "cost": cost
+        }
+
+    def optimize(
+        self,
+        caps: List[Dict],
+        soil_profiles: Dict[str, Dict],
+        diameters: List[float],
+        lengths: List[float],
+        layouts: Optional[List[Tuple[int, int]]] = None,
+        pile_type: str = "bored"
+    ) -> Dict:
+        """
+        Cheapest feasible pile group for every cap.
+
+        caps: [{"cap_id", "axial_load" (kN), "profile_id"}, ...]
+        soil_profiles: {profile_id: {"water_table_depth",
+                        "layers": [{"thickness", "soil_type", "cohesion",
+                                    "friction_angle", "unit_weight"}]}}
+        """
+        layouts = [tuple(layout) for layout in (layouts or DEFAULT_LAYOUTS)]
+        loads = np.array([cap["axial_load"] for cap in caps], dtype=float)
+        if not np.all(np.isfinite(loads)) or np.any(loads <= 0):
+            raise ValueError("Cap axial loads must be positive")
+        missing = {cap["profile_id"] for cap in caps} - set(soil_profiles)
+        if missing:
+            raise ValueError(f"Unknown soil profile(s): {', '.join(sorted(map(str, missing)))}")
+
+        shape = (len(diameters), len(lengths), len(layouts))
+        results: List[Optional[Dict]] = [None] * len(caps)
+
+        by_profile: Dict[str, List[int]] = {}
+        for i, cap in enumerate(caps):
+            by_profile.setdefault(cap["profile_id"], []).append(i)
+
+        jobs, owners, tables = [], [], {}
+        for profile_id, members in by_profile.items():
+            table = self.evaluate_profile(
+                soil_profiles[profile_id], diameters, lengths, layouts, pile_type
+            )
+            tables[profile_id] = table
+            loads = np.array([caps[i]["axial_load"] for i in members], dtype=float)
+            for chunk in np.array_split(np.arange(len(members)), max(1, len(members) // PARALLEL_THRESHOLD)):
+                jobs.append((
+                    loads[chunk], table["capacity"], table["settlement_per_kn"],
+                    table["base_settlement_ratio"], table["cost"], self.allowable_settlement
+                ))
+                owners.append((profile_id, [members[j] for j in chunk]))
+
+        if len(caps) >= PARALLEL_THRESHOLD and self.max_workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                outcomes = list(pool.map(_select_chunk, jobs))
+        else:
+            outcomes = [_select_cheapest(*job) for job in jobs]
+
+        for (profile_id, members), (best, settlement, feasible) in zip(owners, outcomes):
+            table = tables[profile_id]
+            for cap_index, flat, s_mm, ok in zip(members, best, settlement, feasible):
+                cap = caps[cap_index]
+                if not ok:
+                    results[cap_index] = {
+                        "cap_id": cap.get("cap_id", cap_index),
+                        "axial_load": cap["axial_load"],
+                        "feasible": False,
+                        "recommendation": "No configuration in the sweep works; extend lengths, diameters or layouts"
+                    }
+                    continue
+                i, j, k = np.unravel_index(int(flat), shape)
+                rows, cols = layouts[k]
+                results[cap_index] = {
+                    "cap_id": cap.get("cap_id", cap_index),
+                    "axial_load": cap["axial_load"],
+                    "feasible": True,
+                    "pile_diameter": float(diameters[i]),
+                    "pile_length": float(lengths[j]),
+                    "layout": f"{rows} x {cols}",
+                    "number_of_piles": rows * cols,
+                    "pile_spacing": round(self.spacing_ratio * float(diameters[i]), 3),
+                    "single_pile_safe_capacity": round(
+                        float(table["single_ultimate"][i, j]) / self.factor_of_safety, 2
+                    ),
+                    "group_efficiency": round(float(table["efficiency"][i, j, k]), 3),
+                    "group_safe_capacity": round(float(table["capacity"][i, j, k]), 2),
+                    "settlement_mm": round(float(s_mm), 2),
+                    "cost": round(float(table["cost"][i, j, k]), 2)
+                }
+
+        feasible_costs = [r["cost"] for r in results if r["feasible"]]
+        return {
+            "caps": results,
+            "total_caps": len(caps),
+            "feasible_caps": len(feasible_costs),
+            "total_cost": round(sum(feasible_costs), 2),
+            "configurations_per_cap": int(np.prod(shape)),
+            "factor_of_safety": self.factor_of_safety,
+            "allowable_settlement_mm": self.allowable_settlement,
+            "code_standard": "IS 2911:2010"
+        }
@@ -2,7 +2,12 @@
 Quick Actions Service - Time-saving automated workflows
 """
 
-from typing import Dict, List, Optional
+import os
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
 from sqlalchemy.orm import Session
 from app.models.project import Project
@@ -13,66 +18,114 @@ from app.models.document import Document
 from app.services.document_generator import DocumentGenerator
 from app.services.blueprint_generator import BlueprintGenerator
 
+CALCULATION_BATCH_SIZE = 100
+# Packages with fewer documents are rendered in-process
+PARALLEL_THRESHOLD = 16
+ZIP_STREAM_CHUNK_SIZE = 64 * 1024
+
+class _ZipStreamSink:
+    """
+    Write-only, non-seekable file object for zipfile. zipfile falls back to
+    data descriptors for unseekable output, so finished bytes can be handed
+    out as soon as they are written.
+    """
+    
+    def __init__(self):
+        self._buffer = bytearray()
+        self._offset = 0
+    
+    def write(self, data) -> int:
+        self._buffer += data
+        self._offset += len(data)
+        return len(data)
+    
+    def tell(self) -> int:
+        return self._offset
+    
+    def flush(self):
+        pass
+    
+    def pending(self) -> int:
+        return len(self._buffer)
+    
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+def _render_document(renderer: str, payload: Tuple) -> bytes:
+    """Render one document from plain data; runs in pool workers"""
+    if renderer in ("blueprint_plan", "blueprint_elevation"):
+        blueprint_gen = BlueprintGenerator()
+        if renderer == "blueprint_plan":
+            return blueprint_gen.generate_structural_plan(*payload)
+        return blueprint_gen.generate_elevation_view(*payload)
+    
+    doc_gen = DocumentGenerator()
+    if renderer == "calculation_sheet":
+        return doc_gen.generate_calculation_sheet(*payload)
+    if renderer == "boq":
+        return doc_gen.generate_boq_pdf(*payload)
+    if renderer == "cost_estimate":
+        return doc_gen.generate_cost_estimate_pdf(*payload)
+    raise ValueError(f"Unknown document renderer: {renderer}")
+
 class QuickActionsService:
     """Quick Actions Service - Automated workflows to save time"""
     
-    def __init__(self, db_session: Session):
+    def __init__(self, db_session: Session, max_workers: Optional[int] = None):
         self.db = db_session
+        self.max_workers = max_workers or os.cpu_count() or 1
     
-    def generate_project_package(
+    def _render_jobs(
         self,
-        project_id: int,
-        include_calculations: bool = True,
-        include_boq: bool = True,
-        include_cost: bool = True,
-        include_blueprints: bool = True
-    ) -> Dict:
+        project: Project,
+        include_calculations: bool,
+        include_boq: bool,
+        include_cost: bool,
+        include_blueprints: bool
+    ) -> Iterator[Tuple]:
         """
-        Generate complete project package - All documents in one go
-        Saves hours of manual work!
+        Plain-data render jobs (type, name, renderer, payload) in package order.
+        Completed calculations are read once, in batches, for both the
+        calculation sheets and the blueprints.
         """
-        project = self.db.query(Project).filter(Project.id == project_id).first()
-        if not project:
-            return {"error": "Project not found"}
-        
-        package = {
-            "project_id": project_id,
-            "project_name": project.project_name,
-            "generated_at": None,
-            "documents": []
-        }
-        
-        doc_gen = DocumentGenerator()
-        blueprint_gen = BlueprintGenerator()
-        
+        project_id = project.id
         project_data = {
             "project_name": project.project_name,
             "project_code": project.project_code,
             "date": project.created_at.isoformat() if project.created_at else "N/A"
         }
         
-        # Generate calculation sheets
-        if include_calculations:
+        blueprint_calcs = []
+        if include_calculations or include_blueprints:
             calculations = self.db.query(Calculation).filter(
                 Calculation.project_id == project_id,
                 Calculation.status == "completed"
-            ).all()
+            ).yield_per(CALCULATION_BATCH_SIZE)
             
             for calc in calculations:
-                calc_data = {
-                    "calculation_code": calc.calculation_code,
-                    "input_parameters": calc.input_parameters,
-                    "design_outputs": calc.design_outputs,
-                    "compliance_status": calc.compliance_status
-                }
-                pdf_bytes = doc_gen.generate_calculation_sheet(calc_data, project_data)
-                package["documents"].append({
-                    "type": "calculation_sheet",
-                    "name": f"Calculation_{calc.calculation_code}.pdf",
-                    "data": pdf_bytes
-                })
+                if include_blueprints:
+                    blueprint_calcs.append({
+                        "calculation_type": calc.calculation_type.value,
+                        "design_outputs": calc.design_outputs or {},
+                        "input_parameters": calc.input_parameters or {}
+                    })
+                if include_calculations:
+                    calc_data = {
+                        "calculation_code": calc.calculation_code,
+                        "input_parameters": calc.input_parameters,
+                        "design_outputs": calc.design_outputs,
+                        "compliance_status": calc.compliance_status
+                    }
+                    yield (
+                        "calculation_sheet",
+                        f"Calculation_{calc.calculation_code}.pdf",
+                        "calculation_sheet",
+                        (calc_data, project_data)
+                    )
         
-        # Generate BOQ
+        # BOQ
         if include_boq:
             boq = self.db.query(BOQ).filter(BOQ.project_id == project_id).first()
             if boq:
@@ -88,14 +141,9 @@ class QuickActionsService:
                         for item in boq.items
                     ]
                 }
-                pdf_bytes = doc_gen.generate_boq_pdf(boq_data, project_data)
-                package["documents"].append({
-                    "type": "boq",
-                    "name": f"BOQ_{boq.boq_code}.pdf",
-                    "data": pdf_bytes
-                })
+                yield ("boq", f"BOQ_{boq.boq_code}.pdf", "boq", (boq_data, project_data))
         
-        # Generate cost estimate
+        # Cost estimate
         if include_cost:
             estimate = self.db.query(CostEstimate).filter(
                 CostEstimate.project_id == project_id
@@ -121,44 +169,93 @@ class QuickActionsService:
                         for item in estimate.items
                     ]
                 }
-                pdf_bytes = doc_gen.generate_cost_estimate_pdf(estimate_data, project_data)
-                package["documents"].append({
-                    "type": "cost_estimate",
-                    "name": f"CostEstimate_{estimate.estimate_code}.pdf",
-                    "data": pdf_bytes
-                })
+                yield (
+                    "cost_estimate",
+                    f"CostEstimate_{estimate.estimate_code}.pdf",
+                    "cost_estimate",
+                    (estimate_data, project_data)
+                )
         
-        # Generate blueprints
-        if include_blueprints:
-            calculations = self.db.query(Calculation).filter(
-                Calculation.project_id == project_id,
-                Calculation.status == "completed"
-            ).all()
-            
-            if calculations:
-                calc_data = [
-                    {
-                        "calculation_type": calc.calculation_type.value,
-                        "design_outputs": calc.design_outputs or {}
-                    }
-                    for calc in calculations
-                ]
-                
-                # Plan view
-                pdf_bytes = blueprint_gen.generate_structural_plan(project_data, calc_data, "A2")
-                package["documents"].append({
-                    "type": "blueprint_plan",
-                    "name": f"Blueprint_Plan_{project.project_code}.pdf",
-                    "data": pdf_bytes
-                })
-                
-                # Elevation view
-                pdf_bytes = blueprint_gen.generate_elevation_view(project_data, calc_data, "A2")
-                package["documents"].append({
-                    "type": "blueprint_elevation",
-                    "name": f"Blueprint_Elevation_{project.project_code}.pdf",
-                    "data": pdf_bytes
-                })
+        # Blueprints (plan and elevation views)
+        if include_blueprints and blueprint_calcs:
+            yield (
+                "blueprint_plan",
+                f"Blueprint_Plan_{project.project_code}.pdf",
+                "blueprint_plan",
+                (project_data, blueprint_calcs, "A2")
+            )
+            yield (
+                "blueprint_elevation",
+                f"Blueprint_Elevation_{project.project_code}.pdf",
+                "blueprint_elevation",
+                (project_data, blueprint_calcs, "A2")
+            )
+    
+    def iter_project_documents(
+        self,
+        project: Project,
+        include_calculations: bool = True,
+        include_boq: bool = True,
+        include_cost: bool = True,
+        include_blueprints: bool = True
+    ) -> Iterator[Dict]:
+        """
+        Generate project documents one at a time ({"type", "name", "data"}),
+        in package order. Large packages are rendered on a process pool with a
+        bounded number of documents in flight, so callers never hold more than
+        a few PDFs in memory.
+        """
+        jobs = self._render_jobs(
+            project, include_calculations, include_boq, include_cost, include_blueprints
+        )
+        
+        # Only pay for worker start-up when the package is large
+        head = list(islice(jobs, PARALLEL_THRESHOLD))
+        if len(head) < PARALLEL_THRESHOLD or self.max_workers <= 1:
+            for doc_type, name, renderer, payload in chain(head, jobs):
+                yield {"type": doc_type, "name": name, "data": _render_document(renderer, payload)}
+            return
+        
+        window = self.max_workers * 2
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            for doc_type, name, renderer, payload in chain(head, jobs):
+                pending.append((doc_type, name, pool.submit(_render_document, renderer, payload)))
+                if len(pending) >= window:
+                    doc_type, name, future = pending.popleft()
+                    yield {"type": doc_type, "name": name, "data": future.result()}
+            while pending:
+                doc_type, name, future = pending.popleft()
+                yield {"type": doc_type, "name": name, "data": future.result()}
+    
+    def generate_project_package(
+        self,
+        project_id: int,
+        include_calculations: bool = True,
+        include_boq: bool = True,
+        include_cost: bool = True,
+        include_blueprints: bool = True
+    ) -> Dict:
+        """
+        Generate complete project package - All documents in one go
+        Saves hours of manual work!
+        """
+        project = self.db.query(Project).filter(Project.id == project_id).first()
+        if not project:
+            return {"error": "Project not found"}
+        
+        package = {
+            "project_id": project_id,
+            "project_name": project.project_name,
+            "generated_at": None,
+            "documents": list(self.iter_project_documents(
+                project,
+                include_calculations,
+                include_boq,
+                include_cost,
+                include_blueprints
+            ))
+        }
         
         package["generated_at"] = datetime.utcnow().isoformat()
         
@@ -217,6 +314,33 @@ class QuickActionsService:
             "default_materials": template["default_materials"]
         }
     
+    def stream_project_documents_zip(
+        self,
+        project_id: int,
+        chunk_size: int = ZIP_STREAM_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        """
+        Export all project documents as a ZIP stream. Each document is
+        generated, compressed into the archive and flushed to the caller before
+        the next one is built, so memory stays flat regardless of project size.
+        """
+        project = self.db.query(Project).filter(Project.id == project_id).first()
+        if not project:
+            raise ValueError("Project not found")
+        
+        sink = _ZipStreamSink()
+        with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as zip_file:
+            for doc in self.iter_project_documents(project):
+                with zip_file.open(doc["name"], "w") as entry:
+                    data = memoryview(doc["data"])
+                    for start in range(0, len(data), chunk_size):
+                        entry.write(data[start:start + chunk_size])
+                        if sink.pending() >= chunk_size:
+                            yield sink.drain()
+                yield sink.drain()
+        # Central directory is written on close
+        yield sink.drain()
+    
     def bulk_export_project_documents(
         self,
         project_id: int,
@@ -226,17 +350,6 @@ class QuickActionsService:
         Export all project documents as ZIP file
         One-click export saves hours!
         """
-        import zipfile
-        import io
-        
-        package = self.generate_project_package(project_id)
-        
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            for doc in package["documents"]:
-                zip_file.writestr(doc["name"], doc["data"])
-        
-        zip_buffer.seek(0)
-        return zip_buffer.getvalue()
+        return b"".join(self.stream_project_documents_zip(project_id))
 
 from datetime import datetime
@@ -0,0 +1,227 @@
+"""
+Rate Books - Versioned Schedule of Rates loaded into an in-memory index
+
+A rate book holds one SOR edition (authority/region + version, e.g. "CPWD"
+"2023-2024"). Lookups are exact first, then wildcard entries published in the
+SOR (e.g. "STL-*"), then the longest hierarchical prefix of the item code
+("CONC-M25-001" -> "CONC-M25" -> "CONC"). Books are cached per process and
+dropped whenever ScheduleOfRates rows are written through a session.
+"""
+
+import re
+import threading
+import time
+from bisect import bisect_left
+from fnmatch import translate
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from app.models.cost import ScheduleOfRates
+
+WILDCARD_CHARS = "*?["
+SEGMENT_SEPARATORS = re.compile(r"[-./]")
+
+# Upper bound on how long another worker process can serve a book after an
+# SOR edit it did not see itself
+RATE_BOOK_TTL = 300.0  # seconds
+
+
+def normalize_code(item_code: str) -> str:
+    return (item_code or "").strip().upper()
+
+
+def _literal_prefix(pattern: str) -> str:
+    for i, ch in enumerate(pattern):
+        if ch in WILDCARD_CHARS:
+            return pattern[:i]
+    return pattern
+
+
+class RateBook:
+    """Immutable index over one SOR edition"""
+
+    def __init__(self, authority: Optional[str], version: Optional[str], rows: List[Tuple]):
+        """
+        rows: (item_code, unit, unit_rate) tuples
+        """
+        self.authority = authority
+        self.version = version
+        self.loaded_at = time.monotonic()
+
+        literal = {}
+        patterns = []
+        for item_code, unit, unit_rate in rows:
+            code = normalize_code(item_code)
+            if any(ch in code for ch in WILDCARD_CHARS):
+                patterns.append((code, unit, float(unit_rate)))
+            else:
+                literal[code] = (unit, float(unit_rate))
+
+        self._codes = sorted(literal)
+        self._units = [literal[code][0] for code in self._codes]
+        self._rates = [literal[code][1] for code in self._codes]
+        self._index = {code: i for i, code in enumerate(self._codes)}
+
+        # Most specific wildcard first: longest literal prefix, then longest pattern
+        patterns.sort(key=lambda p: (len(_literal_prefix(p[0])), len(p[0])), reverse=True)
+        self._patterns = [
+            (re.compile(translate(code)), code, unit, rate)
+            for code, unit, rate in patterns
+        ]
+        self._resolved: Dict[str, Optional[Dict]] = {}
+
+    def __len__(self) -> int:
+        return len(self._codes) + len(self._patterns)
+
+    def _entry(self, position: int, match: str) -> Dict:
+        return {
+            "sor_item_code": self._codes[position],
+            "unit": self._units[position],
+            "unit_rate": self._rates[position],
+            "match": match
+        }
+
+    def _resolve(self, code: str) -> Optional[Dict]:
+        position = self._index.get(code)
+        if position is not None:
+            return self._entry(position, "exact")
+
+        for regex, pattern, unit, rate in self._patterns:
+            if regex.match(code):
+                return {"sor_item_code": pattern, "unit": unit, "unit_rate": rate, "match": "wildcard"}
+
+        # Walk back one code segment at a time
+        cuts = [m.start() for m in SEGMENT_SEPARATORS.finditer(code)]
+        for cut in reversed(cuts):
+            position = self._index.get(code[:cut])
+            if position is not None:
+                return self._entry(position, "prefix")
+        return None
+
+    def lookup(self, item_code: str) -> Optional[Dict]:
+        """Best SOR entry for an item code, or None if the book has no match"""
+        code = normalize_code(item_code)
+        if code not in self._resolved:
+            self._resolved[code] = self._resolve(code)
+        return self._resolved[code]
+
+    def search(self, pattern: str, limit: int = 100) -> List[Dict]:
+        """
+        Entries whose code matches a wildcard pattern (e.g. "CONC-M2*").
+        Only the slice sharing the pattern's literal prefix is scanned.
+        """
+        pattern = normalize_code(pattern)
+        prefix = _literal_prefix(pattern)
+        regex = re.compile(translate(pattern))
+        results = []
+        for position in range(bisect_left(self._codes, prefix), len(self._codes)):
+            code = self._codes[position]
+            if not code.startswith(prefix):
+                break
+            if regex.match(code):
+                results.append(self._entry(position, "exact"))
+                if len(results) >= limit:
+                    break
+        return results
+
+
+class RateBookRegistry:
+    """Process-wide cache of rate books keyed by (authority, version)"""
+
+    def __init__(self, ttl: float = RATE_BOOK_TTL):
+        self.ttl = ttl
+        self._books: Dict[Tuple[Optional[str], Optional[str]], RateBook] = {}
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, authority: Optional[str] = None, version: Optional[str] = None) -> RateBook:
+        """
+        Rate book for an SOR edition. version=None selects the latest active
+        version for the authority. Loads with a single query on a cache miss.
+        """
+        key = (authority, version)
+        book = self._books.get(key)
+        if book is not None and time.monotonic() - book.loaded_at < self.ttl:
+            return book
+
+        with self._lock:
+            book = self._books.get(key)
+            if book is not None and time.monotonic() - book.loaded_at < self.ttl:
+                return book
+            book = self._load(db, authority, version)
+            self._books[key] = book
+            return book
+
+    def _load(self, db: Session, authority: Optional[str], version: Optional[str]) -> RateBook:
+        filters = [ScheduleOfRates.is_active == True]
+        if authority is not None:
+            filters.append(ScheduleOfRates.authority == authority)
+        if version is None:
+            version = db.execute(
+                select(func.max(ScheduleOfRates.version)).where(*filters)
+            ).scalar()
+        filters.append(ScheduleOfRates.version == version)
+
+        rows = db.execute(
+            select(ScheduleOfRates.item_code, ScheduleOfRates.unit, ScheduleOfRates.unit_rate)
+            .where(*filters)
+            .order_by(ScheduleOfRates.id)
+        ).all()
+        return RateBook(authority, version, rows)
+
+    def invalidate(self, authority: Optional[str] = None) -> None:
+        """Drop cached books for one authority, or all books when authority is None"""
+        with self._lock:
+            if authority is None:
+                self._books.clear()
+            else:
+                # Books loaded without an authority filter span every authority
+                for key in [k for k in self._books if k[0] in (authority, None)]:
+                    del self._books[key]
+
+
+rate_books = RateBookRegistry()
+
+
+# Invalidate on SOR edits made through any ORM session. Changes are recorded
+# at flush and applied again after commit/rollback so a book loaded from
+# uncommitted rows in between is never kept.
+_PENDING_KEY = "sor_invalidate"
+
+
+def _mark_pending(session: Session, authorities) -> None:
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    pending.update(authorities)
+    for authority in authorities:
+        rate_books.invalidate(authority)
+
+
+@event.listens_for(Session, "after_flush")
+def _sor_after_flush(session, flush_context):
+    authorities = {
+        obj.authority
+        for obj in (*session.new, *session.dirty, *session.deleted)
+        if isinstance(obj, ScheduleOfRates)
+    }
+    if authorities:
+        _mark_pending(session, authorities)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _sor_bulk_statement(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ is ScheduleOfRates:
+        # Bulk statements don't say which authorities they touch
+        _mark_pending(orm_execute_state.session, {None})
+
+
+def _apply_pending(session):
+    for authority in session.info.pop(_PENDING_KEY, ()):
+        rate_books.invalidate(authority)
+
+
+event.listen(Session, "after_commit", _apply_pending)
+event.listen(Session, "after_soft_rollback", lambda session, previous_transaction: _apply_pending(session))
@@ -0,0 +1,178 @@
+"""
+Render Cache - Size-bounded on-disk LRU cache of rendered documents
+
+Entries are keyed by a hash of the document kind, the generator's template
+version and the exact input data, so any change to the inputs or templates
+produces a new key and stale renders are simply never looked up again.
+Each file is stored as <key>.<etag>, where the ETag is a hash of the rendered
+bytes, so validators can be answered without opening the file.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, BinaryIO, Optional, Tuple
+
+from app.core.config import settings
+
+
+def _fingerprint(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+class RenderCache:
+    """
+    LRU over files in one directory. The index lives in memory and is rebuilt
+    from the directory (oldest modification first) on first use. Several worker
+    processes may share the directory; a file evicted by another process is
+    treated as a miss.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._index: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()  # key -> (etag, size)
+        self._total = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(kind: str, template_version: str, payload: Any) -> str:
+        """Cache key for a document kind, template version and input data"""
+        blob = json.dumps(
+            {"kind": kind, "template_version": template_version, "payload": payload},
+            sort_keys=True, default=str, separators=(",", ":")
+        )
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str, etag: str) -> Path:
+        return self.directory / f"{key}.{etag}"
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entries = []
+        for path in self.directory.iterdir():
+            key, _, etag = path.name.partition(".")
+            if not etag or etag.startswith("tmp"):
+                continue
+            stat = path.stat()
+            entries.append((stat.st_mtime, key, etag, stat.st_size))
+        for _, key, etag, size in sorted(entries):
+            self._index[key] = (etag, size)
+            self._total += size
+        self._loaded = True
+
+    def _drop(self, key: str):
+        etag, size = self._index.pop(key)
+        self._total -= size
+        try:
+            self._path(key, etag).unlink()
+        except FileNotFoundError:
+            pass
+
+    def lookup(self, key: str) -> Optional[str]:
+        """ETag of a cached render, marking it most recently used"""
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            self._index.move_to_end(key)
+            etag = entry[0]
+        try:
+            os.utime(self._path(key, etag))
+        except FileNotFoundError:
+            with self._lock:
+                if key in self._index:
+                    self._drop(key)
+            return None
+        return etag
+
+    def read(self, key: str, etag: str) -> Optional[bytes]:
+        try:
+            return self._path(key, etag).read_bytes()
+        except FileNotFoundError:
+            with self._lock:
+                if key in self._index:
+                    self._drop(key)
+            return None
+
+    def path_of(self, key: str) -> Optional[Path]:
+        """Path of a cached file, marking it most recently used"""
+        etag = self.lookup(key)
+        return self._path(key, etag) if etag else None
+
+    def open(self, key: str) -> Optional[BinaryIO]:
+        """
+        Open a cached file for reading, marking it most recently used. The
+        handle stays readable if the entry is evicted meanwhile.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            self._index.move_to_end(key)
+            path = self._path(key, entry[0])
+            try:
+                f = open(path, "rb")
+            except FileNotFoundError:
+                # Evicted by another process
+                self._drop(key)
+                return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return f
+
+    def temp_path(self, key: str) -> Path:
+        """Scratch file in the cache directory for a file later passed to store_file"""
+        with self._lock:
+            self._ensure_loaded()
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=f"{key}.tmp")
+        os.close(fd)
+        return Path(tmp)
+
+    def _insert(self, key: str, etag: str, size: int):
+        if key in self._index:
+            old_etag, old_size = self._index.pop(key)
+            self._total -= old_size
+            if old_etag != etag:
+                self._path(key, old_etag).unlink(missing_ok=True)
+        self._index[key] = (etag, size)
+        self._total += size
+
+        while self._total > self.max_bytes and len(self._index) > 1:
+            self._drop(next(iter(self._index)))
+
+    def store(self, key: str, data: bytes) -> str:
+        """Write a render atomically and evict least recently used entries"""
+        etag = _fingerprint(data)
+        with self._lock:
+            self._ensure_loaded()
+            fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=f"{key}.tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self._path(key, etag))
+            self._insert(key, etag, len(data))
+        return etag
+
+    def store_file(self, key: str, source: Path, etag: str) -> Path:
+        """Move a finished file into the cache and evict least recently used entries"""
+        with self._lock:
+            self._ensure_loaded()
+            path = self._path(key, etag)
+            shutil.move(str(source), str(path))
+            self._insert(key, etag, path.stat().st_size)
+        return path
+
+
+render_cache = RenderCache(settings.RENDER_CACHE_DIR, settings.RENDER_CACHE_MAX_BYTES)
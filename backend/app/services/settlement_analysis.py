@@ -0,0 +1,348 @@
+"""
+Foundation Plan Settlement Engine - Stress superposition from all footings
+(Boussinesq / Westergaard) and layered consolidation settlement, with total and
+differential settlement checks for whole foundation plans
+"""
+
+from typing import Dict, List, Optional, Tuple
+import math
+
+import numpy as np
+
+GAMMA_WATER = 9.81  # kN/m³
+
+# Pair blocks evaluated at once; bounds peak memory at roughly
+# PAIR_BLOCK × sublayers × 8 bytes per temporary.
+PAIR_BLOCK = 100000
+MAX_GRID_POINTS = 250000  # settlement grid nodes per plan
+
+
+def _corner_influence_boussinesq(a: np.ndarray, b: np.ndarray, z: np.ndarray) -> np.ndarray:
+    """
+    Boussinesq influence factor under the corner of a uniformly loaded a × b
+    rectangle at depth z. Odd in a and b, so signed sides superpose directly.
+    """
+    a2, b2, z2 = a * a, b * b, z * z
+    r = np.sqrt(a2 + b2 + z2)
+    return (
+        a * b * z * (a2 + b2 + 2 * z2) / ((a2 + z2) * (b2 + z2) * r) +
+        np.arctan(a * b / (z * r))
+    ) / (2 * math.pi)
+
+
+def _corner_influence_westergaard(
+    a: np.ndarray, b: np.ndarray, z: np.ndarray, poisson_ratio: float = 0.0
+) -> np.ndarray:
+    """Westergaard corner influence factor (laminated soils)"""
+    eta2 = (1 - 2 * poisson_ratio) / (2 - 2 * poisson_ratio)
+    with np.errstate(divide="ignore"):
+        m2 = (a / z) ** 2
+        n2 = (b / z) ** 2
+        inner = np.sqrt(eta2 * (1 / m2 + 1 / n2) + eta2 ** 2 / (m2 * n2))
+    value = np.arctan(1 / inner) / (2 * math.pi)
+    return np.sign(a) * np.sign(b) * np.nan_to_num(value)
+
+
+def stress_increase(
+    px: np.ndarray,
+    py: np.ndarray,
+    z: np.ndarray,
+    x1: np.ndarray,
+    x2: np.ndarray,
+    y1: np.ndarray,
+    y2: np.ndarray,
+    pressure: np.ndarray,
+    method: str = "boussinesq"
+) -> np.ndarray:
+    """
+    Vertical stress increase at (px, py, z) below a rectangle [x1, x2] × [y1, y2]
+    carrying pressure, by corner superposition. All arguments broadcast.
+    """
+    corner = _corner_influence_westergaard if method == "westergaard" else _corner_influence_boussinesq
+    z = np.maximum(z, 1e-3)
+    influence = (
+        corner(x2 - px, y2 - py, z) - corner(x1 - px, y2 - py, z) -
+        corner(x2 - px, y1 - py, z) + corner(x1 - px, y1 - py, z)
+    )
+    return pressure * influence
+
+
+def neighbour_pairs(
+    tx: np.ndarray, ty: np.ndarray, sx: np.ndarray, sy: np.ndarray, cutoff
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    All (target, source) index pairs with the target within the source's
+    cutoff (a distance, or one per source). Each source is registered in the
+    cells of a uniform grid that its cutoff circle touches, so each target
+    only visits the sources registered in its own cell; a large source covers
+    more cells instead of enlarging every cell.
+    """
+    radius = np.broadcast_to(np.asarray(cutoff, dtype=float), np.shape(sx))
+    if len(radius) == 0 or len(tx) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    # Cells of a typical cutoff, but coarse enough that the largest spans at most ~128 × 128
+    cell = max(float(np.median(radius)), float(radius.max()) / 64, 1e-6)
+
+    x0 = np.floor((sx - radius) / cell).astype(np.int64)
+    y0 = np.floor((sy - radius) / cell).astype(np.int64)
+    nx = np.floor((sx + radius) / cell).astype(np.int64) - x0 + 1
+    ny = np.floor((sy + radius) / cell).astype(np.int64) - y0 + 1
+    counts = nx * ny
+    owner = np.repeat(np.arange(len(sx)), counts)
+    k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    scx = x0[owner] + k // ny[owner]
+    scy = y0[owner] + k % ny[owner]
+
+    order = np.lexsort((scy, scx))
+    keys = np.stack([scx[order], scy[order]], axis=1)
+    unique, starts = np.unique(keys, axis=0, return_index=True)
+    ends = np.append(starts[1:], len(order))
+    buckets = {(int(c[0]), int(c[1])): owner[order[s:e]] for c, s, e in zip(unique, starts, ends)}
+
+    tcx = np.floor(tx / cell).astype(np.int64)
+    tcy = np.floor(ty / cell).astype(np.int64)
+    t_order = np.lexsort((tcy, tcx))
+    t_keys = np.stack([tcx[t_order], tcy[t_order]], axis=1)
+    t_unique, t_starts = np.unique(t_keys, axis=0, return_index=True)
+    t_ends = np.append(t_starts[1:], len(t_order))
+
+    targets, sources = [], []
+    for (cx, cy), s, e in zip(t_unique, t_starts, t_ends):
+        candidates = buckets.get((int(cx), int(cy)))
+        if candidates is None:
+            continue
+        members = t_order[s:e]
+        t = np.repeat(members, len(candidates))
+        c = np.tile(candidates, len(members))
+        near = np.hypot(tx[t] - sx[c], ty[t] - sy[c]) <= radius[c]
+        targets.append(t[near])
+        sources.append(c[near])
+
+    if not targets:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(targets), np.concatenate(sources)
+
+
+class FoundationSettlementEngine:
+    """Total and differential settlement of a foundation plan"""
+
+    def __init__(
+        self,
+        method: str = "boussinesq",
+        sublayer_thickness: float = 0.5,
+        max_depth: float = 30.0,
+        allowable_settlement: float = 50.0,  # mm, IS 1904 isolated footings
+        allowable_angular_distortion: float = 1 / 500
+    ):
+        if method not in ("boussinesq", "westergaard"):
+            raise ValueError(f"Unsupported stress distribution: {method}")
+        self.method = method
+        self.sublayer_thickness = sublayer_thickness
+        self.max_depth = max_depth
+        self.allowable_settlement = allowable_settlement
+        self.allowable_angular_distortion = allowable_angular_distortion
+
+    def _sublayers(self, soil_layers: List[Dict], water_table_depth: Optional[float]) -> Dict:
+        """Discretize the soil profile into sublayers with in-situ stresses"""
+        mids, thick, idx = [], [], []
+        top = 0.0
+        for k, layer in enumerate(soil_layers):
+            bottom = min(top + layer.get("thickness", self.max_depth - top), self.max_depth)
+            if bottom <= top:
+                break
+            n = max(1, int(math.ceil((bottom - top) / self.sublayer_thickness)))
+            edges = np.linspace(top, bottom, n + 1)
+            mids.extend(0.5 * (edges[:-1] + edges[1:]))
+            thick.extend(np.diff(edges))
+            idx.extend([k] * n)
+            top = bottom
+
+        z = np.array(mids)
+        h = np.array(thick)
+        idx = np.array(idx)
+
+        def prop(name, default=0.0):
+            return np.array([layer.get(name, default) for layer in soil_layers], dtype=float)[idx]
+
+        gamma = prop("unit_weight", 18.0)
+        water = np.inf if water_table_depth is None else water_table_depth
+        gamma_eff = gamma - GAMMA_WATER * (z >= water)
+        sigma0 = np.cumsum(gamma_eff * h) - 0.5 * gamma_eff * h
+
+        ocr = prop("ocr", 1.0)
+        preconsolidation = np.array(
+            [layer.get("preconsolidation_pressure", np.nan) for layer in soil_layers], dtype=float
+        )[idx]
+        sigma_p = np.where(np.isnan(preconsolidation), sigma0 * ocr, preconsolidation)
+
+        consolidating = np.array(
+            ["compression_index" in layer for layer in soil_layers], dtype=bool
+        )[idx]
+        return {
+            "z": z, "h": h, "sigma0": np.maximum(sigma0, 1e-3), "sigma_p": sigma_p,
+            "cc": prop("compression_index"), "cr": prop("recompression_index"),
+            "e0": prop("void_ratio", 1.0), "modulus": prop("elastic_modulus", 20000.0),
+            "consolidating": consolidating
+        }
+
+    def _settlement(self, delta: np.ndarray, soil: Dict, below: np.ndarray) -> np.ndarray:
+        """Sum sublayer compression (m) for stress increases (points × sublayers)"""
+        s0, sp = soil["sigma0"][None, :], soil["sigma_p"][None, :]
+        final = s0 + np.maximum(delta, 0.0)
+        factor = soil["h"][None, :] / (1 + soil["e0"][None, :])
+        recompression = soil["cr"][None, :] * np.log10(np.minimum(final, np.maximum(sp, s0)) / s0)
+        virgin = soil["cc"][None, :] * np.log10(np.maximum(final, sp) / np.maximum(sp, s0))
+        consolidation = factor * (recompression + virgin)
+        elastic = np.maximum(delta, 0.0) * soil["h"][None, :] / soil["modulus"][None, :]
+        per_layer = np.where(soil["consolidating"][None, :], consolidation, elastic)
+        return (per_layer * below).sum(axis=1)
+
+    def _stress_at(
+        self,
+        px: np.ndarray,
+        py: np.ndarray,
+        pdepth: np.ndarray,
+        footings: Dict,
+        soil: Dict,
+        cutoff
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Stress increase (points × sublayers) from every footing within its cutoff.
+        Returns (delta, target_idx, source_idx, below_mask).
+        """
+        targets, sources = neighbour_pairs(px, py, footings["cx"], footings["cy"], cutoff)
+        delta = np.zeros((len(px), len(soil["z"])))
+        z = soil["z"][None, :]
+        for start in range(0, len(targets), PAIR_BLOCK):
+            t = targets[start:start + PAIR_BLOCK]
+            s = sources[start:start + PAIR_BLOCK]
+            depth_below_source = z - footings["depth"][s][:, None]
+            contribution = stress_increase(
+                px[t][:, None], py[t][:, None], depth_below_source,
+                footings["x1"][s][:, None], footings["x2"][s][:, None],
+                footings["y1"][s][:, None], footings["y2"][s][:, None],
+                footings["pressure"][s][:, None], self.method
+            )
+            contribution = np.where(depth_below_source > 0, contribution, 0.0)
+            np.add.at(delta, t, contribution)
+        below = (z > pdepth[:, None]).astype(float)
+        return delta, targets, sources, below
+
+    def analyze_plan(
+        self,
+        footings: List[Dict],
+        soil_layers: List[Dict],
+        water_table_depth: Optional[float] = None,
+        cutoff_radius: Optional[float] = None,
+        grid_spacing: Optional[float] = None
+    ) -> Dict:
+        """
+        Settlement of every footing including the influence of its neighbours.
+
+        footings: [{"footing_id", "x", "y" (centre, m), "width", "length",
+                    "depth" (founding level, m), "pressure" (net kN/m²) or "load" (kN)}]
+        soil_layers: [{"thickness", "unit_weight", "compression_index",
+                       "recompression_index", "void_ratio", "ocr" or
+                       "preconsolidation_pressure"}]; layers without
+                       compression_index use "elastic_modulus" (kN/m²)
+        cutoff_radius: neighbours further than this are ignored (m); by default
+                       each footing reaches 4 × its larger side plus its depth
+        grid_spacing: optionally also return a settlement grid over the plan (m),
+                      at most MAX_GRID_POINTS nodes
+        """
+        if not footings:
+            raise ValueError("At least one footing is required")
+        if not soil_layers:
+            raise ValueError("At least one soil layer is required")
+        if cutoff_radius is not None and cutoff_radius <= 0:
+            raise ValueError("cutoff_radius must be positive")
+        if grid_spacing is not None and grid_spacing <= 0:
+            raise ValueError("grid_spacing must be positive")
+
+        width = np.array([f["width"] for f in footings], dtype=float)
+        length = np.array([f.get("length", f["width"]) for f in footings], dtype=float)
+        pressure = np.array([
+            f["pressure"] if "pressure" in f else f["load"] / (f["width"] * f.get("length", f["width"]))
+            for f in footings
+        ], dtype=float)
+        cx = np.array([f["x"] for f in footings], dtype=float)
+        cy = np.array([f["y"] for f in footings], dtype=float)
+        depth = np.array([f.get("depth", 1.5) for f in footings], dtype=float)
+        plan = {
+            "cx": cx, "cy": cy, "depth": depth, "pressure": pressure,
+            "x1": cx - width / 2, "x2": cx + width / 2,
+            "y1": cy - length / 2, "y2": cy + length / 2
+        }
+
+        if cutoff_radius is None:
+            # Beyond ~4 footing widths the Boussinesq increment is a few % of q.
+            # Per footing, so one raft does not make every pair interact.
+            cutoff_radius = 4.0 * np.maximum(width, length) + depth
+
+        grid_shape = None
+        if grid_spacing:
+            grid_shape = (
+                int(math.floor((plan["x2"].max() - plan["x1"].min()) / grid_spacing)) + 2,
+                int(math.floor((plan["y2"].max() - plan["y1"].min()) / grid_spacing)) + 2
+            )
+            if grid_shape[0] * grid_shape[1] > MAX_GRID_POINTS:
+                raise ValueError(f"Settlement grid too fine (maximum {MAX_GRID_POINTS} points)")
+
+        soil = self._sublayers(soil_layers, water_table_depth)
+        delta, targets, sources, below = self._stress_at(cx, cy, depth, plan, soil, cutoff_radius)
+        settlement = self._settlement(delta, soil, below) * 1000  # mm
+
+        # Differential settlement and angular distortion between neighbours,
+        # in both directions since cutoffs differ per footing
+        others = targets != sources
+        t = np.concatenate([targets[others], sources[others]])
+        s = np.concatenate([sources[others], targets[others]])
+        distance = np.hypot(cx[t] - cx[s], cy[t] - cy[s])
+        distortion = np.abs(settlement[t] - settlement[s]) / np.maximum(distance, 1e-6)
+        max_distortion = np.zeros(len(footings))
+        np.maximum.at(max_distortion, t, distortion)
+        max_differential = np.zeros(len(footings))
+        np.maximum.at(max_differential, t, np.abs(settlement[t] - settlement[s]))
+
+        results = []
+        for i, f in enumerate(footings):
+            results.append({
+                "footing_id": f.get("footing_id", i),
+                "settlement_mm": round(float(settlement[i]), 2),
+                "max_differential_mm": round(float(max_differential[i]), 2),
+                "max_angular_distortion": round(float(max_distortion[i]), 5),
+                "is_acceptable": bool(
+                    settlement[i] <= self.allowable_settlement and
+                    max_distortion[i] <= self.allowable_angular_distortion
+                )
+            })
+
+        result = {
+            "method": self.method,
+            "footings": results,
+            "max_settlement_mm": round(float(settlement.max()), 2),
+            "max_angular_distortion": round(float(max_distortion.max()), 5),
+            "allowable_settlement_mm": self.allowable_settlement,
+            "allowable_angular_distortion": self.allowable_angular_distortion,
+            "cutoff_radius": round(float(np.max(cutoff_radius)), 2),
+            "interacting_pairs": int(others.sum()),
+            "is_acceptable": all(r["is_acceptable"] for r in results),
+            "code_standard": "IS 1904:1986, IS 8009 (Part 1)"
+        }
+
+        if grid_shape:
+            gx = plan["x1"].min() + np.arange(grid_shape[0]) * grid_spacing
+            gy = plan["y1"].min() + np.arange(grid_shape[1]) * grid_spacing
+            mx, my = np.meshgrid(gx, gy)
+            level = np.full(mx.size, float(depth.min()))
+            grid_delta, _, _, grid_below = self._stress_at(
+                mx.ravel(), my.ravel(), level, plan, soil, cutoff_radius
+            )
+            grid_settlement = self._settlement(grid_delta, soil, grid_below) * 1000
+            result["grid"] = {
+                "x": np.round(gx, 3).tolist(),
+                "y": np.round(gy, 3).tolist(),
+                "settlement_mm": np.round(grid_settlement.reshape(mx.shape), 2).tolist()
+            }
+
+        return result
@@ -0,0 +1,366 @@
+"""
+Slope Stability Engine - Limit equilibrium analysis by the method of slices
+(Bishop simplified and Janbu simplified) with circular slip-surface grid search
+"""
+
+from typing import Dict, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+import math
+import os
+
+import numpy as np
+
+GAMMA_WATER = 9.81  # kN/m³
+
+# Circles below this count are evaluated in-process; spinning up a pool costs
+# more than it saves for small searches.
+PARALLEL_THRESHOLD = 20000
+
+# Upper bounds on a single search, so a request cannot exhaust the worker
+MAX_TRIAL_SURFACES = 100000  # centres × tangent elevations
+MAX_SLICES = 200
+
+# Floor for the Bishop/Janbu m_alpha term. Very small values near the toe of
+# deep circles make the iteration blow up (Whitman & Bailey, 1967).
+MIN_M_ALPHA = 0.2
+
+
+def _build_soil_model(
+    ground_profile: List[Dict],
+    soil_layers: List[Dict],
+    phreatic_surface: Optional[List[Dict]] = None
+) -> Dict:
+    """Convert profile/layer dicts to the plain arrays the slice kernel uses"""
+    gx = np.array([p["x"] for p in ground_profile], dtype=float)
+    gy = np.array([p["y"] for p in ground_profile], dtype=float)
+    order = np.argsort(gx)
+    gx, gy = gx[order], gy[order]
+
+    # The kernel assumes failure moves towards -x (ground rising left to right).
+    # Slopes facing the other way are mirrored.
+    direction = 1.0 if gy[-1] >= gy[0] else -1.0
+
+    layers = sorted(soil_layers, key=lambda layer: layer.get("top_elevation", math.inf), reverse=True)
+    tops = np.array([layer.get("top_elevation", math.inf) for layer in layers], dtype=float)
+    tops[0] = math.inf  # top layer extends to the ground surface
+    cohesion = np.array([layer.get("cohesion", 0.0) for layer in layers], dtype=float)
+    tan_phi = np.tan(np.radians([layer.get("friction_angle", 0.0) for layer in layers]))
+    gamma = np.array([layer["unit_weight"] for layer in layers], dtype=float)
+    gamma_sat = np.array(
+        [layer.get("saturated_unit_weight", layer["unit_weight"]) for layer in layers],
+        dtype=float
+    )
+
+    if phreatic_surface:
+        wx = np.array([p["x"] for p in phreatic_surface], dtype=float)
+        wy = np.array([p["y"] for p in phreatic_surface], dtype=float)
+        order = np.argsort(wx)
+        wx, wy = wx[order], wy[order]
+    else:
+        wx = np.array([gx[0], gx[-1]])
+        wy = np.full(2, -1e9)
+
+    return {
+        "gx": gx, "gy": gy, "direction": direction,
+        "tops": tops, "cohesion": cohesion, "tan_phi": tan_phi,
+        "gamma": gamma, "gamma_sat": gamma_sat,
+        "wx": wx, "wy": wy
+    }
+
+
+def _overlap(lo: np.ndarray, hi: np.ndarray, layer_lo: float, layer_hi: float) -> np.ndarray:
+    """Length of [lo, hi] inside [layer_lo, layer_hi], elementwise"""
+    return np.clip(np.minimum(hi, layer_hi) - np.maximum(lo, layer_lo), 0.0, None)
+
+
+def _find_slip_limits(
+    xc: np.ndarray,
+    yc: np.ndarray,
+    radius: np.ndarray,
+    model: Dict,
+    samples: int = 64,
+    bisections: int = 24
+):
+    """
+    Locate entry and exit points of every trial circle with the ground surface.
+    Returns (x_entry, x_exit, valid).
+    """
+    gx, gy = model["gx"], model["gy"]
+    t = np.linspace(0.0, 1.0, samples)
+    x = (xc - radius)[:, None] + (2.0 * radius)[:, None] * t[None, :]
+
+    def depth_below_ground(xs, col):
+        dx = xs - xc[col] if col is not None else xs - xc[:, None]
+        r = radius[col] if col is not None else radius[:, None]
+        y_c = yc[col] if col is not None else yc[:, None]
+        y_base = y_c - np.sqrt(np.clip(r * r - dx * dx, 0.0, None))
+        return np.interp(xs, gx, gy) - y_base
+
+    inside = depth_below_ground(x, None) > 0.0
+    valid = inside.any(axis=1)
+    first = np.argmax(inside, axis=1)
+    last = samples - 1 - np.argmax(inside[:, ::-1], axis=1)
+
+    rows = np.arange(len(xc))
+    # Bracket the crossings between neighbouring samples and bisect
+    lo_in, hi_in = x[rows, np.maximum(first - 1, 0)], x[rows, first]
+    lo_out, hi_out = x[rows, last], x[rows, np.minimum(last + 1, samples - 1)]
+    for _ in range(bisections):
+        mid = 0.5 * (lo_in + hi_in)
+        below = depth_below_ground(mid, rows) > 0.0
+        hi_in = np.where(below, mid, hi_in)
+        lo_in = np.where(below, lo_in, mid)
+
+        mid = 0.5 * (lo_out + hi_out)
+        below = depth_below_ground(mid, rows) > 0.0
+        lo_out = np.where(below, mid, lo_out)
+        hi_out = np.where(below, hi_out, mid)
+
+    return hi_in, lo_out, valid & (lo_out > hi_in)
+
+
+def _evaluate_circles(
+    xc: np.ndarray,
+    yc: np.ndarray,
+    radius: np.ndarray,
+    model: Dict,
+    method: str = "bishop",
+    n_slices: int = 30,
+    tolerance: float = 1e-4,
+    max_iterations: int = 100
+) -> np.ndarray:
+    """
+    Factor of safety for every trial circle. All slice quantities are
+    (circles × slices) arrays and the fixed-point iteration runs on the whole
+    batch at once. Invalid circles return inf.
+    """
+    xc = np.asarray(xc, dtype=float)
+    yc = np.asarray(yc, dtype=float)
+    radius = np.asarray(radius, dtype=float)
+    n = len(xc)
+    if n == 0:
+        return np.empty(0)
+
+    x_entry, x_exit, valid = _find_slip_limits(xc, yc, radius, model)
+
+    # Slice geometry
+    width = ((x_exit - x_entry) / n_slices)[:, None]
+    xm = x_entry[:, None] + width * (np.arange(n_slices)[None, :] + 0.5)
+    dx = xm - xc[:, None]
+    r = radius[:, None]
+    y_base = yc[:, None] - np.sqrt(np.clip(r * r - dx * dx, 0.0, None))
+    y_top = np.interp(xm, model["gx"], model["gy"])
+    height = np.clip(y_top - y_base, 0.0, None)
+    active = height > 0.0
+
+    sin_a = np.clip(model["direction"] * dx / r, -0.999, 0.999)
+    cos_a = np.sqrt(1.0 - sin_a * sin_a)
+
+    # Slice weight from the layered column, saturated below the phreatic line
+    y_water = np.interp(xm, model["wx"], model["wy"])
+    y_wet_top = np.clip(np.minimum(y_top, y_water), y_base, None)
+    tops = model["tops"]
+    weight = np.zeros_like(xm)
+    for k in range(len(tops)):
+        layer_hi = tops[k]
+        layer_lo = tops[k + 1] if k + 1 < len(tops) else -np.inf
+        total = _overlap(y_base, y_top, layer_lo, layer_hi)
+        wet = _overlap(y_base, y_wet_top, layer_lo, layer_hi)
+        weight += model["gamma"][k] * (total - wet) + model["gamma_sat"][k] * wet
+    weight *= width
+
+    # Strength parameters of the layer at the slice base
+    if len(tops) > 1:
+        base_layer = (y_base[..., None] < tops[None, None, 1:]).sum(axis=-1)
+    else:
+        base_layer = np.zeros(xm.shape, dtype=int)
+    cohesion = model["cohesion"][base_layer]
+    tan_phi = model["tan_phi"][base_layer]
+
+    pore_pressure = GAMMA_WATER * np.clip(y_water - y_base, 0.0, None)
+    effective = np.clip(weight - pore_pressure * width, 0.0, None)
+    resisting = np.where(active, cohesion * width + effective * tan_phi, 0.0)
+
+    if method == "janbu":
+        driving = (weight * sin_a / cos_a).sum(axis=1)
+        # Janbu correction factor from depth/length ratio of the sliding mass
+        chord = np.hypot(x_exit - x_entry, np.interp(x_exit, model["gx"], model["gy"])
+                         - np.interp(x_entry, model["gx"], model["gy"]))
+        depth_ratio = np.where(chord > 0, height.max(axis=1) / np.where(chord > 0, chord, 1.0), 0.0)
+        has_c = (cohesion * active).max(axis=1) > 0
+        has_phi = (tan_phi * active).max(axis=1) > 0
+        b1 = np.where(has_c & has_phi, 0.50, np.where(has_c, 0.69, 0.31))
+        correction = 1.0 + b1 * (depth_ratio - 1.4 * depth_ratio ** 2)
+    else:
+        driving = (weight * sin_a).sum(axis=1)
+        correction = np.ones(n)
+
+    ok = valid & (driving > 1e-9) & (weight.sum(axis=1) > 1e-9)
+    safe_driving = np.where(ok, driving, 1.0)
+
+    # Ordinary (Fellenius) method as the starting guess
+    fellenius = np.where(
+        active,
+        cohesion * width / cos_a + np.clip(weight * cos_a - pore_pressure * width / cos_a, 0.0, None) * tan_phi,
+        0.0
+    ).sum(axis=1) / safe_driving
+    fos = np.clip(fellenius, 0.05, None)
+
+    for _ in range(max_iterations):
+        m_alpha = np.maximum(cos_a + sin_a * tan_phi / fos[:, None], MIN_M_ALPHA)
+        if method == "janbu":
+            terms = resisting / (cos_a * m_alpha)
+        else:
+            terms = resisting / m_alpha
+        updated = correction * terms.sum(axis=1) / safe_driving
+        converged = np.all(np.abs(updated - fos) <= tolerance * np.maximum(fos, 1.0))
+        fos = np.clip(updated, 1e-3, None)
+        if converged:
+            break
+
+    return np.where(ok, fos, np.inf)
+
+
+def _evaluate_chunk(args) -> np.ndarray:
+    """Process-pool entry point"""
+    return _evaluate_circles(*args)
+
+
+class SlopeStabilityEngine:
+    """Limit equilibrium slope stability with slip-circle grid search"""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def default_search_grid(self, ground_profile: List[Dict]) -> Dict:
+        """Centre grid above the slope face and tangent elevations below the toe"""
+        xs = [p["x"] for p in ground_profile]
+        ys = [p["y"] for p in ground_profile]
+        height = max(max(ys) - min(ys), 1.0)
+
+        # Locate the sloping part of the profile (where elevation changes)
+        face = [
+            (x0, x1) for (x0, y0), (x1, y1) in zip(
+                sorted(zip(xs, ys))[:-1], sorted(zip(xs, ys))[1:]
+            ) if abs(y1 - y0) > 1e-9
+        ]
+        toe_x = min(f[0] for f in face) if face else min(xs)
+        crest_x = max(f[1] for f in face) if face else max(xs)
+
+        return {
+            "x_min": toe_x - 0.5 * height,
+            "x_max": crest_x + 0.5 * height,
+            "nx": 20,
+            "y_min": max(ys) + 0.25 * height,
+            "y_max": max(ys) + 2.0 * height,
+            "ny": 20,
+            "tangent_min": min(ys) - 0.5 * height,
+            "tangent_max": min(ys) + 0.75 * height,
+            "n_tangent": 10
+        }
+
+    def analyze(
+        self,
+        ground_profile: List[Dict],
+        soil_layers: List[Dict],
+        phreatic_surface: Optional[List[Dict]] = None,
+        method: str = "bishop",
+        search_grid: Optional[Dict] = None,
+        n_slices: int = 30
+    ) -> Dict:
+        """
+        Search a grid of centres × tangent elevations for the critical circle.
+
+        ground_profile: [{"x", "y"}, ...] surface polyline
+        soil_layers: [{"top_elevation", "cohesion", "friction_angle", "unit_weight",
+                       "saturated_unit_weight"}, ...]; the uppermost layer may omit
+                       top_elevation
+        phreatic_surface: [{"x", "y"}, ...] water table polyline
+        method: "bishop" or "janbu"
+        """
+        method = method.lower()
+        if method not in ("bishop", "janbu"):
+            raise ValueError(f"Unsupported method: {method}")
+        if len(ground_profile) < 2:
+            raise ValueError("Ground profile needs at least two points")
+        if not soil_layers:
+            raise ValueError("At least one soil layer is required")
+
+        if not 1 <= n_slices <= MAX_SLICES:
+            raise ValueError(f"n_slices must be between 1 and {MAX_SLICES}")
+
+        model = _build_soil_model(ground_profile, soil_layers, phreatic_surface)
+        grid = self.default_search_grid(ground_profile)
+        grid.update(search_grid or {})
+        counts = [int(grid[key]) for key in ("nx", "ny", "n_tangent")]
+        if min(counts) < 1:
+            raise ValueError("Search grid counts must be positive")
+        if counts[0] * counts[1] * counts[2] > MAX_TRIAL_SURFACES:
+            raise ValueError(f"Search grid too large (maximum {MAX_TRIAL_SURFACES} trial surfaces)")
+
+        cx = np.linspace(grid["x_min"], grid["x_max"], int(grid["nx"]))
+        cy = np.linspace(grid["y_min"], grid["y_max"], int(grid["ny"]))
+        tangent = np.linspace(grid["tangent_min"], grid["tangent_max"], int(grid["n_tangent"]))
+        xc, yc, yt = (a.ravel() for a in np.meshgrid(cx, cy, tangent, indexing="ij"))
+        keep = yc > yt
+        xc, yc, radius = xc[keep], yc[keep], (yc - yt)[keep]
+
+        fos = self._run_search(xc, yc, radius, model, method, n_slices)
+
+        finite = np.isfinite(fos)
+        if not finite.any():
+            return {
+                "method": method,
+                "factor_of_safety": None,
+                "status": "undetermined",
+                "trial_surfaces": int(len(fos)),
+                "valid_surfaces": 0,
+                "critical_circle": None
+            }
+
+        best = int(np.argmin(np.where(finite, fos, np.inf)))
+        x_entry, x_exit, _ = _find_slip_limits(xc[best:best + 1], yc[best:best + 1], radius[best:best + 1], model)
+        min_fos = float(fos[best])
+
+        return {
+            "method": method,
+            "factor_of_safety": round(min_fos, 3),
+            "status": self.classify(min_fos),
+            "trial_surfaces": int(len(fos)),
+            "valid_surfaces": int(finite.sum()),
+            "critical_circle": {
+                "x_center": round(float(xc[best]), 3),
+                "y_center": round(float(yc[best]), 3),
+                "radius": round(float(radius[best]), 3),
+                "entry_x": round(float(x_entry[0]), 3),
+                "exit_x": round(float(x_exit[0]), 3)
+            },
+            "search_grid": grid
+        }
+
+    def _run_search(
+        self,
+        xc: np.ndarray,
+        yc: np.ndarray,
+        radius: np.ndarray,
+        model: Dict,
+        method: str,
+        n_slices: int
+    ) -> np.ndarray:
+        """Evaluate trial circles inline or split across a process pool"""
+        if len(xc) < PARALLEL_THRESHOLD or self.max_workers <= 1:
+            return _evaluate_circles(xc, yc, radius, model, method, n_slices)
+
+        chunks = np.array_split(np.arange(len(xc)), self.max_workers)
+        jobs = [(xc[c], yc[c], radius[c], model, method, n_slices) for c in chunks if len(c)]
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            return np.concatenate(list(pool.map(_evaluate_chunk, jobs)))
+
+    @staticmethod
+    def classify(fos: float) -> str:
+        """Stability status per IS 7894 factor of safety bands"""
+        if fos >= 1.5:
+            return "stable"
+        elif fos >= 1.2:
+            return "marginal"
+        return "unstable"
@@ -0,0 +1,118 @@
+"""
+Workspace Summary - Materialized per-project file statistics
+
+Each project keeps one WorkspaceCategoryStats row per file category holding
+the count and total size of its latest files. Uploads and deletes adjust the
+affected row in the same transaction, so reading a workspace summary costs at
+most one row per category regardless of how many files the project holds.
+Projects without rows (created before the summary existed) are rebuilt from
+ProjectFile in one GROUP BY the first time they are read or changed.
+"""
+
+from typing import Dict, Tuple
+
+from sqlalchemy import delete, exists, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.file_management import FileCategory, ProjectFile, WorkspaceCategoryStats
+
+
+class WorkspaceSummary:
+    """Maintains and reads WorkspaceCategoryStats"""
+
+    def _materialized(self, db: Session, project_id: int) -> bool:
+        return db.query(exists().where(WorkspaceCategoryStats.project_id == project_id)).scalar()
+
+    def rebuild(self, db: Session, project_id: int):
+        """Recompute a project's rows from its latest files; the caller commits"""
+        totals = db.execute(
+            select(ProjectFile.file_category, func.count(), func.coalesce(func.sum(ProjectFile.file_size), 0))
+            .where(ProjectFile.project_id == project_id, ProjectFile.is_latest == True)
+            .group_by(ProjectFile.file_category)
+        ).all()
+        db.execute(delete(WorkspaceCategoryStats).where(WorkspaceCategoryStats.project_id == project_id))
+        # Every category gets a row, so an empty project still counts as materialized
+        counts = {category: (count, size) for category, count, size in totals}
+        db.execute(insert(WorkspaceCategoryStats), [
+            {
+                "project_id": project_id,
+                "file_category": category,
+                "file_count": counts.get(category, (0, 0))[0],
+                "total_size": counts.get(category, (0, 0))[1]
+            }
+            for category in FileCategory
+        ])
+
+    def _ensure(self, db: Session, project_id: int) -> bool:
+        """Materialize the project if needed; True when the rows were just rebuilt"""
+        if self._materialized(db, project_id):
+            return False
+        try:
+            with db.begin_nested():
+                self.rebuild(db, project_id)
+            return True
+        except IntegrityError:
+            # A concurrent transaction materialized it first
+            return False
+
+    def _adjust(self, db: Session, project_id: int, category: FileCategory, files: int, size: int):
+        if self._ensure(db, project_id):
+            return  # The rebuild already counted the flushed change
+        db.execute(
+            update(WorkspaceCategoryStats)
+            .where(
+                WorkspaceCategoryStats.project_id == project_id,
+                WorkspaceCategoryStats.file_category == category
+            )
+            .values(
+                file_count=WorkspaceCategoryStats.file_count + files,
+                total_size=WorkspaceCategoryStats.total_size + size
+            )
+        )
+
+    def file_added(self, db: Session, file_record: ProjectFile):
+        """Count a flushed latest file; the caller commits"""
+        if file_record.is_latest:
+            self._adjust(db, file_record.project_id, file_record.file_category, 1, file_record.file_size)
+
+    def files_added(self, db: Session, project_id: int, totals: Dict[FileCategory, Tuple[int, int]]):
+        """Count flushed latest files given as {category: (files, bytes)}; the caller commits"""
+        if self._ensure(db, project_id):
+            return  # The rebuild already counted every flushed file
+        for category, (files, size) in totals.items():
+            db.execute(
+                update(WorkspaceCategoryStats)
+                .where(
+                    WorkspaceCategoryStats.project_id == project_id,
+                    WorkspaceCategoryStats.file_category == category
+                )
+                .values(
+                    file_count=WorkspaceCategoryStats.file_count + files,
+                    total_size=WorkspaceCategoryStats.total_size + size
+                )
+            )
+
+    def file_removed(self, db: Session, file_record: ProjectFile):
+        """Uncount a latest file after its delete is flushed; the caller commits"""
+        if file_record.is_latest:
+            self._adjust(db, file_record.project_id, file_record.file_category, -1, -file_record.file_size)
+
+    def summary(self, db: Session, project_id: int) -> Dict:
+        if self._ensure(db, project_id):
+            db.commit()
+        rows = db.execute(
+            select(WorkspaceCategoryStats.file_category, WorkspaceCategoryStats.file_count,
+                   WorkspaceCategoryStats.total_size)
+            .where(WorkspaceCategoryStats.project_id == project_id)
+        ).all()
+        counts = {category: (count, size) for category, count, size in rows}
+        return {
+            "total_files": sum(count for count, _ in counts.values()),
+            "total_size": sum(size for _, size in counts.values()),
+            "files_by_category": {cat.value: counts.get(cat, (0, 0))[0] for cat in FileCategory},
+            "size_by_category": {cat.value: counts.get(cat, (0, 0))[1] for cat in FileCategory}
+        }
+
+
+workspace_summary = WorkspaceSummary()
@@ -0,0 +1,318 @@
+"""
+Geotechnical Engine Tests - Slope stability, bearing capacity, piles and settlement
+"""
+
+import math
+import numpy as np
+import pytest
+from app.services import slope_stability
+from app.services.slope_stability import SlopeStabilityEngine
+from app.services.bearing_capacity import BearingCapacityEngine, bearing_capacity_factors
+from app.services.pile_design import PileGroupOptimizer
+from app.services.settlement_analysis import (
+    FoundationSettlementEngine, stress_increase, neighbour_pairs
+)
+from app.services.geotechnical_analysis import GeotechnicalAnalysisService
+
+SLOPE_PROFILE = [
+    {"x": -20, "y": 0},
+    {"x": 0, "y": 0},
+    {"x": 20, "y": 10},
+    {"x": 40, "y": 10}
+]
+
+class TestSlopeStabilityEngine:
+    """Test Bishop/Janbu slip-circle search"""
+
+    def test_cohesionless_slope_matches_infinite_slope(self):
+        """Critical circle of a dry c=0 slope tends to tan(phi)/tan(beta)"""
+        engine = SlopeStabilityEngine(max_workers=1)
+        result = engine.analyze(
+            SLOPE_PROFILE,
+            [{"cohesion": 0, "friction_angle": 30, "unit_weight": 20}]
+        )
+        expected = math.tan(math.radians(30)) / 0.5
+        assert abs(result["factor_of_safety"] - expected) < 0.02
+        assert result["critical_circle"]["entry_x"] < result["critical_circle"]["exit_x"]
+
+    def test_janbu_and_bishop_agree_roughly(self):
+        engine = SlopeStabilityEngine(max_workers=1)
+        layers = [{"cohesion": 10, "friction_angle": 30, "unit_weight": 20}]
+        bishop = engine.analyze(SLOPE_PROFILE, layers, method="bishop")
+        janbu = engine.analyze(SLOPE_PROFILE, layers, method="janbu")
+        assert abs(bishop["factor_of_safety"] - janbu["factor_of_safety"]) < 0.2
+
+    def test_weak_layer_and_water_reduce_safety(self):
+        engine = SlopeStabilityEngine(max_workers=1)
+        strong = [{"cohesion": 10, "friction_angle": 30, "unit_weight": 20}]
+        base = engine.analyze(SLOPE_PROFILE, strong)["factor_of_safety"]
+
+        layered = strong + [{"top_elevation": 2, "cohesion": 5, "friction_angle": 15, "unit_weight": 19}]
+        assert engine.analyze(SLOPE_PROFILE, layered)["factor_of_safety"] < base
+
+        water = [{"x": p["x"], "y": p["y"] - 2} for p in SLOPE_PROFILE]
+        assert engine.analyze(SLOPE_PROFILE, strong, phreatic_surface=water)["factor_of_safety"] < base
+
+    def test_mirrored_slope_gives_same_result(self):
+        engine = SlopeStabilityEngine(max_workers=1)
+        layers = [{"cohesion": 10, "friction_angle": 30, "unit_weight": 20}]
+        mirrored = [{"x": -p["x"], "y": p["y"]} for p in SLOPE_PROFILE]
+        assert engine.analyze(mirrored, layers)["factor_of_safety"] == \
+            engine.analyze(SLOPE_PROFILE, layers)["factor_of_safety"]
+
+    def test_process_pool_matches_inline(self, monkeypatch):
+        layers = [{"cohesion": 10, "friction_angle": 30, "unit_weight": 20}]
+        inline = SlopeStabilityEngine(max_workers=1).analyze(SLOPE_PROFILE, layers)
+        monkeypatch.setattr(slope_stability, "PARALLEL_THRESHOLD", 100)
+        pooled = SlopeStabilityEngine(max_workers=2).analyze(SLOPE_PROFILE, layers)
+        assert pooled["factor_of_safety"] == inline["factor_of_safety"]
+        assert pooled["critical_circle"] == inline["critical_circle"]
+
+    def test_invalid_method_rejected(self):
+        with pytest.raises(ValueError):
+            SlopeStabilityEngine().analyze(
+                SLOPE_PROFILE, [{"unit_weight": 20}], method="spencer"
+            )
+
+    def test_oversized_search_rejected(self):
+        engine = SlopeStabilityEngine(max_workers=1)
+        layers = [{"unit_weight": 20}]
+        with pytest.raises(ValueError):
+            engine.analyze(SLOPE_PROFILE, layers, search_grid={"nx": 5000, "ny": 5000, "n_tangent": 100})
+        with pytest.raises(ValueError):
+            engine.analyze(SLOPE_PROFILE, layers, n_slices=0)
+        with pytest.raises(ValueError):
+            engine.analyze(SLOPE_PROFILE, layers, search_grid={"nx": 0})
+
+    @pytest.mark.parametrize("angle", [0, -10, 90, 120])
+    def test_legacy_slope_rejects_degenerate_angles(self, angle):
+        from pydantic import ValidationError
+        from app.api.v1.endpoints.geotechnical import SlopeStabilityRequest
+
+        params = dict(slope_height=5.0, slope_angle=angle, soil_cohesion=25,
+                      angle_of_internal_friction=25, unit_weight=20)
+        with pytest.raises(ValueError):
+            GeotechnicalAnalysisService().analyze_slope_stability(**params)
+        with pytest.raises(ValidationError):
+            SlopeStabilityRequest(**params)
+
+class TestBearingCapacityEngine:
+    """Test tabulated factors and batch borehole evaluation"""
+
+    def test_factor_limits_at_zero_friction(self):
+        nc, nq, ngamma = bearing_capacity_factors(0)
+        assert abs(nc - (math.pi + 2)) < 1e-9
+        assert nq == 1.0
+        assert ngamma == 0.0
+
+    def test_tabulated_factors_match_closed_form(self):
+        phi = math.radians(30)
+        nq_exact = math.exp(math.pi * math.tan(phi)) * math.tan(math.pi / 4 + phi / 2) ** 2
+        nc, nq, _ = bearing_capacity_factors(30)
+        assert abs(nq - nq_exact) < 1e-6
+        assert abs(nc - (nq_exact - 1) / math.tan(phi)) < 1e-6
+
+    def test_batch_matches_single_footing(self):
+        service = GeotechnicalAnalysisService()
+        single = service.analyze_soil_bearing_capacity(
+            soil_type="sand", cohesion=0, angle_of_internal_friction=30,
+            unit_weight=20, foundation_depth=1.0, foundation_width=1.5
+        )
+        borehole = {"layers": [{"cohesion": 0, "friction_angle": 30, "unit_weight": 20}]}
+        matrix = BearingCapacityEngine().allowable_pressure_matrix([borehole], [1.5], [1.0])
+        assert matrix.shape == (1, 1, 1)
+        assert abs(matrix[0, 0, 0] - single["safe_bearing_capacity"]) < 0.01
+
+    def test_water_table_reduces_capacity(self):
+        layers = [{"cohesion": 0, "friction_angle": 32, "unit_weight": 19}]
+        dry = {"layers": layers}
+        wet = {"water_table_depth": 0.0, "layers": layers}
+        matrix = BearingCapacityEngine().allowable_pressure_matrix(
+            [dry, wet], [1.0, 2.0, 3.0], [1.0, 2.0]
+        )
+        assert matrix.shape == (2, 2, 3)
+        assert (matrix[1] < matrix[0]).all()
+
+    def test_foundation_zoning_groups_boreholes(self):
+        sand = {"layers": [{"cohesion": 0, "friction_angle": 32, "unit_weight": 19}]}
+        clay = {"layers": [{"cohesion": 60, "friction_angle": 0, "unit_weight": 18}]}
+        result = BearingCapacityEngine().foundation_zoning(
+            [dict(sand, borehole_id="BH-1"), dict(sand, borehole_id="BH-2"), dict(clay, borehole_id="BH-3")],
+            column_load=800,
+            footing_widths=[1.0, 1.5, 2.0, 2.5, 3.0],
+            foundation_depths=[1.0, 1.5, 2.0]
+        )
+        assert all(b["feasible"] for b in result["boreholes"])
+        zone_members = [z["boreholes"] for z in result["zones"]]
+        assert ["BH-1", "BH-2"] in zone_members
+
+PILE_PROFILES = {
+    "clay": {"layers": [
+        {"thickness": 5, "soil_type": "clay", "cohesion": 30, "unit_weight": 18},
+        {"soil_type": "clay", "cohesion": 80, "unit_weight": 19}
+    ]},
+    "sand": {"water_table_depth": 2, "layers": [
+        {"thickness": 3, "friction_angle": 28, "unit_weight": 18},
+        {"friction_angle": 34, "unit_weight": 20}
+    ]}
+}
+
+class TestPileGroupOptimizer:
+    """Test pile group sweep"""
+
+    def test_group_efficiency_below_one_for_groups(self):
+        table = PileGroupOptimizer().evaluate_profile(
+            PILE_PROFILES["clay"], [0.6], [15], [(1, 1), (2, 2), (3, 3)]
+        )
+        efficiency = table["efficiency"][0, 0]
+        assert efficiency[0] == 1.0
+        assert efficiency[2] < efficiency[1] < 1.0
+
+    def test_cheapest_configuration_is_feasible(self):
+        caps = [
+            {"cap_id": "C1", "axial_load": 1500, "profile_id": "clay"},
+            {"cap_id": "C2", "axial_load": 4000, "profile_id": "sand"},
+            {"cap_id": "C3", "axial_load": 1e6, "profile_id": "clay"}
+        ]
+        result = PileGroupOptimizer().optimize(
+            caps, PILE_PROFILES, [0.45, 0.6, 0.9], [10, 15, 20]
+        )
+        c1, c2, c3 = result["caps"]
+        assert c1["feasible"] and c2["feasible"]
+        assert c1["group_safe_capacity"] >= 1500
+        assert c1["settlement_mm"] <= 25.0
+        assert not c3["feasible"]
+        assert result["feasible_caps"] == 2
+
+    def test_heavier_cap_costs_more(self):
+        caps = [
+            {"cap_id": "light", "axial_load": 800, "profile_id": "sand"},
+            {"cap_id": "heavy", "axial_load": 5000, "profile_id": "sand"}
+        ]
+        light, heavy = PileGroupOptimizer().optimize(
+            caps, PILE_PROFILES, [0.45, 0.6, 0.9, 1.2], [10, 15, 20, 25]
+        )["caps"]
+        assert heavy["cost"] > light["cost"]
+
+    def test_unknown_profile_rejected(self):
+        with pytest.raises(ValueError):
+            PileGroupOptimizer().optimize(
+                [{"cap_id": "C1", "axial_load": 100, "profile_id": "rock"}],
+                PILE_PROFILES, [0.6], [10]
+            )
+
+    @pytest.mark.parametrize("caps, diameters, lengths, layouts", [
+        ([{"cap_id": "C1", "axial_load": 100, "profile_id": "clay"}], [0.0], [10], None),
+        ([{"cap_id": "C1", "axial_load": 100, "profile_id": "clay"}], [0.6], [-5], None),
+        ([{"cap_id": "C1", "axial_load": 0, "profile_id": "clay"}], [0.6], [10], None),
+        ([{"cap_id": "C1", "axial_load": float("nan"), "profile_id": "clay"}], [0.6], [10], None),
+        ([{"cap_id": "C1", "axial_load": 100, "profile_id": "clay"}], [], [10], None),
+        ([{"cap_id": "C1", "axial_load": 100, "profile_id": "clay"}], [0.6], [10], [(0, 2)]),
+        ([{"cap_id": "C1", "axial_load": 100, "profile_id": "clay"}], [0.6], [1e9], None),
+        ([{"cap_id": "C1", "axial_load": 100, "profile_id": "clay"}],
+         list(np.linspace(0.3, 1.5, 50)), list(np.linspace(5, 30, 50)), None),
+    ])
+    def test_invalid_sweep_rejected(self, caps, diameters, lengths, layouts):
+        with pytest.raises(ValueError):
+            PileGroupOptimizer().optimize(caps, PILE_PROFILES, diameters, lengths, layouts)
+
+    def test_invalid_optimizer_settings_rejected(self):
+        with pytest.raises(ValueError):
+            PileGroupOptimizer(spacing_ratio=0)
+        with pytest.raises(ValueError):
+            PileGroupOptimizer(factor_of_safety=-1)
+
+    def test_single_pile_uses_given_cohesion(self):
+        service = GeotechnicalAnalysisService()
+        soft = service.design_pile_foundation(1000, "clay", undrained_cohesion=25)
+        stiff = service.design_pile_foundation(1000, "clay", undrained_cohesion=100)
+        assert stiff["end_bearing_capacity"] == pytest.approx(4 * soft["end_bearing_capacity"], abs=0.05)
+
+SETTLEMENT_SOIL = [
+    {"thickness": 3, "unit_weight": 18, "elastic_modulus": 30000},
+    {"thickness": 10, "unit_weight": 17, "compression_index": 0.3,
+     "recompression_index": 0.05, "void_ratio": 0.9, "ocr": 1.5},
+    {"unit_weight": 20, "elastic_modulus": 80000}
+]
+
+class TestFoundationSettlementEngine:
+    """Test stress superposition and plan settlement"""
+
+    def test_boussinesq_centre_of_square(self):
+        # Influence factor 4 × 0.084 below the centre of a B × B area at z = B
+        value = stress_increase(0.0, 0.0, 2.0, -1.0, 1.0, -1.0, 1.0, 100.0)
+        assert abs(value - 33.6) < 0.1
+
+    def test_neighbour_increases_settlement(self):
+        engine = FoundationSettlementEngine()
+        alone = engine.analyze_plan(
+            [{"footing_id": "F1", "x": 0, "y": 0, "width": 2, "pressure": 150}],
+            SETTLEMENT_SOIL, water_table_depth=2.0
+        )["footings"][0]["settlement_mm"]
+        pair = engine.analyze_plan(
+            [
+                {"footing_id": "F1", "x": 0, "y": 0, "width": 2, "pressure": 150},
+                {"footing_id": "F2", "x": 3, "y": 0, "width": 2, "pressure": 150}
+            ],
+            SETTLEMENT_SOIL, water_table_depth=2.0
+        )
+        assert pair["footings"][0]["settlement_mm"] > alone
+        assert pair["interacting_pairs"] == 2
+
+    def test_differential_settlement_between_unequal_loads(self):
+        result = FoundationSettlementEngine().analyze_plan(
+            [
+                {"footing_id": "F1", "x": 0, "y": 0, "width": 2, "pressure": 50},
+                {"footing_id": "F2", "x": 4, "y": 0, "width": 2, "pressure": 200}
+            ],
+            SETTLEMENT_SOIL
+        )
+        f1, f2 = result["footings"]
+        assert f2["settlement_mm"] > f1["settlement_mm"]
+        expected = (f2["settlement_mm"] - f1["settlement_mm"]) / 4.0
+        assert abs(result["max_angular_distortion"] - expected) < 1e-3
+
+    def test_cutoff_matches_brute_force(self):
+        rng = np.random.default_rng(7)
+        x, y = rng.uniform(0, 60, 80), rng.uniform(0, 60, 80)
+        targets, sources = neighbour_pairs(x, y, x, y, 10.0)
+        found = set(zip(targets.tolist(), sources.tolist()))
+        distance = np.hypot(x[:, None] - x[None, :], y[:, None] - y[None, :])
+        expected = set(zip(*np.nonzero(distance <= 10.0)))
+        assert found == {(int(t), int(s)) for t, s in expected}
+
+    def test_settlement_grid(self):
+        result = FoundationSettlementEngine(method="westergaard").analyze_plan(
+            [{"footing_id": "F1", "x": 0, "y": 0, "width": 2, "load": 600}],
+            SETTLEMENT_SOIL, grid_spacing=1.0
+        )
+        grid = np.array(result["grid"]["settlement_mm"])
+        assert grid.shape == (len(result["grid"]["y"]), len(result["grid"]["x"]))
+        assert grid.max() > 0
+
+    def test_per_footing_cutoff_matches_brute_force(self):
+        rng = np.random.default_rng(11)
+        x, y = rng.uniform(0, 200, 150), rng.uniform(0, 200, 150)
+        radius = rng.uniform(2, 12, 150)
+        radius[0] = 150.0  # one raft
+        targets, sources = neighbour_pairs(x, y, x, y, radius)
+        found = set(zip(targets.tolist(), sources.tolist()))
+        distance = np.hypot(x[:, None] - x[None, :], y[:, None] - y[None, :])
+        expected = set(zip(*np.nonzero(distance <= radius[None, :])))
+        assert found == {(int(t), int(s)) for t, s in expected}
+
+    def test_raft_does_not_widen_other_cutoffs(self):
+        footings = [{"footing_id": "R", "x": -60, "y": 0, "width": 20, "pressure": 80}] + [
+            {"footing_id": f"F{i}", "x": 20.0 * i, "y": 0, "width": 2, "pressure": 150} for i in range(10)
+        ]
+        result = FoundationSettlementEngine().analyze_plan(footings, SETTLEMENT_SOIL)
+        # Pads 20 m apart stay independent; only the raft reaches the nearest two
+        assert result["interacting_pairs"] == 2
+        assert result["cutoff_radius"] == pytest.approx(81.5)
+
+    def test_oversized_grid_rejected(self):
+        with pytest.raises(ValueError):
+            FoundationSettlementEngine().analyze_plan(
+                [{"footing_id": "F1", "x": 0, "y": 0, "width": 2, "load": 600}],
+                SETTLEMENT_SOIL, grid_spacing=1e-4
+            )